@@ -0,0 +1,62 @@
+"""
+Mide el motor de recocido simulado (annealing): movimientos evaluados por segundo y puntaje frente al
+motor por campañas (su punto de partida) y al GA con el mismo presupuesto de tiempo, con y sin lista tabú.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.annealing --families xs s m --budget-ms 2000
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+
+from ..models.instance import build_instance
+from ..optimizers.annealing import optimize_annealing
+from ..optimizers.campaign_optimizer import optimize_campaigns
+from ..optimizers.genetic_optimizer3 import optimize_genetic, schedule_score
+from .generator import generate_family, normalize_columns
+
+def _run(engine, instance, seed: int) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    machine_schedules = instance.new_machine_schedules()
+    stats = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine(instance, machine_schedules, stats)
+        stats['time_ms'] = (time.perf_counter() - start) * 1000
+    stats['score'] = schedule_score(machine_schedules)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', nargs='+', default=['xs', 's', 'm'])
+    parser.add_argument('--budget-ms', type=float, default=2000)
+    parser.add_argument('--tabu-tenure', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    engines = {
+        'campaign': lambda instance, schedules, stats: optimize_campaigns(instance.jobs, schedules, instance.sleeve_index, stats=stats),
+        'annealing': lambda instance, schedules, stats: optimize_annealing(
+            instance.jobs, schedules, instance.sleeve_index, stats=stats, max_moves=None, deadline_ms=args.budget_ms),
+        'annealing+tabu': lambda instance, schedules, stats: optimize_annealing(
+            instance.jobs, schedules, instance.sleeve_index, stats=stats, max_moves=None, deadline_ms=args.budget_ms,
+            tabu_tenure=args.tabu_tenure),
+        'ga': lambda instance, schedules, stats: optimize_genetic(
+            instance.jobs, schedules, instance.sleeve_index, stats=stats, num_generations=None, deadline_ms=args.budget_ms),
+    }
+    print(f"{'family':>8} {'engine':>15} {'time ms':>9} {'moves/s':>10} {'evals/s':>9} {'score':>10}")
+    for family in args.families:
+        instance = build_instance(normalize_columns(generate_family(family)))
+        for name, engine in engines.items():
+            stats = _run(engine, instance, args.seed)
+            print(f"{family:>8} {name:>15} {stats['time_ms']:>9.0f} {stats.get('moves_per_s', 0):>10.0f} "
+                  f"{stats.get('evaluations_per_s', 0):>9.0f} {stats['score']:>10.0f}")
+
+if __name__ == '__main__':
+    main()
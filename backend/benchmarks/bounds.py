@@ -0,0 +1,61 @@
+"""
+Mide la poda por cotas del GA de estado estacionario: con las mismas semillas y el mismo número de
+hijos, compara la corrida con cotas (cada hijo se simula solo mientras puede superar al peor individuo)
+contra la corrida sin cotas: hijos por segundo, simulaciones de máquina, hijos podados antes de simular
+o abandonados a mitad, y si el cronograma final es idéntico (la búsqueda no debe cambiar).
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.bounds --families s m --offspring 20000
+    python -m backend.benchmarks.bounds --families xs s --offspring 2000 --flexible
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+
+from ..models.instance import build_instance
+from ..optimizers.genetic_optimizer3 import schedule_score
+from ..optimizers.steady_state_ga import optimize_steady_state
+from .generator import generate_family, normalize_columns
+
+def _run(instance, offspring: int, seed: int, bounded: bool) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    machine_schedules = instance.new_machine_schedules()
+    stats = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        optimize_steady_state(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats,
+                              num_offspring=offspring, bounded=bounded)
+        stats['seconds'] = time.perf_counter() - start
+    stats['score'] = schedule_score(machine_schedules)
+    stats['order'] = [[item['job_object'].original_index for item in schedule.jobs] for schedule in machine_schedules.values()]
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', nargs='+', default=['s', 'm'])
+    parser.add_argument('--offspring', type=int, default=20000)
+    parser.add_argument('--flexible', action='store_true', help="trabajos elegibles en varias máquinas (evaluador de orden completo)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'family':>8} {'bounded':>8} {'offspring/s':>11} {'simulations':>11} {'pruned':>7} {'abandoned':>9} "
+          f"{'score':>11} {'same':>5}")
+    for family in args.families:
+        instance = build_instance(normalize_columns(generate_family(family)), flexible=args.flexible)
+        reference = None
+        for bounded in (False, True):
+            stats = _run(instance, args.offspring, args.seed, bounded)
+            reference = reference or stats
+            bounds = stats.get('bounds', {})
+            print(f"{family:>8} {str(bounded):>8} {stats['offspring'] / stats['seconds']:>11.0f} "
+                  f"{stats.get('machine_simulations', stats['evaluations']):>11} {bounds.get('pruned', 0):>7} "
+                  f"{bounds.get('abandoned', 0):>9} {stats['score']:>11.0f} {str(stats['order'] == reference['order']):>5}")
+
+if __name__ == '__main__':
+    main()
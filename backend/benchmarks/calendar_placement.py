@@ -0,0 +1,45 @@
+"""
+Mide el costo de buscar el siguiente inicio factible en calendarios con muchas ventanas
+(turnos + paradas), para verificar que la colocación sigue siendo O(log k).
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.calendar_placement --days 30 365 3000
+"""
+
+import argparse
+import random
+import time
+
+from ..optimizers.availability_calendar import AvailabilityCalendar
+
+SHIFTS = [(6.0, 10.0), (10.5, 14.0), (14.0, 22.0)]
+
+def _time_queries(calendar: AvailabilityCalendar, horizon: float, queries: int, rng: random.Random) -> float:
+    times = [rng.random() * horizon for _ in range(queries)]
+    hours = [rng.random() * 4 for _ in range(queries)]
+    start = time.perf_counter()
+    for t, h in zip(times, hours):
+        begin = calendar.earliest_start(t, h)
+        if begin is not None:
+            calendar.finish_time(begin, h)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, nargs='+', default=[1, 30, 365, 3000])
+    parser.add_argument('--queries', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for num_days in args.days:
+        horizon = num_days * 24.0
+        downtimes = [(start, start + rng.random() * 2) for start in (rng.random() * horizon for _ in range(num_days * 2))]
+        for split_jobs in (True, False):
+            calendar = AvailabilityCalendar.from_shifts(SHIFTS, num_days, downtimes, split_jobs)
+            elapsed = _time_queries(calendar, horizon, args.queries, rng)
+            print(f"days={num_days:5d} windows={len(calendar.starts):6d} split_jobs={split_jobs!s:5}: "
+                  f"{elapsed * 1e6 / args.queries:.2f} us/placement")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Compara el motor jerárquico por campañas de tipo de impresión con el codicioso, con el GA y con el GA
+sembrado con el cronograma por campañas: tiempo, horas de cambio (setup), trabajos sin programar y
+puntaje (metros + criticidad ponderada).
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.campaigns --families xs s m --ga-budget-ms 3000
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+
+from ..models.instance import build_instance
+from ..optimizers.campaign_optimizer import optimize_campaigns, schedule_order
+from ..optimizers.genetic_optimizer3 import optimize_genetic, schedule_score
+from ..optimizers.greedy_optimizer import optimize_greedy
+from .generator import generate_family, normalize_columns
+
+def _setup_hours(machine_schedules) -> float:
+    return sum(item['setup_time'] for schedule in machine_schedules.values() for item in schedule.jobs)
+
+def _run(engine, instance, seed: int) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    machine_schedules = instance.new_machine_schedules()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        unscheduled = engine(instance, machine_schedules)
+        wall_time_ms = (time.perf_counter() - start) * 1000
+    return {'time_ms': wall_time_ms, 'setup_hours': _setup_hours(machine_schedules), 'unscheduled': unscheduled,
+            'score': schedule_score(machine_schedules)}
+
+def _seeded_ga(budget_ms: float):
+    def run(instance, machine_schedules):
+        campaign_schedules = instance.new_machine_schedules()
+        optimize_campaigns(instance.jobs, campaign_schedules, instance.sleeve_index)
+        return optimize_genetic(instance.jobs, machine_schedules, instance.sleeve_index, deadline_ms=budget_ms,
+                                seed_chromosomes=[schedule_order(instance.jobs, campaign_schedules)])
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', nargs='+', default=['xs', 's', 'm'])
+    parser.add_argument('--ga-budget-ms', type=float, default=3000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    engines = {
+        'greedy': lambda instance, schedules: optimize_greedy(instance.jobs, schedules),
+        'campaign': lambda instance, schedules: optimize_campaigns(instance.jobs, schedules, instance.sleeve_index),
+        'ga': lambda instance, schedules: optimize_genetic(instance.jobs, schedules, instance.sleeve_index, deadline_ms=args.ga_budget_ms),
+        'ga+campaign': _seeded_ga(args.ga_budget_ms),
+    }
+    print(f"{'family':>8} {'engine':>12} {'time ms':>9} {'setup h':>8} {'unscheduled':>11} {'score':>10}")
+    for family in args.families:
+        instance = build_instance(normalize_columns(generate_family(family)))
+        for name, engine in engines.items():
+            stats = _run(engine, instance, args.seed)
+            print(f"{family:>8} {name:>12} {stats['time_ms']:>9.0f} {stats['setup_hours']:>8.1f} "
+                  f"{stats['unscheduled']:>11} {stats['score']:>10.0f}")
+
+if __name__ == '__main__':
+    main()
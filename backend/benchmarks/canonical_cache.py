@@ -0,0 +1,63 @@
+"""
+Mide la tasa de aciertos y el ahorro de tiempo de la caché canónica por máquina del GA
+(genetic_optimizer3) en instancias con varias máquinas. Ambas corridas usan la misma semilla,
+así que deben encontrar exactamente la misma solución.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.canonical_cache --jobs 200 --machines 3 10 30 --generations 30
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+
+from ..models.domain import MachineSchedule
+from ..models.instance import build_instance
+from ..optimizers.genetic_optimizer3 import optimize_genetic, schedule_score
+from .generator import generate_instance, normalize_columns
+
+def _run(jobs: list, machine_names: list, canonical: bool, generations: int, seed: int) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    machine_schedules = {name: MachineSchedule(name) for name in machine_names}
+    stats = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        optimize_genetic(jobs, machine_schedules, stats=stats, num_generations=generations, canonical=canonical)
+        stats['wall_time_s'] = time.perf_counter() - start
+    stats['score'] = schedule_score(machine_schedules)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--machines', type=int, nargs='+', default=[3, 10, 30])
+    parser.add_argument('--generations', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'machines':>8} {'order s':>9} {'canon s':>9} {'speedup':>8} {'chromo hit':>10} "
+          f"{'machine hit':>11} {'sims saved':>10} {'same score':>10}")
+    for num_machines in args.machines:
+        df = normalize_columns(generate_instance(args.jobs, args.seed, num_machines))
+        instance = build_instance(df)
+        order = _run(instance.jobs, instance.machine_names, False, args.generations, args.seed)
+        canon = _run(instance.jobs, instance.machine_names, True, args.generations, args.seed)
+
+        if 'machine_cache' not in canon:
+            print(f"{num_machines:>8} canonical evaluation does not apply to this instance")
+            continue
+
+        # Without the canonical layer every chromosome evaluation simulates every machine
+        full_simulations = canon['evaluations'] * len(instance.machine_names)
+        saved = 1 - canon['machine_simulations'] / full_simulations if full_simulations else 0.0
+        print(f"{num_machines:>8} {order['wall_time_s']:>9.3f} {canon['wall_time_s']:>9.3f} "
+              f"{order['wall_time_s'] / canon['wall_time_s']:>7.2f}x {canon['cache']['hit_rate']:>10.1%} "
+              f"{canon['machine_cache']['hit_rate']:>11.1%} {saved:>10.1%} {str(order['score'] == canon['score']):>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compara el GA (genetic_optimizer3) con y sin el reemplazo de individuos repetidos y los reinicios
+parciales por pérdida de diversidad, con el mismo presupuesto de tiempo: puntaje medio sobre varias
+semillas, evaluaciones, proporción de individuos repetidos antes y después del reemplazo, reinicios
+y diversidad final.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.ga_diversity --families xs s m --budget-ms 2000 --seeds 5
+"""
+
+import argparse
+import contextlib
+import io
+import random
+
+import numpy as np
+
+from ..models.instance import build_instance
+from ..optimizers.genetic_optimizer3 import optimize_genetic, schedule_score
+from .generator import generate_family, normalize_columns
+
+VARIANTS = {
+    'plain': {'deduplicate': False, 'diversity_threshold': None},
+    'dedup': {'deduplicate': True, 'diversity_threshold': None},
+    'dedup+restart': {'deduplicate': True, 'diversity_threshold': 0.5},
+}
+
+def _run(instance, budget_ms: float, seed: int, params: dict) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    machine_schedules = instance.new_machine_schedules()
+    stats = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimize_genetic(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats, num_generations=None,
+                         deadline_ms=budget_ms, **params)
+    stats['score'] = schedule_score(machine_schedules)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', nargs='+', default=['xs', 's', 'm'])
+    parser.add_argument('--budget-ms', type=float, default=2000)
+    parser.add_argument('--seeds', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'family':>8} {'variant':>14} {'score':>11} {'evaluations':>11} {'cache hit':>9} {'dup before':>10} "
+          f"{'dup after':>9} {'restarts':>8} {'diversity':>9}")
+    for family in args.families:
+        instance = build_instance(normalize_columns(generate_family(family)))
+        for name, params in VARIANTS.items():
+            runs = [_run(instance, args.budget_ms, seed, params) for seed in range(args.seeds)]
+            wasted = [run.get('wasted_evaluations', {}) for run in runs]
+            print(f"{family:>8} {name:>14} {np.mean([run['score'] for run in runs]):>11.0f} "
+                  f"{np.mean([run['evaluations'] for run in runs]):>11.0f} "
+                  f"{np.mean([run['cache']['hit_rate'] for run in runs]):>9.3f} "
+                  f"{np.mean([w.get('before', 0.0) for w in wasted]):>10.3f} {np.mean([w.get('after', 0.0) for w in wasted]):>9.3f} "
+                  f"{np.mean([run['restarts'] for run in runs]):>8.1f} {np.mean([run['diversity'] for run in runs]):>9.3f}")
+
+if __name__ == '__main__':
+    main()
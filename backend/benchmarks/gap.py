@@ -0,0 +1,43 @@
+"""
+Mide la brecha de optimalidad: para cada familia calcula la cota superior de la instancia (relajación
+de capacidad por máquina) y corre cada motor con y sin tolerancia de brecha: tiempo, puntaje, brecha
+final y motivo de parada. Con tolerancia, los motores iterativos deben parar antes del presupuesto.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.gap --families xs s --budget-ms 3000 --gap-tolerance 0.05
+    python -m backend.benchmarks.gap --families s --flexible
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from ..models.instance import build_instance
+from ..optimizers.registry import run_optimizer
+from .generator import generate_family, normalize_columns
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', nargs='+', default=['xs', 's'])
+    parser.add_argument('--engines', nargs='+', default=['greedy', 'ga', 'ga-steady', 'annealing', 'portfolio'])
+    parser.add_argument('--budget-ms', type=int, default=3000)
+    parser.add_argument('--gap-tolerance', type=float, default=0.05)
+    parser.add_argument('--flexible', action='store_true', help="trabajos elegibles en varias máquinas")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'family':>8} {'engine':>10} {'tolerance':>9} {'time ms':>8} {'score':>11} {'bound':>11} {'gap':>7} {'stop':>10}")
+    for family in args.families:
+        instance = build_instance(normalize_columns(generate_family(family)), flexible=args.flexible)
+        for engine in args.engines:
+            for tolerance in (None, args.gap_tolerance):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    outcome = run_optimizer(engine, instance, None, args.budget_ms, args.seed, gap_tolerance=tolerance)
+                    wall_time_ms = (time.perf_counter() - start) * 1000
+                print(f"{family:>8} {engine:>10} {str(tolerance):>9} {wall_time_ms:>8.0f} {outcome.score():>11.0f} "
+                      f"{outcome.upper_bound:>11.0f} {outcome.gap():>7.4f} {str(outcome.stats.get('stop_reason', '-')):>10}")
+
+if __name__ == '__main__':
+    main()
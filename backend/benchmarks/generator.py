@@ -0,0 +1,98 @@
+"""
+Generador de instancias sintéticas con el mismo esquema que el Excel de producción.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.generator --jobs 500 --seed 1 --output instancia_500.xlsx
+"""
+
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columnas tal como vienen en el Excel exportado
+EXCEL_COLUMNS = ['referencia', 'maquina sugerida', 'metros requeridos', 'velocidad sugerida',
+                 'nivel de criticidad', 'diametro de manga', 'tipo de impresion']
+
+DEFAULT_TYPE_MIX = {'A': 0.25, 'B': 0.25, 'C': 0.25, 'D': 0.25}
+DEFAULT_SPEEDS = [150, 200, 250, 300, 350, 400, 450]
+DEFAULT_CRITICALITY_WEIGHTS = [0.15, 0.2, 0.25, 0.2, 0.2] # Levels 1..5
+DEFAULT_SLEEVE_DIAMETERS = [10, 12, 15, 20, 25]
+
+# Familias de instancias con semilla fija: nombre -> (número de trabajos, semilla)
+FAMILIES = {
+    'xs': (50, 101),
+    's': (200, 102),
+    'm': (1000, 103),
+    'l': (5000, 104),
+    'xl': (20000, 105),
+    'xxl': (50000, 106),
+}
+
+def default_num_machines(num_jobs: int) -> int:
+    """About 20 jobs per machine (like datos_produccion_grandes.xlsx), between 3 and 30 machines."""
+    return min(30, max(3, num_jobs // 20))
+
+def generate_instance(num_jobs: int, seed: int, num_machines: Optional[int] = None,
+                      type_mix: Optional[Dict[str, float]] = None, speeds: Optional[List[int]] = None,
+                      meters_median: float = 14000.0, meters_sigma: float = 0.45,
+                      criticality_weights: Optional[List[float]] = None,
+                      sleeve_diameters: Optional[List[int]] = None) -> pd.DataFrame:
+    """
+    Returns a DataFrame with the Excel columns. The same arguments always produce the same instance.
+
+    - Jobs per machine follow uneven (Dirichlet) machine loads, as in real exports.
+    - Meters are log-normal around meters_median, clipped to the range seen in production files.
+    """
+    rng = np.random.default_rng(seed)
+    num_machines = num_machines or default_num_machines(num_jobs)
+    type_mix = type_mix or DEFAULT_TYPE_MIX
+    speeds = speeds or DEFAULT_SPEEDS
+    criticality_weights = criticality_weights or DEFAULT_CRITICALITY_WEIGHTS
+    sleeve_diameters = sleeve_diameters or DEFAULT_SLEEVE_DIAMETERS
+
+    machine_names = [f'M{i + 1}' for i in range(num_machines)]
+    machine_load = rng.dirichlet(np.full(num_machines, 5.0))
+    types = list(type_mix)
+    type_probabilities = np.array([type_mix[t] for t in types], dtype=float)
+    criticality_probabilities = np.array(criticality_weights, dtype=float)
+
+    meters = rng.lognormal(np.log(meters_median), meters_sigma, num_jobs).clip(1000, 40000).round()
+    return pd.DataFrame({
+        'referencia': [f'REF{i + 1:06d}' for i in range(num_jobs)],
+        'maquina sugerida': rng.choice(machine_names, num_jobs, p=machine_load),
+        'metros requeridos': meters.astype(int),
+        'velocidad sugerida': rng.choice(speeds, num_jobs),
+        'nivel de criticidad': rng.choice(np.arange(1, len(criticality_weights) + 1), num_jobs,
+                                          p=criticality_probabilities / criticality_probabilities.sum()),
+        'diametro de manga': rng.choice(sleeve_diameters, num_jobs),
+        'tipo de impresion': rng.choice(types, num_jobs, p=type_probabilities / type_probabilities.sum()),
+    }, columns=EXCEL_COLUMNS)
+
+def generate_family(name: str) -> pd.DataFrame:
+    num_jobs, seed = FAMILIES[name]
+    return generate_instance(num_jobs, seed)
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Same column normalization as the upload endpoints."""
+    df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--machines', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', required=True, help="Excel (.xlsx) or CSV (.csv) file to write")
+    args = parser.parse_args()
+
+    df = generate_instance(args.jobs, args.seed, args.machines)
+    if args.output.endswith('.csv'):
+        df.to_csv(args.output, index=False)
+    else:
+        df.to_excel(args.output, index=False, engine='openpyxl')
+    print(f"Wrote {len(df)} jobs on {df['maquina sugerida'].nunique()} machines to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Ejecuta los optimizadores sobre las familias de instancias sintéticas y genera un reporte
+JSON/CSV que puede compararse entre commits para detectar regresiones.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.runner --families xs s m --output bench/report
+    python -m backend.benchmarks.runner --families xs s --compare bench/report.json
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..models.domain import MachineSchedule
+from ..models.instance import build_instance
+from ..optimizers import genetic_optimizer, genetic_optimizer2, genetic_optimizer3
+from ..optimizers.greedy_optimizer import optimize_greedy
+from .generator import FAMILIES, generate_family, normalize_columns
+
+# Engine -> largest instance it is run on by default (the DataFrame GAs re-scan the whole table per evaluation)
+MAX_JOBS = {
+    'greedy': 50000,
+    'ga3': 1000,
+    'ga2': 50,
+    'ga1': 50,
+}
+
+# Regression thresholds used by --compare
+TIME_TOLERANCE = 0.20
+QUALITY_FIELDS = ('meters_scheduled', 'criticality_covered')
+
+def _run_domain_engine(optimizer: Callable) -> Callable:
+    def run(df: pd.DataFrame, stats: dict) -> Dict[str, List[dict]]:
+        instance = build_instance(df)
+        machine_schedules = {name: MachineSchedule(name) for name in instance.machine_names}
+        optimizer(instance.jobs, machine_schedules, stats=stats)
+        return {name: schedule.to_dict_list() for name, schedule in machine_schedules.items()}
+    return run
+
+def _run_dataframe_engine(module) -> Callable:
+    def run(df: pd.DataFrame, stats: dict) -> Dict[str, List[dict]]:
+        return module.optimize_genetic(df.copy(), stats=stats)
+    return run
+
+ENGINES = {
+    'greedy': _run_domain_engine(optimize_greedy),
+    'ga3': _run_domain_engine(genetic_optimizer3.optimize_genetic),
+    'ga2': _run_dataframe_engine(genetic_optimizer2),
+    'ga1': _run_dataframe_engine(genetic_optimizer),
+}
+
+def _schedule_metrics(df: pd.DataFrame, schedule: Dict[str, List[dict]]) -> dict:
+    criticality = dict(zip(df['referencia'], df['nivel_de_criticidad']))
+    rows = [row for machine_rows in schedule.values() for row in machine_rows]
+    covered = sum(int(criticality[row['referencia']]) for row in rows)
+    total_criticality = int(df['nivel_de_criticidad'].sum())
+    return {
+        'meters_scheduled': round(float(sum(row['metros_requeridos'] for row in rows)), 1),
+        'unscheduled_jobs': len(df) - len(rows),
+        'setup_hours': round(float(sum(row['tiempo_de_cambio_horas'] for row in rows)), 2),
+        'makespan_hours': round(float(max((row['hora_fin'] for row in rows), default=0.0)), 2),
+        'criticality_covered': covered,
+        'criticality_covered_pct': round(100.0 * covered / total_criticality, 2) if total_criticality else 0.0,
+    }
+
+def _seed_everything(seed: int):
+    random.seed(seed)
+    np.random.seed(seed)
+
+def run_engine(engine: str, df: pd.DataFrame, seed: int, measure_memory: bool = True) -> dict:
+    """Runs one engine on one instance. Wall time is measured on a run without tracemalloc overhead."""
+    run = ENGINES[engine]
+    stats: dict = {}
+    _seed_everything(seed)
+    with contextlib.redirect_stdout(io.StringIO()): # The optimizers print debug traces
+        start = time.perf_counter()
+        schedule = run(df, stats)
+        wall_time = time.perf_counter() - start
+
+        peak_memory_mb = None
+        if measure_memory:
+            _seed_everything(seed)
+            tracemalloc.start()
+            run(df, {})
+            peak_memory_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            tracemalloc.stop()
+
+    evaluations = stats.get('evaluations', 0)
+    result = {
+        'status': 'ok',
+        'wall_time_s': round(wall_time, 4),
+        'peak_memory_mb': peak_memory_mb,
+        'evaluations': evaluations,
+        'evaluations_per_s': round(evaluations / wall_time, 1) if wall_time > 0 else 0.0,
+    }
+    result.update(_schedule_metrics(df, schedule))
+    return result
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(families: List[str], engines: List[str], seed: int, measure_memory: bool, no_limits: bool) -> dict:
+    results = []
+    for family in families:
+        df = normalize_columns(generate_family(family))
+        for engine in engines:
+            row = {'instance': family, 'jobs': len(df), 'machines': int(df['maquina_sugerida'].nunique()), 'engine': engine}
+            if not no_limits and len(df) > MAX_JOBS[engine]:
+                row['status'] = 'skipped'
+            else:
+                row.update(run_engine(engine, df, seed, measure_memory))
+            print(json.dumps(row), file=sys.stderr)
+            results.append(row)
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+def write_report(report: dict, output: str):
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(f'{output}.json', 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+    fields = sorted({key for row in report['results'] for key in row})
+    with open(f'{output}.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(report['results'])
+
+def compare_reports(baseline: dict, current: dict, time_tolerance: float = TIME_TOLERANCE) -> List[str]:
+    """Returns the regressions of 'current' against 'baseline': worse schedule quality or slower wall time."""
+    previous = {(row['instance'], row['engine']): row for row in baseline['results'] if row.get('status') == 'ok'}
+    regressions = []
+    for row in current['results']:
+        old = previous.get((row['instance'], row['engine']))
+        if old is None or row.get('status') != 'ok':
+            continue
+        name = f"{row['instance']}/{row['engine']}"
+        for field in QUALITY_FIELDS:
+            if row[field] < old[field]:
+                regressions.append(f"{name}: {field} {old[field]} -> {row[field]}")
+        if row['unscheduled_jobs'] > old['unscheduled_jobs']:
+            regressions.append(f"{name}: unscheduled_jobs {old['unscheduled_jobs']} -> {row['unscheduled_jobs']}")
+        if row['wall_time_s'] > old['wall_time_s'] * (1 + time_tolerance):
+            regressions.append(f"{name}: wall_time_s {old['wall_time_s']} -> {row['wall_time_s']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', nargs='+', default=['xs', 's', 'm'], choices=list(FAMILIES))
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the optimizers' random generators")
+    parser.add_argument('--output', default=None, help="Report path without extension (writes .json and .csv)")
+    parser.add_argument('--compare', default=None, help="Baseline JSON report to check for regressions")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run (halves the runtime)")
+    parser.add_argument('--no-limits', action='store_true', help="Run every engine on every size")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.families, args.engines, args.seed, not args.no_memory, args.no_limits)
+    if args.output:
+        write_report(report, args.output)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(json.load(f), report)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
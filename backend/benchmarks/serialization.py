@@ -0,0 +1,62 @@
+"""
+Mide el costo de formatear y codificar la respuesta de un cronograma grande: la ruta anterior
+(filas + jsonable_encoder + json.dumps de FastAPI) contra la codificación directa (orjson si
+está instalado) en filas y en columnas. También informa el tamaño de cada respuesta.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.serialization --jobs 5000 --repeat 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from ..models.domain import MachineSchedule
+from ..models.instance import build_instance
+from ..optimizers.greedy_optimizer import optimize_greedy
+from ..services.optimization_service import OptimizationService
+from ..utils.responses import encode_json, orjson
+from .generator import generate_instance, normalize_columns
+
+def _legacy(machine_schedules):
+    final_schedule, summary = OptimizationService().format_result(machine_schedules, 0)
+    content = jsonable_encoder({"optimized_schedule": final_schedule, "summary": summary})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def _direct(layout: str):
+    def encode(machine_schedules):
+        final_schedule, summary = OptimizationService(layout).format_result(machine_schedules, 0)
+        return encode_json({"optimized_schedule": final_schedule, "summary": summary})
+    return encode
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    instance = build_instance(normalize_columns(generate_instance(args.jobs, args.seed)))
+    # A long horizon so that every job is placed and the payload has the full size
+    machine_schedules = {name: MachineSchedule(name, horizon_end=float('inf')) for name in instance.machine_names}
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimize_greedy(instance.jobs, machine_schedules)
+    scheduled = sum(len(s.jobs) for s in machine_schedules.values())
+
+    print(f"{scheduled} scheduled jobs, encoder: {'orjson' if orjson is not None else 'json'}")
+    print(f"{'path':>24} {'best ms':>9} {'KB':>8}")
+    for name, encode in [('rows + jsonable_encoder', _legacy), ('rows direct', _direct('rows')),
+                         ('columns direct', _direct('columns'))]:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            body = encode(machine_schedules)
+            times.append(time.perf_counter() - start)
+        print(f"{name:>24} {min(times) * 1000:>9.1f} {len(body) / 1024:>8.0f}")
+
+if __name__ == '__main__':
+    main()
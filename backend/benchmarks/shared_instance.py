@@ -0,0 +1,61 @@
+"""
+Compara el transporte de la instancia a los procesos del portafolio: serializar (pickle) la
+ProblemInstance completa en cada tarea contra publicarla una vez en memoria compartida y enviar
+solo el handle. Mide los bytes IPC por tarea, el costo de publicar y el tiempo hasta que todos
+los workers tienen la instancia lista.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.shared_instance --jobs 1000 5000 20000 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ..models.instance import ProblemInstance, build_instance
+from ..models.shared_instance import SharedInstance, attach_instance
+from .generator import generate_instance, normalize_columns
+
+def _pickled_task(instance: ProblemInstance) -> int:
+    return len(instance.jobs)
+
+def _shared_task(handle) -> int:
+    return len(attach_instance(handle).jobs)
+
+def _startup_seconds(task, argument, workers: int) -> float:
+    """Time from creating the pool until every worker has the instance ready (one task per worker)."""
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context()) as executor:
+        list(executor.map(task, [argument] * workers))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'jobs':>6} {'pickle KB':>10} {'handle KB':>10} {'pickle ms':>10} {'publish ms':>11} "
+          f"{'startup pickled s':>18} {'startup shared s':>17}")
+    for num_jobs in args.jobs:
+        instance = build_instance(normalize_columns(generate_instance(num_jobs, args.seed)))
+
+        start = time.perf_counter()
+        pickled = pickle.dumps(instance)
+        pickle_ms = (time.perf_counter() - start) * 1000
+        pickled_startup = _startup_seconds(_pickled_task, instance, args.workers)
+
+        start = time.perf_counter()
+        with SharedInstance(instance) as shared:
+            publish_ms = (time.perf_counter() - start) * 1000
+            handle_bytes = len(pickle.dumps(shared.handle))
+            shared_startup = _startup_seconds(_shared_task, shared.handle, args.workers)
+
+        print(f"{num_jobs:>6} {len(pickled) / 1024:>10.0f} {handle_bytes / 1024:>10.1f} {pickle_ms:>10.1f} {publish_ms:>11.1f} "
+              f"{pickled_startup:>18.3f} {shared_startup:>17.3f}")
+
+if __name__ == '__main__':
+    main()
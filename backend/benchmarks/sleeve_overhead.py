@@ -0,0 +1,62 @@
+"""
+Mide el costo adicional por colocación de trabajo que introducen las restricciones de sets de mangas.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.sleeve_overhead --jobs 2000 --machines 10
+"""
+
+import argparse
+import random
+import time
+
+from ..models.domain import MachineSchedule
+from ..models.instance import build_instance
+from ..optimizers.genetic_optimizer3 import _assign_chromosome_to_machines
+from ..optimizers.sleeve_constraints import SleeveIndex
+from .generator import generate_instance, normalize_columns
+
+def _make_jobs(num_jobs: int, num_machines: int, developments: list, seed: int) -> list:
+    df = normalize_columns(generate_instance(num_jobs, seed, num_machines, sleeve_diameters=developments))
+    return build_instance(df).jobs
+
+def _make_index(machine_names: list, developments: list, rng: random.Random) -> SleeveIndex:
+    machines = [{'id': i + 1, 'machine_number': name} for i, name in enumerate(machine_names)]
+    sleeve_sets = [{'id': i + 1, 'development': dev, 'num_sleeves': 8, 'status': 'disponible'}
+                   for i, dev in enumerate(developments)]
+    compatibilities = [{'machine_id': m['id'], 'sleeve_set_id': ss['id']}
+                       for ss in sleeve_sets for m in machines if rng.random() < 0.7]
+    return SleeveIndex(machine_names, sleeve_sets, machines, compatibilities)
+
+def _time_decodes(jobs: list, machine_names: list, sleeve_index, repeats: int) -> float:
+    machine_templates = {name: MachineSchedule(name) for name in machine_names}
+    start = time.perf_counter()
+    for _ in range(repeats):
+        _assign_chromosome_to_machines(jobs, machine_templates, sleeve_index)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--machines', type=int, default=10)
+    parser.add_argument('--developments', type=int, default=12)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    machine_names = [f'M{i + 1}' for i in range(args.machines)]
+    developments = [10 + 5 * i for i in range(args.developments)]
+    jobs = _make_jobs(args.jobs, args.machines, developments, args.seed)
+    sleeve_index = _make_index(machine_names, developments, rng)
+
+    baseline = _time_decodes(jobs, machine_names, None, args.repeats)
+    constrained = _time_decodes(jobs, machine_names, sleeve_index, args.repeats)
+    placements = args.jobs * args.repeats
+
+    print(f"Jobs: {args.jobs}, machines: {args.machines}, developments: {args.developments}, repeats: {args.repeats}")
+    print(f"Without sleeve constraints: {baseline * 1e6 / placements:.2f} us/placement")
+    print(f"With sleeve constraints:    {constrained * 1e6 / placements:.2f} us/placement")
+    print(f"Overhead per placement:     {(constrained - baseline) * 1e6 / placements:.2f} us")
+
+if __name__ == '__main__':
+    main()
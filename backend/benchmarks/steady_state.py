@@ -0,0 +1,60 @@
+"""
+Compara el bucle generacional del GA (genetic_optimizer3) con el GA de estado estacionario
+(steady_state_ga) con el mismo número de hijos: tiempo, evaluaciones por segundo, pico de memoria
+(tracemalloc) y puntaje de la mejor solución.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.steady_state --families xs s m --offspring 5000
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from ..models.instance import build_instance
+from ..optimizers.genetic_optimizer3 import optimize_genetic, schedule_score
+from ..optimizers.steady_state_ga import optimize_steady_state
+from .generator import generate_family, normalize_columns
+
+POPULATION_SIZE = 100
+
+def _run(engine, instance, seed: int, **params) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    machine_schedules = instance.new_machine_schedules()
+    stats = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        start = time.perf_counter()
+        engine(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats, population_size=POPULATION_SIZE, **params)
+        stats['wall_time_s'] = time.perf_counter() - start
+        stats['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    stats['score'] = schedule_score(machine_schedules)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', nargs='+', default=['xs', 's', 'm'])
+    parser.add_argument('--offspring', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'family':>8} {'engine':>12} {'time s':>8} {'offspring/s':>11} {'evals/s':>9} {'peak MB':>8} {'score':>8}")
+    for family in args.families:
+        instance = build_instance(normalize_columns(generate_family(family)))
+        runs = {
+            'generational': _run(optimize_genetic, instance, args.seed, num_generations=args.offspring // POPULATION_SIZE),
+            'steady-state': _run(optimize_steady_state, instance, args.seed, num_offspring=args.offspring),
+        }
+        for engine, stats in runs.items():
+            print(f"{family:>8} {engine:>12} {stats['wall_time_s']:>8.2f} {args.offspring / stats['wall_time_s']:>11.0f} "
+                  f"{stats['evaluations'] / stats['wall_time_s']:>9.0f} {stats['peak_mb']:>8.2f} {stats['score']:>8.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Mide la memoria del servidor con varias subidas grandes simultáneas: levanta la API con uvicorn en
+un subproceso, envía en paralelo libros Excel distintos (para que no se fusionen en una sola corrida)
+y muestrea el RSS del proceso del servidor. Con --notes-chars se agrega una columna de texto libre
+(como las observaciones de las exportaciones del ERP) para obtener archivos más pesados. Informa el RSS en reposo, el pico, el incremento por
+subida, el tiempo total y los códigos de respuesta.
+
+Uso (desde la raíz del repositorio):
+    python -m backend.benchmarks.upload_memory --jobs 20000 --concurrency 4
+    python -m backend.benchmarks.upload_memory --jobs 20000 --concurrency 4 --notes-chars 300
+    python -m backend.benchmarks.upload_memory --jobs 20000 --concurrency 4 --endpoint /upload-ga/
+"""
+
+import argparse
+import http.client
+import io
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from .generator import generate_instance
+
+def _workbook(num_jobs: int, seed: int, notes_chars: int) -> bytes:
+    df = generate_instance(num_jobs, seed)
+    if notes_chars:
+        rng = np.random.default_rng(seed)
+        letters = np.array(list('abcdefghijklmnopqrstuvwxyz '))
+        df['observaciones'] = [''.join(row) for row in rng.choice(letters, (num_jobs, notes_chars))]
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine='openpyxl')
+    return buffer.getvalue()
+
+def _post_file(port: int, path: str, contents: bytes) -> int:
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="upload.xlsx"\r\n'
+            f'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n').encode()
+    body += contents + f'\r\n--{boundary}--\r\n'.encode()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    connection.request('POST', path, body, {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+    status = connection.getresponse().status
+    connection.close()
+    return status
+
+def _rss_mb(pid: int) -> float:
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def _wait_ready(port: int, server: subprocess.Popen):
+    for _ in range(200):
+        if server.poll() is not None:
+            raise RuntimeError("The server exited during startup")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("The server did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--notes-chars', type=int, default=0, help="largo de una columna de texto libre agregada")
+    parser.add_argument('--endpoint', default='/upload/')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    workbooks = [_workbook(args.jobs, seed, args.notes_chars) for seed in range(args.concurrency)]
+    server = subprocess.Popen([sys.executable, '-W', 'ignore', '-m', 'uvicorn', 'backend.main:app', '--port', str(args.port),
+                               '--log-level', 'warning'], stdout=subprocess.DEVNULL)
+    try:
+        _wait_ready(args.port, server)
+        idle_mb = _rss_mb(server.pid)
+        peak_mb = idle_mb
+        done = threading.Event()
+
+        def sample():
+            nonlocal peak_mb
+            while not done.wait(0.01):
+                peak_mb = max(peak_mb, _rss_mb(server.pid))
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        statuses = [None] * len(workbooks)
+
+        def upload(i):
+            statuses[i] = _post_file(args.port, args.endpoint, workbooks[i])
+
+        start = time.perf_counter()
+        clients = [threading.Thread(target=upload, args=(i,)) for i in range(len(workbooks))]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    size_mb = sum(len(workbook) for workbook in workbooks) / len(workbooks) / 2**20
+    print(f"{args.concurrency} x {args.jobs} jobs ({size_mb:.1f} MB each) to {args.endpoint} in {elapsed:.1f} s, statuses {statuses}")
+    print(f"server RSS: idle {idle_mb:.0f} MB, peak {peak_mb:.0f} MB, "
+          f"+{(peak_mb - idle_mb) / len(workbooks):.0f} MB per upload")
+
+if __name__ == '__main__':
+    main()
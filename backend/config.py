@@ -1 +1,13 @@
 DATABASE_URL = "sqlite:///./production_optimizer.db"
+
+# Admission control of the optimization endpoints (see utils/admission.py): distinct optimizations
+# running at once, and how many more may wait for a slot before requests get 503 + Retry-After
+MAX_CONCURRENT_OPTIMIZATIONS = 2
+MAX_QUEUED_OPTIMIZATIONS = 4
+
+# Uploads (see utils/uploads.py): largest request body accepted
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Optimization results kept in the 'optimization_results' table (the id in every summary, which the
+# warm start can re-plan from as previous_result_id); older ones are deleted as new ones are saved
+MAX_STORED_RESULTS = 200
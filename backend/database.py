@@ -45,6 +45,19 @@ def create_tables():
         )
     """)
 
+    # Tabla de ventanas de parada programada por máquina (mantenimiento, etc.)
+    # Las horas son absolutas desde el inicio del plan (hora 0 del día 1)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS machine_downtime_windows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            machine_id INTEGER NOT NULL,
+            start_hour REAL NOT NULL,
+            end_hour REAL NOT NULL,
+            reason TEXT,
+            FOREIGN KEY (machine_id) REFERENCES machines (id) ON DELETE CASCADE
+        )
+    """)
+
     # Tabla para resultados de optimización
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS optimization_results (
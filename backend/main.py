@@ -4,12 +4,18 @@ Proporciona endpoints para cargar archivos Excel, procesarlos y aplicar
 algoritmos de optimización (codicioso y genético) para generar cronogramas de producción.
 """
 
-from fastapi import FastAPI
+import json
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 import numpy as np
 
 from .database import create_tables
 from .routers import machine_router, sleeve_set_router, optimization_router
+from .utils.instrumentation import (RequestProfiler, observe_request, render_metrics, start_profiler, start_timer,
+                                    stop_profiler, stop_timer)
+from .utils.uploads import BodySizeLimitMiddleware
 
 # Inicializa la aplicación FastAPI
 app = FastAPI(
@@ -18,6 +24,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Límite de tamaño del cuerpo de las peticiones (config.MAX_UPLOAD_BYTES): se responde 413 antes de
+# leer el formulario. Va dentro de CORS para que el navegador pueda leer el 413.
+app.add_middleware(BodySizeLimitMiddleware)
+
 # Configuración del middleware CORS (Cross-Origin Resource Sharing)
 # Esto permite que el frontend (que se ejecuta en un origen diferente) pueda hacer solicitudes a esta API.
 app.add_middleware(
@@ -28,6 +38,49 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todos los encabezados HTTP
 )
 
+# Instrumentación: tiempos por etapa (cabecera Server-Timing y bloque 'timings' del resumen),
+# métricas Prometheus en /metrics y perfilado opcional de una petición con ?profile=cprofile|sample
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    profile_mode = request.query_params.get("profile")
+    profiler = None
+    if profile_mode:
+        try:
+            profiler = RequestProfiler(profile_mode)
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"detail": str(e)})
+
+    timer, token = start_timer()
+    try:
+        # El optimizador corre en un hilo de trabajo: el perfilador lo sigue allí (ver profiled_call)
+        profiler_token = start_profiler(profiler) if profiler is not None else None
+        try:
+            response = await call_next(request)
+        finally:
+            if profiler_token is not None:
+                stop_profiler(profiler_token)
+    finally:
+        stop_timer(token)
+
+    if profiler is not None and "json" in response.headers.get("content-type", ""):
+        # Debug only: the profile is added to the JSON body, which has to be read and encoded again
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        payload = json.loads(body)
+        if isinstance(payload, dict):
+            payload["profile"] = profiler.report()
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        response = Response(json.dumps(payload), status_code=response.status_code, headers=headers)
+
+    route = request.scope.get("route")
+    observe_request(route.path if route is not None else "unmatched", response.status_code, timer)
+    response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+@app.get("/metrics", summary="Métricas en formato Prometheus", response_class=PlainTextResponse)
+def metrics():
+    """Histogramas de duración de peticiones y de etapas del pipeline, y contadores de trabajo de los optimizadores."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Asegura que las tablas se creen al iniciar la aplicación
 @app.on_event("startup")
 async def startup_event():
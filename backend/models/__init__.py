@@ -1,4 +1,5 @@
 from .machine import Machine, MachineCreate, MachineBase
+from .machine_downtime import MachineDowntime, MachineDowntimeCreate, MachineDowntimeBase
 from .sleeve_set import SleeveSet, SleeveSetCreate, SleeveSetBase
 from .optimization_result import OptimizationResult
 from .uploaded_file import UploadedFileInfo
@@ -1,4 +1,7 @@
+import numpy as np
+
 from ..utils.setup_utils import get_setup_time
+from .sleeve_set import development_key
 
 class Job:
     def __init__(self, job_data: dict):
@@ -11,6 +14,10 @@ class Job:
         self.nivel_de_criticidad = job_data['nivel_de_criticidad']
         self.maquina_sugerida = job_data.get('maquina_sugerida', None) # Can be None if not explicitly passed
         self.diametro_de_manga = job_data['diametro_de_manga']
+        self.development = development_key(self.diametro_de_manga) # Key into the sleeve_sets inventory
+        self.ancho_de_material = job_data.get('ancho_de_material', None) # Optional column
+        # Machines this job may run on; set by the instance loader (see models/instance.py)
+        self.eligible_machines = (self.maquina_sugerida,)
 
         # Correctly get original_index from pandas Series if job_data is a Series
         if hasattr(job_data, 'name'): # Check if it's a pandas Series
@@ -25,22 +32,91 @@ class Job:
         return float('inf')
 
 class MachineSchedule:
-    def __init__(self, machine_name: str):
+    # Process-wide work counters, read by the request instrumentation (utils/instrumentation.py)
+    placements = 0
+    slot_searches = 0
+
+    def __init__(self, machine_name: str, sleeve_usage=None, start_time: float = 0.0,
+                 last_impression_type: str | None = None, horizon_end: float = 24.0, calendar=None):
         self.machine_name = machine_name
         self.jobs = []
-        self.current_time_hours = 0.0
-        self.last_impression_type = None
+        # Initial state; a rolling horizon carries the previous day's end state here
+        self.start_time_hours = start_time
+        self.initial_impression_type = last_impression_type
+        self.horizon_end = horizon_end
+        self.current_time_hours = start_time
+        self.last_impression_type = last_impression_type
+        # Optional SleeveUsage shared by all the machines of the same schedule
+        self.sleeve_usage = sleeve_usage
+        # Optional AvailabilityCalendar (shifts, breaks, maintenance); None means always available
+        self.calendar = calendar
+
+    def fresh_copy(self, sleeve_usage=None) -> 'MachineSchedule':
+        """Returns an empty schedule with the same initial state and horizon (used to evaluate candidates)."""
+        return MachineSchedule(self.machine_name, sleeve_usage, self.start_time_hours,
+                               self.initial_impression_type, self.horizon_end, self.calendar)
+
+    def _find_slot(self, job: Job, setup_time: float) -> tuple[float, float] | None:
+        """
+        Returns the (start, end) of the earliest placement of the job after the current time,
+        honoring the machine calendar and the sleeve sets used by other machines.
+        None if there is no such placement.
+        """
+        MachineSchedule.slot_searches += 1
+        work_hours = job.get_duration_hours() + setup_time
+        start_time = self.current_time_hours
+        if self.calendar is None and self.sleeve_usage is None:
+            return start_time, start_time + work_hours
+
+        while True:
+            end_time = start_time + work_hours
+            if self.calendar is not None:
+                start_time = self.calendar.earliest_start(start_time, work_hours)
+                if start_time is None:
+                    return None
+                end_time = self.calendar.finish_time(start_time, work_hours)
+                if end_time is None:
+                    return None
+            if self.sleeve_usage is None:
+                return start_time, end_time
+            sleeve_start = self.sleeve_usage.earliest_start(job.development, self.machine_name, start_time, end_time - start_time)
+            if sleeve_start is None:
+                return None
+            if sleeve_start == start_time or sleeve_start > self.horizon_end:
+                return sleeve_start, sleeve_start + (end_time - start_time)
+            start_time = sleeve_start
+
+    def get_start_time(self, job: Job, setup_time: float) -> float | None:
+        """
+        Returns the earliest time the job can start on this machine, waiting for the machine's
+        availability windows and for its sleeve set if another machine is using it.
+        None if the sleeve set cannot be used here or the calendar has no room left.
+        """
+        slot = self._find_slot(job, setup_time)
+        return slot[0] if slot is not None else None
+
+    def get_finish_time(self, job: Job, setup_time: float) -> float | None:
+        """Returns the time the job would finish on this machine, or None if it does not fit before the horizon end."""
+        slot = self._find_slot(job, setup_time)
+        if slot is None:
+            return None
+        return slot[1] if slot[1] <= self.horizon_end else None
 
     def can_add_job(self, job: Job, setup_time: float) -> bool:
-        """Checks if a job can be added within the 24-hour limit."""
-        return self.current_time_hours + job.get_duration_hours() + setup_time <= 24
+        """Checks if a job can be added within the horizon (24 hours by default)."""
+        return self.get_finish_time(job, setup_time) is not None
 
     def add_job(self, job: Job, setup_time: float):
         """Adds a job to the schedule and updates the machine's state."""
         job_duration = job.get_duration_hours()
         
-        start_time = self.current_time_hours
-        end_time = start_time + job_duration + setup_time
+        slot = self._find_slot(job, setup_time)
+        if slot is None:
+            # Forced placement (e.g. a manual order): run it right after the previous job
+            slot = (self.current_time_hours, self.current_time_hours + job_duration + setup_time)
+        start_time, end_time = slot
+        if self.sleeve_usage is not None:
+            self.sleeve_usage.reserve(job.development, self.machine_name, start_time, end_time)
 
         # Store calculated times within a temporary dictionary in the job list
         self.jobs.append({
@@ -53,6 +129,7 @@ class MachineSchedule:
 
         self.current_time_hours = end_time
         self.last_impression_type = job.tipo_de_impresion
+        MachineSchedule.placements += 1
 
     def get_last_impression_type(self) -> str | None:
         return self.last_impression_type
@@ -64,6 +141,28 @@ class MachineSchedule:
         """Calculates the sum of meters for all jobs in the schedule."""
         return sum(scheduled_item['job_object'].metros_requeridos for scheduled_item in self.jobs)
 
+    def to_columns(self) -> dict:
+        """
+        Columnar form of to_dict_list(): one list per field, in schedule order. It builds no
+        per-job dict and converts every numeric field in one numpy pass instead of a float() per value.
+        """
+        jobs = [item['job_object'] for item in self.jobs]
+        def numbers(values, dtype=float) -> list:
+            return np.fromiter(values, dtype=dtype, count=len(jobs)).tolist()
+        return {
+            'orden': list(range(1, len(jobs) + 1)),
+            'referencia': [job.referencia for job in jobs],
+            'tipo_de_impresion': [job.tipo_de_impresion for job in jobs],
+            'diametro_de_manga': numbers(job.diametro_de_manga for job in jobs),
+            'metros_requeridos': numbers(job.metros_requeridos for job in jobs),
+            'velocidad_sugerida_m_min': numbers(job.velocidad_sugerida for job in jobs),
+            'nivel_de_criticidad': numbers((job.nivel_de_criticidad for job in jobs), np.int64),
+            'tiempo_estimado_horas': [item['duration'] for item in self.jobs],
+            'tiempo_de_cambio_horas': [item['setup_time'] for item in self.jobs],
+            'hora_inicio': [item['start_time'] for item in self.jobs],
+            'hora_fin': [item['end_time'] for item in self.jobs],
+        }
+
     def to_dict_list(self) -> list:
         """Converts the schedule into a list of dictionaries for the final JSON response."""
         schedule_list = []
@@ -0,0 +1,114 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .domain import Job, MachineSchedule
+from ..optimizers.availability_calendar import AvailabilityCalendar
+from ..optimizers.sleeve_constraints import SleeveIndex
+from .sleeve_set import development_key
+
+class ProblemInstance:
+    """
+    Compiled optimization instance: the jobs of an uploaded file, the machines they can
+    run on, the precomputed job x machine eligibility matrix and the machine constraints
+    (sleeve inventory and availability calendars). It is built once per request and shared
+    by every optimizer that runs on it.
+
+    In the default mode a job is only eligible for its 'maquina_sugerida'. In flexible mode
+    it is eligible for every machine that fits its material width and can mount its sleeve set.
+    """
+    def __init__(self, jobs: List[Job], machine_names: List[str], eligibility: np.ndarray,
+                 sleeve_index: Optional[SleeveIndex] = None, flexible: bool = False,
+                 calendars: Optional[Dict[str, AvailabilityCalendar]] = None, df: Optional[pd.DataFrame] = None):
+        self.jobs = jobs
+        self.machine_names = machine_names
+        self.eligibility = eligibility
+        self.sleeve_index = sleeve_index
+        self.flexible = flexible
+        self.calendars = calendars or {}
+        self.df = df # Normalized source table, for the DataFrame-based optimizers
+
+    def new_machine_schedules(self) -> Dict[str, MachineSchedule]:
+        """Empty schedules for every machine, sharing one sleeve usage tracker and using their calendars."""
+        sleeve_usage = self.sleeve_index.new_usage() if self.sleeve_index is not None else None
+        return {name: MachineSchedule(name, sleeve_usage, calendar=self.calendars.get(name)) for name in self.machine_names}
+
+def build_eligibility_matrix(df: pd.DataFrame, machine_names: List[str], machine_widths: Dict[str, float],
+                             sleeve_index: Optional[SleeveIndex], flexible: bool) -> np.ndarray:
+    """
+    Builds the boolean job x machine eligibility matrix with vectorized column operations,
+    so it stays cheap for thousands of jobs and dozens of machines.
+    """
+    num_jobs = len(df)
+    machine_pos = {name: i for i, name in enumerate(machine_names)}
+
+    if flexible:
+        eligibility = np.ones((num_jobs, len(machine_names)), dtype=bool)
+    else:
+        eligibility = np.zeros((num_jobs, len(machine_names)), dtype=bool)
+        suggested = df['maquina_sugerida'].map(machine_pos).to_numpy()
+        eligibility[np.arange(num_jobs), suggested] = True
+
+    # Material width: unknown widths (no column, empty cell or unregistered machine) do not restrict
+    if 'ancho_de_material' in df.columns:
+        job_widths = pd.to_numeric(df['ancho_de_material'], errors='coerce').to_numpy(dtype=float)
+        max_widths = np.array([machine_widths.get(name, np.inf) for name in machine_names], dtype=float)
+        eligibility &= ~(job_widths[:, None] > max_widths[None, :])
+
+    # Sleeve compatibility: one row of the bitset per distinct development, then broadcast to the jobs
+    if sleeve_index is not None:
+        codes: Dict[Optional[int], int] = {}
+        job_codes = np.fromiter((codes.setdefault(development_key(value), len(codes)) for value in df['diametro_de_manga']),
+                                dtype=np.int64, count=num_jobs)
+        compatible = np.array([[sleeve_index.is_compatible(development, name) for name in machine_names]
+                               for development in codes], dtype=bool).reshape(len(codes), len(machine_names))
+        eligibility &= compatible[job_codes]
+
+    return eligibility
+
+def machine_names_for(df: pd.DataFrame, machine_widths: Dict[str, float], flexible: bool) -> List:
+    """
+    Machines of the instance: the suggested ones of the upload and, in flexible mode, also every machine
+    registered in the 'machines' table (machine_widths), so jobs can move to a machine no row suggests.
+    """
+    machine_names = list(df['maquina_sugerida'].unique())
+    if flexible:
+        suggested = {str(name) for name in machine_names}
+        machine_names += [name for name in machine_widths if name not in suggested]
+    return machine_names
+
+def build_instance(df: pd.DataFrame, machine_widths: Optional[Dict[str, float]] = None,
+                   sleeve_index: Optional[SleeveIndex] = None, flexible: bool = False,
+                   calendars: Optional[Dict[str, AvailabilityCalendar]] = None) -> ProblemInstance:
+    """Converts the normalized DataFrame of an upload into a ProblemInstance (machines from machine_names_for)."""
+    machine_names = machine_names_for(df, machine_widths or {}, flexible)
+    eligibility = build_eligibility_matrix(df, machine_names, machine_widths or {}, sleeve_index, flexible)
+    jobs = build_jobs(df, machine_names, eligibility)
+    return ProblemInstance(jobs, machine_names, eligibility, sleeve_index, flexible, calendars, df)
+
+def build_jobs(df: pd.DataFrame, machine_names: List[str], eligibility: np.ndarray) -> List[Job]:
+    """
+    One Job per row of the table, with the machines of its row of the eligibility matrix.
+    Rows are read column-wise (one tolist() per column) and the machine tuples are built once per
+    distinct eligibility pattern, which is much cheaper than to_dict('records') and a scan per row.
+    """
+    columns = list(df.columns)
+    values = [df[column].tolist() for column in columns]
+    if len(eligibility):
+        # Rows packed into bytes, so that finding the distinct patterns is a 1-D unique
+        packed = np.ascontiguousarray(np.packbits(eligibility, axis=1))
+        _, first_row, pattern_of_row = np.unique(packed.view(f'V{packed.shape[1]}').ravel(), return_index=True, return_inverse=True)
+        pattern_machines = [tuple(machine_names[i] for i in np.flatnonzero(eligibility[row])) for row in first_row]
+        row_machines = [pattern_machines[i] for i in pattern_of_row.ravel().tolist()]
+    else:
+        row_machines = []
+
+    jobs = []
+    for original_index, row, eligible_machines in zip(df.index.tolist(), zip(*values), row_machines):
+        record = dict(zip(columns, row))
+        record['original_index'] = original_index
+        job = Job(record)
+        job.eligible_machines = eligible_machines
+        jobs.append(job)
+    return jobs
@@ -0,0 +1,17 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class MachineDowntimeBase(BaseModel):
+    start_hour: float # Absolute hours from the start of the plan
+    end_hour: float
+    reason: Optional[str] = None
+
+class MachineDowntimeCreate(MachineDowntimeBase):
+    pass
+
+class MachineDowntime(MachineDowntimeBase):
+    id: int
+    machine_id: int
+
+    class Config:
+        orm_mode = True
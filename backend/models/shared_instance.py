@@ -0,0 +1,181 @@
+import numbers
+import weakref
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .instance import ProblemInstance, build_jobs
+
+# Byte alignment of every array inside the segment
+ALIGNMENT = 64
+
+class SharedInstanceHandle:
+    """
+    Picklable reference to a compiled instance published in shared memory: the segment name,
+    the layout of its arrays and the small objects that are not tables (machines, sleeve index,
+    calendars). It is what travels to the workers with every task, a few KB whatever the number of jobs.
+    """
+    def __init__(self, segment_name: str, layout: Dict[str, Tuple[int, str, tuple]], columns: List[Tuple[str, str]],
+                 machine_names: List[str], flexible: bool, sleeve_index=None, calendars=None):
+        self.segment_name = segment_name
+        self.layout = layout # array name -> (offset, dtype, shape)
+        self.columns = columns # (column, 'numeric' | 'text') in the order of the source table
+        self.machine_names = machine_names
+        self.flexible = flexible
+        self.sleeve_index = sleeve_index
+        self.calendars = calendars
+
+# Python type of each distinct value of an object column, so a numeric cell among text ones (e.g. a
+# 'referencia' 1001 read as a number) comes back as a number; other types come back as their str()
+TEXT_KINDS = (str, int, float, bool)
+_PARSE_KIND = (str, int, float, lambda text: text == 'True')
+
+def _kind(value) -> int:
+    if isinstance(value, (bool, np.bool_)):
+        return 3
+    if isinstance(value, numbers.Integral):
+        return 1
+    if isinstance(value, numbers.Real):
+        return 2
+    return 0
+
+def _encode_text(values: pd.Series) -> Dict[str, np.ndarray]:
+    """
+    An object column as codes into its distinct values, which are stored as one UTF-8 blob plus offsets,
+    with the kind (index into TEXT_KINDS) of each one.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    encoded = [str(value).encode('utf-8') for value in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return {
+        'codes': codes.astype(np.int32),
+        'blob': np.frombuffer(b''.join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8),
+        'offsets': offsets,
+        'kinds': np.fromiter((_kind(value) for value in uniques), dtype=np.uint8, count=len(uniques)),
+    }
+
+def _decode_text(codes: np.ndarray, blob: np.ndarray, offsets: np.ndarray, kinds: np.ndarray) -> np.ndarray:
+    raw = blob.tobytes()
+    uniques = np.array([_PARSE_KIND[kinds[i]](raw[offsets[i]:offsets[i + 1]].decode('utf-8')) for i in range(len(offsets) - 1)] + [None],
+                       dtype=object)
+    return uniques[codes] # code -1 (missing) picks the trailing None
+
+def _numeric_array(values: pd.Series) -> np.ndarray:
+    """
+    A numeric or boolean column as a fixed-width array that can live in shared memory: bool, int64, or
+    float64 (also for nullable integer columns with missing cells, which become NaN).
+    """
+    if pd.api.types.is_bool_dtype(values) and not values.isna().any():
+        return values.to_numpy(dtype=bool)
+    if pd.api.types.is_integer_dtype(values) and not values.isna().any():
+        return values.to_numpy(dtype=np.int64)
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+def compile_arrays(instance: ProblemInstance) -> Dict[str, np.ndarray]:
+    """
+    Flat typed arrays of an instance: the job x machine eligibility matrix, the table index and every
+    column of the source table (numeric columns cast to bool, int64 or float64, the others encoded with
+    the type of each value), so the workers can rebuild the same Job objects and DataFrame.
+    """
+    df = instance.df
+    arrays = {
+        'eligibility': np.ascontiguousarray(instance.eligibility, dtype=bool),
+        'index': np.asarray(df.index, dtype=np.int64),
+    }
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            arrays[f'column:{column}'] = _numeric_array(values)
+        else:
+            for part, array in _encode_text(values).items():
+                arrays[f'text:{column}:{part}'] = array
+    return arrays
+
+class SharedInstance:
+    """
+    Publisher side of a compiled instance in one multiprocessing.shared_memory segment.
+
+    The segment is created once per run and unlinked by close(), which the owner calls in a
+    finally block (also on request errors or cancellation). As a last resort it is unlinked
+    when the object is garbage collected, and if the process dies the multiprocessing resource
+    tracker removes it. Workers that are still attached keep their mapping until they exit.
+    """
+    def __init__(self, instance: ProblemInstance):
+        arrays = compile_arrays(instance)
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            layout[name] = (size, array.dtype.str, array.shape)
+            size += array.nbytes
+
+        self.segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            offset, dtype, shape = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=self.segment.buf, offset=offset)[...] = array
+
+        columns = [(column, 'numeric' if f'column:{column}' in arrays else 'text') for column in instance.df.columns]
+        self.handle = SharedInstanceHandle(self.segment.name, layout, columns, list(instance.machine_names),
+                                           instance.flexible, instance.sleeve_index, instance.calendars)
+        self._finalizer = weakref.finalize(self, SharedInstance._release, self.segment)
+
+    @staticmethod
+    def _release(segment: shared_memory.SharedMemory):
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self) -> 'SharedInstance':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class AttachedInstance:
+    """Worker side: the segment mapped read-only-by-convention, with numpy views over its arrays (no copy)."""
+    def __init__(self, handle: SharedInstanceHandle):
+        self.handle = handle
+        # Pool workers share the publisher's resource tracker, so attaching does not take ownership:
+        # the segment is still unlinked once, by the publisher
+        self.segment = shared_memory.SharedMemory(name=handle.segment_name)
+        self.arrays = {name: np.ndarray(shape, dtype=dtype, buffer=self.segment.buf, offset=offset)
+                       for name, (offset, dtype, shape) in handle.layout.items()}
+        self.instance = self._rebuild_instance()
+
+    def _rebuild_instance(self) -> ProblemInstance:
+        data = {}
+        for column, kind in self.handle.columns:
+            if kind == 'numeric':
+                data[column] = self.arrays[f'column:{column}']
+            else:
+                data[column] = _decode_text(*(self.arrays[f'text:{column}:{part}'] for part in ('codes', 'blob', 'offsets', 'kinds')))
+        df = pd.DataFrame(data, index=pd.Index(self.arrays['index']), copy=False)
+        eligibility = self.arrays['eligibility']
+        jobs = build_jobs(df, self.handle.machine_names, eligibility)
+        instance = ProblemInstance(jobs, self.handle.machine_names, eligibility, self.handle.sleeve_index,
+                                   self.handle.flexible, self.handle.calendars, df)
+        # Its DataFrame and eligibility matrix are views into the segment, so the instance keeps it mapped
+        instance.attachment = self
+        return instance
+
+# Instances attached by this (worker) process, by segment name
+_attached: Dict[str, AttachedInstance] = {}
+
+def attach_instance(handle: SharedInstanceHandle) -> ProblemInstance:
+    """The instance of a handle, attached and rebuilt once per worker process and reused by its later tasks."""
+    attached = _attached.get(handle.segment_name)
+    if attached is None:
+        attached = _attached[handle.segment_name] = AttachedInstance(handle)
+    return attached.instance
+
+def detach_all():
+    """Drops the instances attached by this process (their mappings are released when no view is left)."""
+    _attached.clear()
@@ -1,5 +1,14 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
+def development_key(value) -> Optional[int]:
+    """Normalizes a job's 'diametro_de_manga' to the integer 'development' used by sleeve_sets."""
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return None
+
 class SleeveSetBase(BaseModel):
     development: int
     num_sleeves: int
@@ -0,0 +1,99 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..utils.setup_utils import SETUP_TIMES
+
+REQUIRED_COLUMNS = ['referencia', 'maquina_sugerida', 'metros_requeridos', 'velocidad_sugerida',
+                    'nivel_de_criticidad', 'diametro_de_manga', 'tipo_de_impresion']
+NUMERIC_COLUMNS = ['metros_requeridos', 'velocidad_sugerida', 'nivel_de_criticidad', 'diametro_de_manga']
+POSITIVE_COLUMNS = ['metros_requeridos', 'velocidad_sugerida']
+
+ON_INVALID_MODES = ('fail', 'skip')
+# Spreadsheet rows listed per problem in the report; the count covers all of them
+MAX_REPORTED_ROWS = 20
+# read_excel numbers the first data row 0, right below the header row 1
+FIRST_DATA_ROW = 2
+
+class JobTableError(ValueError):
+    """Raised when the uploaded table cannot be scheduled; 'report' is the validation report (see validate_jobs_table)."""
+    def __init__(self, message: str, report: Dict):
+        super().__init__(message)
+        self.report = report
+
+def _problem(df: pd.DataFrame, mask: np.ndarray, column: str, code: str, values: bool = False) -> Dict:
+    rows = df.index[mask]
+    problem = {'column': column, 'code': code, 'count': int(mask.sum()),
+               'rows': [int(row) + FIRST_DATA_ROW for row in rows[:MAX_REPORTED_ROWS]]}
+    if values:
+        problem['values'] = sorted(map(str, df.loc[mask, column].unique()))[:MAX_REPORTED_ROWS]
+    return problem
+
+def validate_jobs_table(df: pd.DataFrame, registered_machines: Optional[Set[str]] = None,
+                        on_invalid: str = 'fail') -> Tuple[pd.DataFrame, Dict]:
+    """
+    Checks the normalized upload table column by column, before any Job is built:
+    required columns, missing cells, numeric columns, positive meters and speeds (a zero speed is an
+    infinite duration) and print types known to setup_times.json. Each problem is reported once with
+    its row count and the first spreadsheet rows (header = row 1). Suggested machines missing from the
+    'machines' table (registered_machines; None or empty skips the check) are only warnings, since
+    unregistered machines are still scheduled, without width limits.
+
+    With on_invalid='fail' any invalid row raises JobTableError; with 'skip' those rows are dropped
+    (keeping the index, so jobs still point at their spreadsheet row). A missing column or a table
+    with no valid row always raises. Returns the table, with numeric columns converted, and the report.
+    """
+    if on_invalid not in ON_INVALID_MODES:
+        raise ValueError(f"on_invalid must be one of: {', '.join(ON_INVALID_MODES)}")
+    report = {'rows': len(df), 'invalid_rows': 0, 'skipped_rows': 0, 'errors': [], 'warnings': []}
+
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing_columns:
+        report['errors'] = [{'column': column, 'code': 'missing_column'} for column in missing_columns]
+        raise JobTableError(f"Missing columns in Excel file: {', '.join(missing_columns)}", report)
+
+    df = df.copy()
+    invalid = np.zeros(len(df), dtype=bool)
+    errors: List[Dict] = []
+
+    def flag(mask: np.ndarray, column: str, code: str, values: bool = False):
+        nonlocal invalid
+        mask = mask & ~invalid # Only the first problem of a row is reported
+        if mask.any():
+            errors.append(_problem(df, mask, column, code, values))
+            invalid |= mask
+
+    for column in REQUIRED_COLUMNS:
+        missing = df[column].isna()
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            missing |= df[column].astype(str).str.strip() == ''
+        flag(missing.to_numpy(), column, 'missing')
+    for column in NUMERIC_COLUMNS:
+        numbers = pd.to_numeric(df[column], errors='coerce')
+        flag(numbers.isna().to_numpy(), column, 'not_numeric', values=True)
+        df[column] = numbers
+    for column in POSITIVE_COLUMNS:
+        flag(~(df[column].to_numpy(dtype=float) > 0), column, 'not_positive')
+    if SETUP_TIMES:
+        flag(~df['tipo_de_impresion'].isin(SETUP_TIMES).to_numpy(), 'tipo_de_impresion', 'unknown_print_type', values=True)
+
+    if registered_machines:
+        unknown = ~df['maquina_sugerida'].astype(str).isin(registered_machines).to_numpy() & ~invalid
+        if unknown.any():
+            report['warnings'].append(_problem(df, unknown, 'maquina_sugerida', 'unregistered_machine', values=True))
+
+    report['errors'] = errors
+    report['invalid_rows'] = int(invalid.sum())
+    if invalid.all() and len(df):
+        raise JobTableError("No valid rows in Excel file", report)
+    if invalid.any():
+        if on_invalid == 'fail':
+            raise JobTableError(f"{report['invalid_rows']} invalid rows in Excel file", report)
+        df = df[~invalid]
+        report['skipped_rows'] = report['invalid_rows']
+    for column in NUMERIC_COLUMNS:
+        # Whole numbers back to integers once the invalid cells are gone, as read_excel gives them
+        if not pd.api.types.is_integer_dtype(df[column]) and len(df) and (df[column] % 1 == 0).all():
+            df[column] = df[column].astype(np.int64)
+    return df, report
@@ -0,0 +1,466 @@
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.setup_utils import get_setup_time
+from ..models.domain import Job, MachineSchedule
+from .campaign_optimizer import _machine_capacity, job_value, optimize_campaigns
+from .search_budget import SearchBudget
+from .sleeve_constraints import SleeveIndex
+
+# Moves between two looks at the clock (deadline and temperature update)
+CHECK_EVERY = 1024
+# Final temperature as a fraction of the initial one
+FINAL_TEMPERATURE_RATIO = 1e-3
+# Price of a setup hour in the objective and initial temperature, both relative to the average value
+# (meters plus weighted criticality) per working hour of the jobs. Setup hours only matter as lost capacity,
+# so their price is a tie-breaker that favours shorter changeovers between schedules with the same jobs
+SETUP_PRICE = 0.05
+START_TEMPERATURE = 0.5
+# Objective tolerance (the totals are updated incrementally, so they carry rounding noise)
+EPSILON = 1e-6
+# Random numbers drawn from numpy at a time (a Python random.random() per draw is several times slower)
+RANDOM_BATCH = 1 << 16
+# With sleeve sets or calendars the capacity model misses the waits, so the sequences are placed on real
+# schedules (and the jobs that do not fit dropped) at every such fraction of the budget
+RESYNC_EVERY = 0.1
+
+class _SequenceState:
+    """
+    Solution of the annealing engine as plain integer lists: the sequence of job ids of every machine,
+    its used hours (durations plus setups) and the pool of unscheduled jobs with their positions in it.
+    Print types are integer ids into a setup matrix whose last row/column is 'no type' (zero setup),
+    used before the first job of a machine without an initial type and after the last job of every machine.
+    """
+    def __init__(self, jobs: List[Job], machine_schedules: Dict[str, MachineSchedule]):
+        self.machine_names = list(machine_schedules)
+        machine_pos = {name: i for i, name in enumerate(self.machine_names)}
+        type_names = sorted({job.tipo_de_impresion for job in jobs} |
+                            {s.initial_impression_type for s in machine_schedules.values() if s.initial_impression_type is not None}, key=str)
+        type_pos = {name: i for i, name in enumerate(type_names)}
+        self.none_type = len(type_names)
+        self.setup = [[get_setup_time(a, b) for b in type_names] + [0.0] for a in type_names] + [[0.0] * (len(type_names) + 1)]
+
+        self.type_of = [type_pos[job.tipo_de_impresion] for job in jobs]
+        self.duration = [job.get_duration_hours() for job in jobs]
+        self.value = [float(job_value(job)) for job in jobs]
+        self.eligible = [[machine_pos[name] for name in job.eligible_machines if name in machine_pos] for job in jobs]
+        self.initial_type = [type_pos.get(s.initial_impression_type, self.none_type) for s in machine_schedules.values()]
+        self.capacity = [_machine_capacity(s) for s in machine_schedules.values()]
+
+        self.sequences: List[List[int]] = [[] for _ in self.machine_names]
+        self.used = [0.0] * len(self.machine_names)
+        self.machine_of = [-1] * len(jobs)
+        self.unscheduled = list(range(len(jobs)))
+        self.unscheduled_pos = list(range(len(jobs)))
+        self.total_value = 0.0
+        self.total_setup = 0.0
+
+    def load(self, sequences: List[List[int]]):
+        """Sets the machine sequences (e.g. from an initial schedule) and recomputes the totals."""
+        self.sequences = [list(sequence) for sequence in sequences]
+        self.machine_of = [-1] * len(self.type_of)
+        self.total_value = self.total_setup = 0.0
+        for m, sequence in enumerate(self.sequences):
+            previous = self.initial_type[m]
+            setup = 0.0
+            for j in sequence:
+                self.machine_of[j] = m
+                setup += self.setup[previous][self.type_of[j]]
+                previous = self.type_of[j]
+                self.total_value += self.value[j]
+            self.used[m] = setup + sum(self.duration[j] for j in sequence)
+            self.total_setup += setup
+        self.unscheduled = [j for j in range(len(self.type_of)) if self.machine_of[j] == -1]
+        self.unscheduled_pos = [0] * len(self.type_of)
+        for i, j in enumerate(self.unscheduled):
+            self.unscheduled_pos[j] = i
+
+    def snapshot(self) -> List[List[int]]:
+        return [list(sequence) for sequence in self.sequences]
+
+def _initial_sequences(state: _SequenceState, jobs: List[Job], machine_schedules: Dict[str, MachineSchedule],
+                       sleeve_index: SleeveIndex | None, campaign_start: bool) -> List[List[int]]:
+    """The campaign engine's schedule, or the most valuable jobs appended wherever they still fit."""
+    if campaign_start:
+        position = {id(job): i for i, job in enumerate(jobs)}
+        # One tracker for all machines, as in Instance.new_machine_schedules, so sleeve sets are not double-booked
+        sleeve_usage = sleeve_index.new_usage() if sleeve_index is not None else None
+        schedules = {name: template.fresh_copy(sleeve_usage) for name, template in machine_schedules.items()}
+        optimize_campaigns(jobs, schedules, sleeve_index)
+        return [[position[id(item['job_object'])] for item in schedules[name].jobs] for name in state.machine_names]
+
+    sequences = [[] for _ in state.machine_names]
+    last = list(state.initial_type)
+    used = [0.0] * len(sequences)
+    for j in sorted(range(len(jobs)), key=state.value.__getitem__, reverse=True):
+        for m in state.eligible[j]:
+            hours = state.setup[last[m]][state.type_of[j]] + state.duration[j]
+            if used[m] + hours <= state.capacity[m]:
+                sequences[m].append(j)
+                used[m] += hours
+                last[m] = state.type_of[j]
+                break
+    return sequences
+
+def _place(state: _SequenceState, jobs: List[Job], machine_schedules: Dict[str, MachineSchedule],
+           sequences: List[List[int]], sleeve_index: SleeveIndex | None) -> List[Tuple[int, int]]:
+    """
+    Places the sequences on empty copies of the schedules sharing one sleeve tracker (so calendars and
+    sleeve waits between machines are honored), skipping the jobs that do not fit, then appends the
+    remaining jobs, most valuable first, wherever they still fit. Returns the (machine, job) additions
+    in order: replayed in that order on empty schedules, every one of them fits again.
+    """
+    sleeve_usage = sleeve_index.new_usage() if sleeve_index is not None else None
+    schedules = [machine_schedules[name].fresh_copy(sleeve_usage) for name in state.machine_names]
+    order = []
+    scheduled = set()
+
+    def add(m: int, j: int) -> bool:
+        machine = schedules[m]
+        setup_time = get_setup_time(machine.get_last_impression_type(), jobs[j].tipo_de_impresion)
+        if not machine.can_add_job(jobs[j], setup_time):
+            return False
+        machine.add_job(jobs[j], setup_time)
+        order.append((m, j))
+        scheduled.add(j)
+        return True
+
+    for m, sequence in enumerate(sequences):
+        for j in sequence:
+            add(m, j)
+    for j in sorted((j for j in range(len(jobs)) if j not in scheduled), key=state.value.__getitem__, reverse=True):
+        any(add(m, j) for m in state.eligible[j])
+    return order
+
+def _sequences(state: _SequenceState, order: List[Tuple[int, int]]) -> List[List[int]]:
+    sequences = [[] for _ in state.machine_names]
+    for m, j in order:
+        sequences[m].append(j)
+    return sequences
+
+def optimize_annealing(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None = None,
+                       stats: Optional[dict] = None, max_moves: Optional[int] = 10_000_000, tabu_tenure: int = 0,
+                       initial_temperature: Optional[float] = None, campaign_start: bool = True,
+                       deadline_ms: Optional[float] = None, target_fitness: Optional[float] = None) -> int:
+    """
+    Simulated annealing over per-machine job sequences, with an optional tabu list.
+
+    Each machine is a list of job ids that must fit in its working hours (_machine_capacity), and the
+    jobs outside every list form the unscheduled pool. The moves are: swap two jobs of a machine,
+    move a job to another position (or, in flexible mode, to another eligible machine), bring an
+    unscheduled job in, take a job out and replace a scheduled job by an unscheduled one. The change
+    of each move, in hours and in objective, comes from a handful of setup-matrix lookups around the
+    positions it touches (O(1)), so a move is evaluated without rebuilding any MachineSchedule; only
+    accepted moves edit the lists.
+
+    The objective is schedule_score (meters plus weighted criticality) minus a small price per setup hour
+    (SETUP_PRICE), so shorter changeovers are rewarded even before they make room for another job.
+    The temperature falls geometrically from initial_temperature (by default half the average value
+    of a working hour) as the time budget (deadline_ms) or max_moves is consumed, whichever runs out first. With tabu_tenure > 0 a job taken out of (or
+    brought into) the schedule cannot go back (or leave) for that many moves, unless the move
+    improves the best solution.
+
+    It starts from the campaign engine's schedule (campaign_start) or from a value-ordered fill. The
+    capacity model knows nothing of sleeve waits between machines or calendar gaps, so with a sleeve
+    index or calendars the sequences are placed on real schedules every RESYNC_EVERY of the budget and
+    the search continues from what fits (the jobs skipped go back to the pool, free room is refilled).
+    The best sequences are finally placed on machine_schedules, or the best schedule placed along the
+    way (at least the initial one) if that scores more. If a stats dict is given, it receives the moves
+    made and accepted, the moves per second, the resyncs, the jobs skipped at placement and why the
+    search stopped. Returns the number of unscheduled jobs.
+    """
+    budget = SearchBudget(deadline_ms, target_fitness)
+    if max_moves is None and not budget.is_bounded():
+        raise ValueError("max_moves=None requires a deadline or a target fitness")
+
+    state = _SequenceState(jobs, machine_schedules)
+    # Sleeve waits between machines and calendar gaps are not in the capacity model, only in real placement
+    resync = sleeve_index is not None or any(s.calendar is not None for s in machine_schedules.values())
+    initial_sequences = _initial_sequences(state, jobs, machine_schedules, sleeve_index, campaign_start)
+    # (machine, job) additions of the best schedule placed so far, in order
+    best_placed = [(m, j) for m, sequence in enumerate(initial_sequences) for j in sequence]
+    if resync:
+        best_placed = _place(state, jobs, machine_schedules, initial_sequences, sleeve_index)
+        initial_sequences = _sequences(state, best_placed)
+    state.load(initial_sequences)
+    initial_score = best_placed_score = state.total_value
+
+    total_hours = sum(d for d in state.duration if d != float('inf'))
+    value_per_hour = sum(state.value) / total_hours if total_hours > 0 else 1.0
+    price = SETUP_PRICE * value_per_hour
+    start_temperature = initial_temperature or START_TEMPERATURE * value_per_hour
+    temperature = start_temperature
+    flexible = any(len(machines) > 1 for machines in state.eligible)
+
+    # Locals for the hot loop
+    setup, type_of, duration, value, eligible = state.setup, state.type_of, state.duration, state.value, state.eligible
+    sequences, used, capacity, initial_type = state.sequences, state.used, state.capacity, state.initial_type
+    machine_of, unscheduled, unscheduled_pos = state.machine_of, state.unscheduled, state.unscheduled_pos
+    none_type = state.none_type
+    num_machines = len(sequences)
+    tabu_until = [0] * len(jobs)
+    exp = math.exp
+
+    current = state.total_value - price * state.total_setup
+    best, best_sequences, best_saved = current, None, False
+    moves = accepted = improvements = resyncs = 0
+    next_resync = RESYNC_EVERY
+    randoms, r = np.random.random(RANDOM_BATCH).tolist(), 0
+    stop_reason = None
+    started = time.perf_counter()
+
+    while num_machines and len(jobs):
+        if moves % CHECK_EVERY == 0:
+            progress = moves / max_moves if max_moves else 0.0
+            if budget.deadline is not None:
+                if budget.expired():
+                    stop_reason = 'deadline'
+                    break
+                progress = max(progress, (time.monotonic() - budget.started) / (budget.deadline - budget.started))
+            if max_moves is not None and moves >= max_moves:
+                break
+            if resync and progress >= next_resync:
+                # Continue from the best sequences, placed for real: the jobs that do not fit go back to the pool
+                next_resync = progress + RESYNC_EVERY
+                resyncs += 1
+                order = _place(state, jobs, machine_schedules, best_sequences if best_saved else state.sequences, sleeve_index)
+                state.load(_sequences(state, order))
+                if state.total_value > best_placed_score:
+                    best_placed, best_placed_score = order, state.total_value
+                sequences, machine_of = state.sequences, state.machine_of
+                unscheduled, unscheduled_pos = state.unscheduled, state.unscheduled_pos
+                current = state.total_value - price * state.total_setup
+                best, best_sequences, best_saved = current, None, False
+            temperature = start_temperature * FINAL_TEMPERATURE_RATIO ** min(progress, 1.0)
+        if r + 5 > RANDOM_BATCH:
+            randoms, r = np.random.random(RANDOM_BATCH).tolist(), 0
+        kind, u1, u2, u3, u4 = randoms[r], randoms[r + 1], randoms[r + 2], randoms[r + 3], randoms[r + 4]
+        r += 5
+        moves += 1
+
+        m = int(u1 * num_machines)
+        sequence = sequences[m]
+        size = len(sequence)
+
+        if kind < 0.3: # Swap two jobs of machine m
+            if size < 2:
+                continue
+            i, j = int(u2 * size), int(u3 * size)
+            if i == j:
+                continue
+            if i > j:
+                i, j = j, i
+            a, b = type_of[sequence[i]], type_of[sequence[j]]
+            pa = type_of[sequence[i - 1]] if i else initial_type[m]
+            nb = type_of[sequence[j + 1]] if j + 1 < size else none_type
+            if j == i + 1:
+                delta_hours = setup[pa][b] + setup[b][a] + setup[a][nb] - setup[pa][a] - setup[a][b] - setup[b][nb]
+            else:
+                na, pb = type_of[sequence[i + 1]], type_of[sequence[j - 1]]
+                delta_hours = (setup[pa][b] + setup[b][na] + setup[pb][a] + setup[a][nb]
+                               - setup[pa][a] - setup[a][na] - setup[pb][b] - setup[b][nb])
+            if used[m] + delta_hours > capacity[m] + 1e-9:
+                continue
+            delta = -price * delta_hours
+            if delta < 0:
+                if u4 >= exp(delta / temperature):
+                    continue
+                if not best_saved and current >= best - EPSILON:
+                    best_sequences, best_saved = state.snapshot(), True
+            sequence[i], sequence[j] = sequence[j], sequence[i]
+            used[m] += delta_hours
+            state.total_setup += delta_hours
+
+        elif kind < 0.6: # Move a job to another position, of this machine or of another eligible one
+            if not size:
+                continue
+            i = int(u2 * size)
+            x = sequence[i]
+            t = type_of[x]
+            p = type_of[sequence[i - 1]] if i else initial_type[m]
+            n = type_of[sequence[i + 1]] if i + 1 < size else none_type
+            removed_hours = setup[p][n] - setup[p][t] - setup[t][n]
+            target = m
+            if flexible and kind >= 0.45 and len(eligible[x]) > 1:
+                target = eligible[x][int((kind - 0.45) / 0.15 * len(eligible[x]))]
+            if target == m:
+                # Position k in the sequence without x, whose job q sits at q if q < i and at q + 1 otherwise
+                k = int(u3 * size)
+                if k == i:
+                    continue
+                pq = type_of[sequence[k - 1 if k - 1 < i else k]] if k else initial_type[m]
+                nq = type_of[sequence[k if k < i else k + 1]] if k < size - 1 else none_type
+                delta_hours = removed_hours + setup[pq][t] + setup[t][nq] - setup[pq][nq]
+                if used[m] + delta_hours > capacity[m] + 1e-9:
+                    continue
+                delta = -price * delta_hours
+                if delta < 0:
+                    if u4 >= exp(delta / temperature):
+                        continue
+                    if not best_saved and current >= best - EPSILON:
+                        best_sequences, best_saved = state.snapshot(), True
+                sequence.pop(i)
+                sequence.insert(k, x)
+                used[m] += delta_hours
+                state.total_setup += delta_hours
+            else:
+                other = sequences[target]
+                k = int(u3 * (len(other) + 1))
+                pq = type_of[other[k - 1]] if k else initial_type[target]
+                nq = type_of[other[k]] if k < len(other) else none_type
+                added_hours = setup[pq][t] + setup[t][nq] - setup[pq][nq]
+                if used[target] + added_hours + duration[x] > capacity[target] + 1e-9:
+                    continue
+                delta_hours = removed_hours + added_hours
+                delta = -price * delta_hours
+                if delta < 0:
+                    if u4 >= exp(delta / temperature):
+                        continue
+                    if not best_saved and current >= best - EPSILON:
+                        best_sequences, best_saved = state.snapshot(), True
+                sequence.pop(i)
+                other.insert(k, x)
+                used[m] += removed_hours - duration[x]
+                used[target] += added_hours + duration[x]
+                machine_of[x] = target
+                state.total_setup += delta_hours
+
+        elif kind < 0.75: # Bring an unscheduled job in, on one of its eligible machines (m is not used)
+            if not unscheduled:
+                continue
+            x = unscheduled[int(u2 * len(unscheduled))]
+            if not eligible[x]:
+                continue
+            m = eligible[x][int(u4 * len(eligible[x]))]
+            sequence = sequences[m]
+            k = int(u3 * (len(sequence) + 1))
+            t = type_of[x]
+            p = type_of[sequence[k - 1]] if k else initial_type[m]
+            n = type_of[sequence[k]] if k < len(sequence) else none_type
+            setup_hours = setup[p][t] + setup[t][n] - setup[p][n]
+            if used[m] + setup_hours + duration[x] > capacity[m] + 1e-9:
+                continue
+            delta = value[x] - price * setup_hours
+            if tabu_until[x] > moves and current + delta <= best:
+                continue
+            if delta < 0:
+                if u1 >= exp(delta / temperature):
+                    continue
+                if not best_saved and current >= best - EPSILON:
+                    best_sequences, best_saved = state.snapshot(), True
+            sequence.insert(k, x)
+            used[m] += setup_hours + duration[x]
+            machine_of[x] = m
+            last = unscheduled.pop()
+            if last != x:
+                pos = unscheduled_pos[x]
+                unscheduled[pos] = last
+                unscheduled_pos[last] = pos
+            tabu_until[x] = moves + tabu_tenure
+            state.total_value += value[x]
+            state.total_setup += setup_hours
+
+        elif kind < 0.85: # Take a job out of machine m
+            if not size:
+                continue
+            i = int(u2 * size)
+            x = sequence[i]
+            t = type_of[x]
+            p = type_of[sequence[i - 1]] if i else initial_type[m]
+            n = type_of[sequence[i + 1]] if i + 1 < size else none_type
+            setup_hours = setup[p][n] - setup[p][t] - setup[t][n]
+            delta = -value[x] - price * setup_hours
+            if tabu_until[x] > moves and current + delta <= best:
+                continue
+            if delta < 0:
+                if u4 >= exp(delta / temperature):
+                    continue
+                if not best_saved and current >= best - EPSILON:
+                    best_sequences, best_saved = state.snapshot(), True
+            sequence.pop(i)
+            used[m] += setup_hours - duration[x]
+            machine_of[x] = -1
+            unscheduled_pos[x] = len(unscheduled)
+            unscheduled.append(x)
+            tabu_until[x] = moves + tabu_tenure
+            state.total_value -= value[x]
+            state.total_setup += setup_hours
+
+        else: # Replace a job of machine m by an unscheduled one
+            if not size or not unscheduled:
+                continue
+            i = int(u2 * size)
+            y = unscheduled[int(u3 * len(unscheduled))]
+            if m not in eligible[y]:
+                continue
+            x = sequence[i]
+            tx, ty = type_of[x], type_of[y]
+            p = type_of[sequence[i - 1]] if i else initial_type[m]
+            n = type_of[sequence[i + 1]] if i + 1 < size else none_type
+            setup_hours = setup[p][ty] + setup[ty][n] - setup[p][tx] - setup[tx][n]
+            if used[m] + setup_hours + duration[y] - duration[x] > capacity[m] + 1e-9:
+                continue
+            delta = value[y] - value[x] - price * setup_hours
+            if (tabu_until[x] > moves or tabu_until[y] > moves) and current + delta <= best:
+                continue
+            if delta < 0:
+                if u4 >= exp(delta / temperature):
+                    continue
+                if not best_saved and current >= best - EPSILON:
+                    best_sequences, best_saved = state.snapshot(), True
+            sequence[i] = y
+            used[m] += setup_hours + duration[y] - duration[x]
+            machine_of[x], machine_of[y] = -1, m
+            pos = unscheduled_pos[y]
+            unscheduled[pos] = x
+            unscheduled_pos[x] = pos
+            tabu_until[x] = tabu_until[y] = moves + tabu_tenure
+            state.total_value += value[y] - value[x]
+            state.total_setup += setup_hours
+
+        accepted += 1
+        current = state.total_value - price * state.total_setup
+        if current > best + EPSILON:
+            best, best_saved = current, False
+            improvements += 1
+            if budget.reached(state.total_value):
+                break
+
+    # Unless the search left the best solution (and saved it then), the current one is the best
+    if best_saved:
+        state.load(best_sequences)
+    order = [(m, j) for m, sequence in enumerate(state.sequences) for j in sequence]
+    if resync:
+        order = _place(state, jobs, machine_schedules, state.sequences, sleeve_index)
+    # The setup price may trade value for shorter changeovers: never return less than the best placed schedule
+    if sum(value[j] for _, j in order) < best_placed_score:
+        order = best_placed
+    elapsed = time.perf_counter() - started
+
+    # Place the chosen additions on the real schedules, in the same order
+    scheduled = skipped = 0
+    for m, j in order:
+        machine = machine_schedules[state.machine_names[m]]
+        setup_time = get_setup_time(machine.get_last_impression_type(), jobs[j].tipo_de_impresion)
+        if machine.can_add_job(jobs[j], setup_time):
+            machine.add_job(jobs[j], setup_time)
+            scheduled += 1
+        else:
+            skipped += 1
+
+    if stats is not None:
+        stats.update({
+            'moves': moves,
+            'accepted': accepted,
+            'improvements': improvements,
+            'moves_per_s': round(moves / elapsed, 1) if elapsed > 0 else 0.0,
+            'initial_score': initial_score,
+            'skipped_at_placement': skipped,
+            'resyncs': resyncs,
+            'elapsed_ms': round(elapsed * 1000, 1),
+            'stop_reason': budget.stop_reason or stop_reason or 'completed',
+        })
+    return len(jobs) - scheduled
@@ -0,0 +1,132 @@
+import bisect
+from typing import Iterable, List, Optional, Tuple
+
+Window = Tuple[float, float]
+
+def parse_shifts(shifts: str) -> List[Window]:
+    """
+    Parses a daily shift pattern like '6-14,14-22' (hours of the day). An overnight shift like '22-6'
+    is split at midnight into 22-24 and 0-6, which join again when the pattern repeats over days.
+    Raises ValueError if invalid.
+    """
+    windows = []
+    for part in shifts.split(','):
+        start, end = (float(value) for value in part.strip().split('-'))
+        if not (0 <= start < 24 and 0 < end <= 24) or start == end:
+            raise ValueError(f"Invalid shift '{part}'")
+        if end < start:
+            windows.extend([(start, 24.0), (0.0, end)])
+        else:
+            windows.append((start, end))
+    return windows
+
+def _merge(windows: Iterable[Window]) -> List[Window]:
+    merged: List[List[float]] = []
+    for start, end in sorted(windows):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def _subtract(windows: List[Window], downtimes: Iterable[Window]) -> List[Window]:
+    """Removes the downtime intervals from the (merged, sorted) availability windows with a single sweep."""
+    result = []
+    downtimes = _merge(downtimes)
+    j = 0
+    for start, end in windows:
+        while j < len(downtimes) and downtimes[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(downtimes) and downtimes[k][0] < end:
+            if downtimes[k][0] > start:
+                result.append((start, downtimes[k][0]))
+            start = max(start, downtimes[k][1])
+            k += 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+class AvailabilityCalendar:
+    """
+    Availability of a machine as sorted, non-overlapping windows of absolute hours.
+
+    Every query is a binary search over the windows, so placing a job stays O(log k)
+    for calendars with thousands of windows (shifts, breaks and maintenance):
+    - split_jobs=True: a job may pause when a window ends and resume in the next one.
+    - split_jobs=False: a job must run inside a single window; the first window long
+      enough is found with a max segment tree over the window lengths.
+    """
+    def __init__(self, windows: Iterable[Window], split_jobs: bool = True):
+        windows = _merge(windows)
+        self.split_jobs = split_jobs
+        self.starts = [start for start, _ in windows]
+        self.ends = [end for _, end in windows]
+        # cumulative[i] = available hours before window i
+        self.cumulative = [0.0]
+        for start, end in windows:
+            self.cumulative.append(self.cumulative[-1] + end - start)
+
+        self._size = 1
+        while self._size < max(1, len(windows)):
+            self._size *= 2
+        self._tree = [0.0] * (2 * self._size)
+        for i, (start, end) in enumerate(windows):
+            self._tree[self._size + i] = end - start
+        for node in range(self._size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+
+    @classmethod
+    def from_shifts(cls, shifts: List[Window], num_days: int, downtimes: Iterable[Window] = (),
+                    split_jobs: bool = True) -> 'AvailabilityCalendar':
+        """Repeats a daily shift pattern for num_days and removes the downtime windows."""
+        windows = []
+        for day in range(num_days):
+            offset = day * 24.0
+            windows.extend((offset + start, offset + end) for start, end in shifts)
+        return cls(_subtract(_merge(windows), downtimes), split_jobs)
+
+    def _first_window_fitting(self, first: int, hours: float) -> int:
+        """Index of the first window >= first whose length is at least 'hours', or -1."""
+        def search(node: int, node_lo: int, node_hi: int) -> int:
+            if node_hi <= first or self._tree[node] < hours:
+                return -1
+            if node_hi - node_lo == 1:
+                return node_lo
+            mid = (node_lo + node_hi) // 2
+            found = search(2 * node, node_lo, mid)
+            return found if found != -1 else search(2 * node + 1, mid, node_hi)
+        found = search(1, 0, self._size)
+        return found if found < len(self.starts) else -1
+
+    def earliest_start(self, time: float, hours: float) -> Optional[float]:
+        """First instant >= time at which a job of 'hours' of work can start, or None if the calendar ends first."""
+        i = bisect.bisect_right(self.ends, time)
+        if i == len(self.starts):
+            return None
+        start = max(time, self.starts[i])
+        if self.split_jobs or start + hours <= self.ends[i]:
+            return start
+        i = self._first_window_fitting(i + 1, hours)
+        return self.starts[i] if i != -1 else None
+
+    def _available_before(self, time: float) -> float:
+        """Available hours from the start of the calendar until 'time'."""
+        i = bisect.bisect_right(self.starts, time) - 1
+        return 0.0 if i < 0 else self.cumulative[i] + min(time, self.ends[i]) - self.starts[i]
+
+    def available_hours(self, start: float, end: float) -> float:
+        """Available hours between start and end."""
+        return max(0.0, self._available_before(end) - self._available_before(start))
+
+    def finish_time(self, start: float, hours: float) -> Optional[float]:
+        """Time at which 'hours' of work started at 'start' ends, skipping the unavailable gaps."""
+        if not self.split_jobs or hours <= 0:
+            return start + hours
+        target = self._available_before(start) + hours
+        if target > self.cumulative[-1]:
+            return None
+        j = bisect.bisect_left(self.cumulative, target) - 1
+        return self.starts[j] + (target - self.cumulative[j])
@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional
+
+from ..utils.setup_utils import get_setup_time
+from ..models.domain import Job, MachineSchedule
+from .campaign_optimizer import _machine_capacity, job_value
+
+def _fractional_knapsack(items: List[tuple], capacity: float) -> float:
+    """Best value of (weight, value) items in 'capacity' hours when items may be taken in part."""
+    bound = 0.0
+    for weight, value in sorted(items, key=lambda item: item[1] / item[0] if item[0] > 0 else float('inf'), reverse=True):
+        if weight <= capacity:
+            bound += value
+            capacity -= weight
+        else:
+            bound += value * capacity / weight
+            break
+    return bound
+
+def _least_weights(jobs: List[Job], initial_types: List[Optional[str]]) -> tuple[List[tuple], float]:
+    """
+    (weight, value) of every job that can run at all: its duration plus the cheapest setup into its
+    print type from a print type (the jobs' types or a non-empty initial type). That setup is unavoidable
+    for every job but the first of each machine, which may come cheaper from the machine's initial type:
+    the second value returned is that saving summed over the machines (one entry of initial_types each),
+    to be added to the capacity.
+    """
+    types = {job.tipo_de_impresion for job in jobs}
+    sources = (types | set(initial_types)) - {None}
+    min_setup = {to_type: min((get_setup_time(from_type, to_type) for from_type in sources), default=0.0) for to_type in types}
+    items = []
+    for job in jobs:
+        weight = job.get_duration_hours() + min_setup[job.tipo_de_impresion]
+        if weight != float('inf'):
+            items.append((weight, job_value(job)))
+    first_job_saving = sum(max([min_setup[to_type] - get_setup_time(initial_type, to_type) for to_type in types] + [0.0])
+                           for initial_type in initial_types)
+    return items, first_job_saving
+
+def machine_upper_bound(machine_template: MachineSchedule, jobs: List[Job]) -> float:
+    """
+    Capacity relaxation of one machine: no order of 'jobs' scores more (schedule_score) on it than
+    the fractional knapsack of their job_value over their least weights (see _least_weights) in the
+    machine's working hours before the horizon end.
+    """
+    items, first_job_saving = _least_weights(jobs, [machine_template.initial_impression_type])
+    return _fractional_knapsack(items, _machine_capacity(machine_template) + first_job_saving)
+
+def instance_upper_bound(jobs: List[Job], machine_templates: Dict[str, MachineSchedule]) -> Dict:
+    """
+    Upper bound of schedule_score over every schedule of the jobs, as the smallest of three valid bounds:
+    - the sum of machine_upper_bound over the machines, each with the jobs eligible for it
+      (exact relaxation when every job has one machine; jobs with several count on each);
+    - one fractional knapsack of all the jobs in the working hours of all the machines;
+    - the value of all the jobs that some machine can run.
+    Returns the bound and the per-machine bounds.
+    """
+    machine_jobs: Dict[str, List[Job]] = {name: [] for name in machine_templates}
+    for job in jobs:
+        for name in job.eligible_machines:
+            if name in machine_jobs:
+                machine_jobs[name].append(job)
+    machines = {name: machine_upper_bound(template, machine_jobs[name]) for name, template in machine_templates.items()}
+
+    schedulable = [job for job in jobs if any(name in machine_jobs for name in job.eligible_machines)]
+    items, first_job_saving = _least_weights(schedulable, [template.initial_impression_type for template in machine_templates.values()])
+    pooled = _fractional_knapsack(items, sum(_machine_capacity(template) for template in machine_templates.values()) + first_job_saving)
+    total = sum(job_value(job) for job in schedulable)
+    return {'upper_bound': min(sum(machines.values()), pooled, total), 'machines': machines}
+
+def optimality_gap(score: float, upper_bound: float) -> float:
+    """Relative distance of a score to the upper bound: 0.0 means provably optimal."""
+    if upper_bound <= 0:
+        return 0.0
+    return max(0.0, (upper_bound - score) / upper_bound)
+
+def gap_target(upper_bound: float, gap_tolerance: Optional[float]) -> Optional[float]:
+    """Score at which the gap falls to gap_tolerance (None without a tolerance)."""
+    if gap_tolerance is None:
+        return None
+    return upper_bound * (1.0 - gap_tolerance)
@@ -0,0 +1,251 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.setup_utils import get_setup_time
+from ..models.domain import Job, MachineSchedule
+from .search_budget import SearchBudget
+from .sleeve_constraints import SleeveIndex
+
+# Up to this many print types on a machine every subset of types is sequenced and filled exactly;
+# beyond it all the types are used, in nearest-neighbour order
+MAX_EXACT_TYPES = 8
+# Largest number of capacity steps of a knapsack table; the step grows for long horizons
+MAX_CAPACITY_STEPS = 1440
+
+def job_value(job: Job) -> float:
+    """Contribution of a scheduled job to schedule_score (genetic_optimizer3): meters plus weighted criticality."""
+    return job.metros_requeridos + job.nivel_de_criticidad * 10000
+
+def sequence_types(types: List[str], initial_type: Optional[str]) -> Dict[int, Tuple[float, List[int]]]:
+    """
+    Cheapest order of the print-type campaigns of one machine (Held-Karp dynamic programming).
+    For every non-empty subset of 'types' (a bitmask over its positions) it returns the setup hours
+    of running one campaign of each type, starting after initial_type, and that order. Only the
+    changes between campaigns are counted; the self-transitions inside a campaign (A->A) are paid
+    per job, see _fill_campaigns.
+    With more than MAX_EXACT_TYPES types only the full set is returned, in nearest-neighbour order.
+    """
+    k = len(types)
+    setup = [[get_setup_time(a, b) for b in types] for a in types]
+    first = [get_setup_time(initial_type, t) for t in types]
+
+    if k > MAX_EXACT_TYPES:
+        order = [min(range(k), key=first.__getitem__)]
+        cost = first[order[0]]
+        left = set(range(k)) - set(order)
+        while left:
+            nxt = min(left, key=lambda t: setup[order[-1]][t])
+            cost += setup[order[-1]][nxt]
+            order.append(nxt)
+            left.remove(nxt)
+        return {(1 << k) - 1: (cost, order)}
+
+    # best[mask][last]: cheapest cost of visiting the types of mask ending with 'last'; parent for the order
+    best = [[math.inf] * k for _ in range(1 << k)]
+    parent = [[-1] * k for _ in range(1 << k)]
+    for t in range(k):
+        best[1 << t][t] = first[t]
+    for mask in range(1, 1 << k):
+        for last in range(k):
+            cost = best[mask][last]
+            if cost == math.inf:
+                continue
+            for nxt in range(k):
+                if mask >> nxt & 1:
+                    continue
+                extended = mask | 1 << nxt
+                if cost + setup[last][nxt] < best[extended][nxt]:
+                    best[extended][nxt] = cost + setup[last][nxt]
+                    parent[extended][nxt] = last
+
+    sequences = {}
+    for mask in range(1, 1 << k):
+        last = min(range(k), key=best[mask].__getitem__)
+        cost, order, current = best[mask][last], [], mask
+        while last != -1:
+            order.append(last)
+            last, current = parent[current][last], current & ~(1 << last)
+        sequences[mask] = (cost, order[::-1])
+    return sequences
+
+def _knapsack(weights: List[int], values: List[float], capacity: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    0/1 knapsack over integer weights: best[c] is the largest value that fits in c steps and
+    keep[i, c] tells whether item i is taken at capacity c (to rebuild the selection).
+    """
+    best = np.zeros(capacity + 1)
+    keep = np.zeros((len(weights), capacity + 1), dtype=bool)
+    for i, (weight, value) in enumerate(zip(weights, values)):
+        if weight > capacity:
+            continue
+        candidate = best[:capacity + 1 - weight] + value
+        improves = candidate > best[weight:]
+        keep[i, weight:] = improves
+        best[weight:] = np.where(improves, candidate, best[weight:])
+    return best, keep
+
+def _take(weights: List[int], keep: np.ndarray, capacity: int) -> List[int]:
+    """Items chosen by _knapsack for a given capacity."""
+    chosen = []
+    for i in range(len(weights) - 1, -1, -1):
+        if keep[i, capacity]:
+            chosen.append(i)
+            capacity -= weights[i]
+    return chosen[::-1]
+
+def _max_plus(left: np.ndarray, right: np.ndarray, shift: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combines two knapsack tables: combined[c] = max over a <= c of left[a] + right[c - a].
+    Returns the table and, for every c, the capacity a given to 'left'.
+    """
+    table = np.where(valid, left[None, :] + right[shift], -np.inf)
+    split = table.argmax(axis=1)
+    return table[np.arange(len(left)), split], split
+
+def _machine_capacity(machine: MachineSchedule) -> float:
+    """Working hours left on the machine before its horizon end, after its calendar."""
+    if machine.calendar is not None:
+        return machine.calendar.available_hours(machine.start_time_hours, machine.horizon_end)
+    return max(0.0, machine.horizon_end - machine.start_time_hours)
+
+def _fill_campaigns(machine: MachineSchedule, jobs: List[Job], time_step_hours: float) -> Tuple[List[Tuple[str, List[Job]]], int]:
+    """
+    Chooses and orders the jobs of one machine as campaigns of a print type.
+
+    Level 1: sequence_types gives, for every subset of types, the cheapest campaign order.
+    Level 2: the jobs of each type are a 0/1 knapsack on meters and criticality (job_value), where a job
+    weighs its duration plus the self-transition of its type and the first job of each campaign gets
+    its self-transition back, since it pays the change from the previous campaign instead. The type
+    tables are combined subset by subset (max-plus), so every subset is filled exactly and the best
+    subset wins. Weights are rounded up to time_step_hours, so the chosen jobs always fit.
+    Returns the campaigns as (type, jobs) in running order and the number of subsets evaluated.
+    """
+    capacity_hours = _machine_capacity(machine)
+    types = sorted({job.tipo_de_impresion for job in jobs}, key=str)
+    if not types or capacity_hours <= 0:
+        return [], 0
+    sequences = sequence_types(types, machine.initial_impression_type)
+    self_setup = [get_setup_time(t, t) for t in types]
+
+    by_type = [[job for job in jobs if job.tipo_de_impresion == t] for t in types]
+    hours = [[job.get_duration_hours() + self_setup[t] for job in type_jobs] for t, type_jobs in enumerate(by_type)]
+    full_cost, full_order = sequences[(1 << len(types)) - 1]
+    longest = capacity_hours + sum(self_setup)
+    if full_cost + sum(map(sum, hours)) <= longest:
+        # Every job fits: the cheapest sequence of all the campaigns
+        return [(types[t], by_type[t]) for t in full_order], 1
+
+    step = max(time_step_hours, longest / MAX_CAPACITY_STEPS)
+    capacity = int(longest / step + 1e-9)
+    weights = [[max(0, math.ceil(h / step - 1e-9)) for h in type_hours] for type_hours in hours]
+    tables = [_knapsack(type_weights, [job_value(job) for job in type_jobs], capacity)
+              for type_weights, type_jobs in zip(weights, by_type)]
+
+    cells = np.arange(capacity + 1)
+    shift = np.maximum(cells[:, None] - cells[None, :], 0)
+    valid = cells[None, :] <= cells[:, None]
+    # Table of every subset: the table of its lowest type combined with the one of the other types
+    combined: Dict[int, Tuple[np.ndarray, Optional[np.ndarray]]] = {}
+    def subset_table(mask: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if mask not in combined:
+            lowest = (mask & -mask).bit_length() - 1
+            rest = mask & (mask - 1)
+            combined[mask] = _max_plus(subset_table(rest)[0], tables[lowest][0], shift, valid) if rest else (tables[lowest][0], None)
+        return combined[mask]
+
+    best_value, best_mask, best_cells = -1.0, None, 0
+    for mask, (transitions, order) in sorted(sequences.items()):
+        available = capacity_hours - transitions + sum(self_setup[t] for t in order)
+        if available < 0:
+            continue
+        mask_cells = min(capacity, int(available / step + 1e-9))
+        value = subset_table(mask)[0][mask_cells]
+        if value > best_value:
+            best_value, best_mask, best_cells = value, mask, mask_cells
+
+    if best_mask is None:
+        return [], len(sequences)
+    # Rebuild the selection: split the capacity back type by type, from the lowest type bit up
+    chosen: Dict[int, List[Job]] = {}
+    mask, mask_cells = best_mask, best_cells
+    while mask:
+        lowest = (mask & -mask).bit_length() - 1
+        rest = mask & (mask - 1)
+        type_cells = mask_cells
+        if rest:
+            rest_cells = int(combined[mask][1][mask_cells])
+            type_cells = mask_cells - rest_cells
+            mask_cells = rest_cells
+        chosen[lowest] = [by_type[lowest][i] for i in _take(weights[lowest], tables[lowest][1], type_cells)]
+        mask = rest
+
+    _, order = sequences[best_mask]
+    # Types left without jobs are skipped; their neighbours in the order become consecutive
+    campaigns = [(types[t], chosen[t]) for t in order if chosen.get(t)]
+    return campaigns, len(sequences)
+
+def optimize_campaigns(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None = None,
+                       stats: Optional[dict] = None, time_step_hours: float = 0.05, deadline_ms: Optional[float] = None) -> int:
+    """
+    Hierarchical engine for campaigns of print types. With a handful of 'tipo_de_impresion' values most
+    of the setup time is decided by the order of the type campaigns on each machine, not by the order of
+    the individual jobs, so each machine is solved on two levels (see _fill_campaigns): the exact order
+    of its type campaigns and a knapsack selection of the jobs of every campaign within its horizon.
+
+    Machines with fewer candidate jobs choose first; in flexible mode a job chosen by one machine is no
+    longer a candidate of the others. Inside a campaign the most critical jobs run first. The jobs are
+    then placed in that order on machine_schedules, which honors calendars and sleeve sets (a job that
+    no longer fits is skipped), and the unchosen jobs fill whatever time is left at the end.
+
+    If a stats dict is given, it receives the campaigns of every machine, the total setup hours,
+    the type subsets evaluated and why the search stopped. If deadline_ms elapse, the machines
+    not solved yet are left empty (stats['deadline_reached']). Returns the number of unscheduled jobs.
+    """
+    print(f"DEBUG: optimize_campaigns started. Total jobs: {len(jobs)}, Machines: {len(machine_schedules)}")
+    budget = SearchBudget(deadline_ms)
+    candidates = {name: [job for job in jobs if name in job.eligible_machines] for name in machine_schedules}
+    scheduled = set()
+    evaluations = 0
+    campaigns_report = {}
+
+    for name in sorted(machine_schedules, key=lambda n: len(candidates[n])):
+        if budget.expired():
+            break
+        machine = machine_schedules[name]
+        pool = [job for job in candidates[name] if id(job) not in scheduled]
+        campaigns, evaluated = _fill_campaigns(machine, pool, time_step_hours)
+        evaluations += evaluated
+
+        for _, campaign_jobs in campaigns:
+            for job in sorted(campaign_jobs, key=lambda j: (-j.nivel_de_criticidad, j.get_duration_hours())):
+                setup_time = get_setup_time(machine.get_last_impression_type(), job.tipo_de_impresion)
+                if machine.can_add_job(job, setup_time):
+                    machine.add_job(job, setup_time)
+                    scheduled.add(id(job))
+        # Rounding the weights up leaves some slack: use it for the most valuable jobs left
+        for job in sorted(pool, key=job_value, reverse=True):
+            if id(job) in scheduled:
+                continue
+            setup_time = get_setup_time(machine.get_last_impression_type(), job.tipo_de_impresion)
+            if machine.can_add_job(job, setup_time):
+                machine.add_job(job, setup_time)
+                scheduled.add(id(job))
+        campaigns_report[name] = [t for t, _ in campaigns]
+
+    unscheduled = len(jobs) - len(scheduled)
+    if stats is not None:
+        stats.update(budget.report(0, evaluations))
+        stats['deadline_reached'] = budget.stop_reason == 'deadline'
+        stats['campaigns'] = campaigns_report
+        stats['setup_hours'] = round(sum(item['setup_time'] for s in machine_schedules.values() for item in s.jobs), 2)
+    print(f"DEBUG: optimize_campaigns finished. Unscheduled jobs: {unscheduled}")
+    return unscheduled
+
+def schedule_order(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule]) -> List[Job]:
+    """A finished schedule as a chromosome for the GAs: the scheduled jobs by start time, then the rest."""
+    items = sorted((item for schedule in machine_schedules.values() for item in schedule.jobs), key=lambda item: item['start_time'])
+    order = [item['job_object'] for item in items]
+    placed = {id(job) for job in order}
+    return order + [job for job in jobs if id(job) not in placed]
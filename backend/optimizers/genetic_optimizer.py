@@ -1,6 +1,8 @@
 import random
 import numpy as np
 from ..utils.setup_utils import get_setup_time
+from .evaluation_cache import EvaluationCache, PermutationHasher
+from .search_budget import SearchBudget
 
 def assign_jobs_to_machines(jobs_df, job_order):
     schedule_per_machine = {}
@@ -126,7 +128,12 @@ def mutate(chromosome, mutation_rate):
         chromosome[idx1], chromosome[idx2] = chromosome[idx2], chromosome[idx1]
     return chromosome
 
-def optimize_genetic(df):
+def find_best_order(df, stats=None, deadline_ms=None, target_fitness=None, num_generations=100):
+    """
+    Runs the GA and returns the best job order as positions of the DataFrame rows.
+    It stops after num_generations (None for no limit), after deadline_ms or when the best
+    fitness reaches target_fitness, always returning the best order evaluated so far.
+    """
     # Calculate time for each job in hours
     df['tiempo_horas'] = df.apply(
         lambda row: row['metros_requeridos'] / (row['velocidad_sugerida'] * 60) if row['velocidad_sugerida'] > 0 else float('inf'),
@@ -140,7 +147,7 @@ def optimize_genetic(df):
     )
 
     POPULATION_SIZE = 50
-    NUM_GENERATIONS = 100
+    NUM_GENERATIONS = num_generations
     MUTATION_RATE = 0.1
     NUM_PARENTS = 20
 
@@ -148,18 +155,43 @@ def optimize_genetic(df):
 
     population = initialize_population(POPULATION_SIZE, num_jobs)
 
-    best_chromosome = None
-    best_fitness = -1.0
-
-    for generation in range(NUM_GENERATIONS):
-        fitnesses = [calculate_fitness(chromosome, df, num_jobs) for chromosome in population]
-
-        current_best_fitness = max(fitnesses)
-        current_best_chromosome = population[fitnesses.index(current_best_fitness)]
+    budget = SearchBudget(deadline_ms, target_fitness)
+    if NUM_GENERATIONS is None and not budget.is_bounded():
+        raise ValueError("num_generations=None requires deadline_ms or target_fitness")
 
-        if current_best_fitness > best_fitness:
-            best_fitness = current_best_fitness
-            best_chromosome = current_best_chromosome
+    best_chromosome = population[0]
+    best_fitness = -1.0
+    evaluations = 0
+    generations_done = 0
+
+    # Fitness memo keyed by the 64-bit hash of each order (the elite is re-evaluated every generation otherwise)
+    hasher = PermutationHasher(num_jobs)
+    cache = EvaluationCache()
+
+    while NUM_GENERATIONS is None or generations_done < NUM_GENERATIONS:
+        fitnesses = []
+        for chromosome in population:
+            key = hasher.hash(chromosome)
+            fitness = cache.get(key)
+            if fitness is None:
+                if (evaluations or fitnesses) and budget.expired():
+                    break
+                fitness = calculate_fitness(chromosome, df, num_jobs)
+                cache.put(key, fitness)
+                evaluations += 1
+            fitnesses.append(fitness)
+
+        if fitnesses:
+            current_best_fitness = max(fitnesses)
+            if current_best_fitness > best_fitness:
+                best_fitness = current_best_fitness
+                best_chromosome = population[fitnesses.index(current_best_fitness)]
+
+        if len(fitnesses) < len(population): # Deadline reached in the middle of the generation
+            break
+        generations_done += 1
+        if budget.reached(best_fitness):
+            break
 
         parents = selection(population, fitnesses, NUM_PARENTS)
 
@@ -180,6 +212,14 @@ def optimize_genetic(df):
         
         population = next_population
 
+    if stats is not None:
+        stats.update(budget.report(generations_done, evaluations))
+        stats['cache'] = cache.stats()
+
+    return best_chromosome
+
+def optimize_genetic(df, stats=None):
+    best_chromosome = find_best_order(df, stats)
     optimized_schedule_ga, _, _, _ = assign_jobs_to_machines(df, best_chromosome)
 
     return optimized_schedule_ga
\ No newline at end of file
@@ -1,6 +1,9 @@
 import random
+import time
 import numpy as np
 from ..utils.setup_utils import get_setup_time
+from .evaluation_cache import EvaluationCache, PermutationHasher
+from .search_budget import SearchBudget
 
 def assign_jobs_to_machines(jobs_df, job_order):
     schedule_per_machine = {}
@@ -183,19 +186,10 @@ def selection(population, fitnesses, num_parents):
 
 def crossover(parent1, parent2):
     """
-    Crossover mejorado con múltiples operadores
+    Crossover mejorado con múltiples operadores (elegido uniformemente; find_best_order usa OperatorScheduler)
     """
-    size = len(parent1)
-    
-    # Seleccionar operador de crossover aleatoriamente
-    crossover_type = random.choice(['order', 'pmx', 'cycle'])
-    
-    if crossover_type == 'order':
-        return order_crossover(parent1, parent2)
-    elif crossover_type == 'pmx':
-        return pmx_crossover(parent1, parent2)
-    else:
-        return cycle_crossover(parent1, parent2)
+    crossover_type = random.choice(list(CROSSOVER_OPERATORS))
+    return CROSSOVER_OPERATORS[crossover_type](parent1, parent2)
 
 def order_crossover(parent1, parent2):
     """Order Crossover (OX)"""
@@ -276,34 +270,104 @@ def cycle_crossover(parent1, parent2):
     
     return child1, child2
 
+def swap_mutation(chromosome):
+    idx1, idx2 = random.sample(range(len(chromosome)), 2)
+    chromosome[idx1], chromosome[idx2] = chromosome[idx2], chromosome[idx1]
+
+def insert_mutation(chromosome):
+    # Insertar elemento en nueva posición
+    from_idx = random.randint(0, len(chromosome) - 1)
+    to_idx = random.randint(0, len(chromosome) - 1)
+    element = chromosome.pop(from_idx)
+    chromosome.insert(to_idx, element)
+
+def invert_mutation(chromosome):
+    # Invertir subsecuencia
+    start, end = sorted(random.sample(range(len(chromosome)), 2))
+    chromosome[start:end] = chromosome[start:end][::-1]
+
+CROSSOVER_OPERATORS = {'order': order_crossover, 'pmx': pmx_crossover, 'cycle': cycle_crossover}
+MUTATION_OPERATORS = {'swap': swap_mutation, 'insert': insert_mutation, 'invert': invert_mutation}
+
 def mutate(chromosome, mutation_rate):
     """
-    Mutación mejorada con múltiples operadores
+    Mutación mejorada con múltiples operadores (elegido uniformemente; find_best_order usa OperatorScheduler)
     """
     if random.random() < mutation_rate:
-        mutation_type = random.choice(['swap', 'insert', 'invert'])
-        
-        if mutation_type == 'swap':
-            idx1, idx2 = random.sample(range(len(chromosome)), 2)
-            chromosome[idx1], chromosome[idx2] = chromosome[idx2], chromosome[idx1]
-        
-        elif mutation_type == 'insert':
-            # Insertar elemento en nueva posición
-            from_idx = random.randint(0, len(chromosome) - 1)
-            to_idx = random.randint(0, len(chromosome) - 1)
-            element = chromosome.pop(from_idx)
-            chromosome.insert(to_idx, element)
-        
-        elif mutation_type == 'invert':
-            # Invertir subsecuencia
-            start, end = sorted(random.sample(range(len(chromosome)), 2))
-            chromosome[start:end] = chromosome[start:end][::-1]
-    
+        MUTATION_OPERATORS[random.choice(list(MUTATION_OPERATORS))](chromosome)
     return chromosome
 
-def optimize_genetic(df):
+class OperatorScheduler:
     """
-    Algoritmo genético mejorado optimizado para maximizar metros producidos
+    Selección adaptativa de operadores por persecución adaptativa (adaptive pursuit, Thierens 2005).
+
+    Cada operador recibe como crédito la mejora de fitness que producen sus hijos sobre el mejor de sus
+    padres dividida por el tiempo de CPU que costaron (el del operador más la evaluación de los hijos,
+    medidos con time.perf_counter). Tras cada generación la recompensa de cada operador usado es su
+    mejora por segundo, que se suaviza en 'credit' (tasa alpha); la probabilidad del operador con mayor
+    crédito se acerca a p_max y las demás a p_min (tasa beta), así ningún operador deja de probarse.
+    """
+    def __init__(self, operators, p_min=0.05, alpha=0.3, beta=0.3):
+        self.operators = list(operators)
+        k = len(self.operators)
+        self.p_min = min(p_min, 1.0 / k)
+        self.p_max = 1.0 - (k - 1) * self.p_min
+        self.alpha = alpha
+        self.beta = beta
+        self.probabilities = {op: 1.0 / k for op in self.operators}
+        self.credit = {op: 0.0 for op in self.operators}
+        self.uses = {op: 0 for op in self.operators}
+        self.improvements = {op: 0 for op in self.operators}
+        self.seconds = {op: 0.0 for op in self.operators}
+        self.gain = {op: 0.0 for op in self.operators}
+        # Mejora y tiempo acumulados en la generación en curso
+        self._pending = {}
+
+    def choose(self):
+        operator = random.choices(self.operators, weights=[self.probabilities[op] for op in self.operators])[0]
+        self.uses[operator] += 1
+        return operator
+
+    def record(self, operator, improvement, seconds):
+        gain, spent = self._pending.get(operator, (0.0, 0.0))
+        self._pending[operator] = (gain + improvement, spent + seconds)
+        self.seconds[operator] += seconds
+        self.gain[operator] += improvement
+        if improvement > 0:
+            self.improvements[operator] += 1
+
+    def update(self):
+        """Cierra una generación: actualiza créditos y probabilidades con lo registrado desde la anterior."""
+        for operator, (gain, spent) in self._pending.items():
+            reward = gain / spent if spent > 0 else 0.0
+            self.credit[operator] += self.alpha * (reward - self.credit[operator])
+        self._pending = {}
+        best = max(self.operators, key=self.credit.__getitem__)
+        if self.credit[best] <= 0:
+            return # Sin mejoras todavía: se mantienen las probabilidades
+        for operator in self.operators:
+            target = self.p_max if operator == best else self.p_min
+            self.probabilities[operator] += self.beta * (target - self.probabilities[operator])
+
+    def report(self):
+        return {op: {'uses': self.uses[op], 'improving': self.improvements[op], 'gain': round(float(self.gain[op]), 6),
+                     'cpu_ms': round(self.seconds[op] * 1000, 2), 'credit': round(float(self.credit[op]), 6),
+                     'probability': round(self.probabilities[op], 4)}
+                for op in self.operators}
+
+def find_best_order(df, stats=None, deadline_ms=None, target_fitness=None, on_generation=None, max_generations=200,
+                    adaptive_operators=True):
+    """
+    Ejecuta el algoritmo genético y devuelve el mejor orden de trabajos (posiciones de las filas del DataFrame).
+    Si se pasa un dict 'stats', se registran las generaciones completadas, las evaluaciones de fitness,
+    las evaluaciones por segundo y el motivo de parada.
+    - deadline_ms: tiempo máximo de búsqueda; se comprueba antes de cada evaluación y se devuelve el mejor orden encontrado.
+    - target_fitness: se detiene al alcanzar este fitness (en la escala de calculate_fitness).
+    - max_generations: límite de generaciones (None: sin límite, requiere deadline_ms o target_fitness).
+    - on_generation: se llama como on_generation(generacion, mejor_cromosoma, mejor_fitness) tras cada
+      generación; puede devolver un cromosoma que reemplaza a un hijo de la siguiente generación.
+    - adaptive_operators: elige los operadores de crossover y de mutación con un OperatorScheduler en lugar
+      de uniformemente; su uso y su crédito se añaden a stats['operators'].
     """
     # Preparar datos
     df['tiempo_horas'] = df.apply(
@@ -318,7 +382,7 @@ def optimize_genetic(df):
 
     # Parámetros adaptativos
     POPULATION_SIZE = min(100, max(50, len(df) * 2))
-    MAX_GENERATIONS = 200
+    MAX_GENERATIONS = max_generations
     BASE_MUTATION_RATE = 0.1
     NUM_PARENTS = POPULATION_SIZE // 2
     STAGNATION_LIMIT = 20  # Generaciones sin mejora
@@ -334,18 +398,56 @@ def optimize_genetic(df):
     stagnation_count = 0
     mutation_rate = BASE_MUTATION_RATE
     
-    # Cache para fitness
-    fitness_cache = {}
-    
-    for generation in range(MAX_GENERATIONS):
-        # Calcular fitness con cache
+    budget = SearchBudget(deadline_ms, target_fitness)
+    if MAX_GENERATIONS is None and not budget.is_bounded():
+        raise ValueError("max_generations=None requiere deadline_ms o target_fitness")
+    evaluations = 0
+    generations_done = 0
+
+    # Cache LRU de fitness indexada por el hash de 64 bits de cada orden
+    hasher = PermutationHasher(num_jobs)
+    fitness_cache = EvaluationCache()
+
+    # Operadores elegidos por un scheduler adaptativo o uniformemente (scheduler fijo, sin update)
+    crossover_scheduler = OperatorScheduler(CROSSOVER_OPERATORS)
+    mutation_scheduler = OperatorScheduler(MUTATION_OPERATORS)
+    # Origen de cada miembro de la población: None (inicial, élite o inyectado) o
+    # (crossover, mutación o None, fitness del mejor padre, segundos de crossover, segundos de mutación)
+    origins = [None] * len(population)
+    
+    while MAX_GENERATIONS is None or generations_done < MAX_GENERATIONS:
+        if generations_done and budget.expired():
+            break
+        # Calcular fitness con cache, comprobando el tiempo antes de cada miembro (aunque esté en cache)
         fitnesses = []
-        for chromosome in population:
-            key = tuple(chromosome)
-            if key not in fitness_cache:
-                fitness_cache[key] = calculate_fitness(chromosome, df, num_jobs)
-            fitnesses.append(fitness_cache[key])
-        
+        for chromosome, origin in zip(population, origins):
+            if (evaluations or fitnesses) and budget.expired():
+                break
+            key = hasher.hash(chromosome)
+            fitness = fitness_cache.get(key)
+            evaluation_seconds = 0.0
+            if fitness is None:
+                started = time.perf_counter()
+                fitness = calculate_fitness(chromosome, df, num_jobs)
+                evaluation_seconds = time.perf_counter() - started
+                fitness_cache.put(key, fitness)
+                evaluations += 1
+            fitnesses.append(fitness)
+            if origin is not None:
+                # La mejora del hijo se acredita a su crossover y a su mutación; la evaluación se reparte entre ambos
+                crossover_type, mutation_type, parent_fitness, crossover_seconds, mutation_seconds = origin
+                improvement = max(0.0, fitness - parent_fitness)
+                share = evaluation_seconds / (2 if mutation_type is not None else 1)
+                crossover_scheduler.record(crossover_type, improvement, crossover_seconds + share)
+                if mutation_type is not None:
+                    mutation_scheduler.record(mutation_type, improvement, mutation_seconds + share)
+
+        if not fitnesses:
+            break
+        if adaptive_operators:
+            crossover_scheduler.update()
+            mutation_scheduler.update()
+
         # Actualizar mejor solución
         current_best_fitness = max(fitnesses)
         current_best_chromosome = population[fitnesses.index(current_best_fitness)]
@@ -364,6 +466,14 @@ def optimize_genetic(df):
             stagnation_count = 0
         else:
             stagnation_count += 1
+
+        if len(fitnesses) < len(population): # Se alcanzó el deadline en mitad de la generación
+            break
+        generations_done += 1
+
+        injected = on_generation(generations_done, best_chromosome, best_fitness) if on_generation is not None else None
+        if budget.reached(best_fitness) or budget.expired():
+            break
         
         # Adaptación de parámetros
         if stagnation_count > STAGNATION_LIMIT:
@@ -373,7 +483,8 @@ def optimize_genetic(df):
             mutation_rate = max(0.05, mutation_rate * 0.99)  # Disminuir mutación
         
         # Criterio de parada temprana
-        if generation > 50 and stagnation_count > STAGNATION_LIMIT * 2:
+        if generations_done > 51 and stagnation_count > STAGNATION_LIMIT * 2:
+            budget.stop_reason = 'converged'
             break
         
         # Selección
@@ -388,24 +499,53 @@ def optimize_genetic(df):
         for idx in elite_indices:
             next_population.append(population[idx].copy())
         
-        # Generar descendencia
-        while len(next_population) < POPULATION_SIZE:
+        next_origins = [None] * len(next_population)
+        fitness_of = {id(chromosome): fitness for chromosome, fitness in zip(population, fitnesses)}
+
+        # Generar descendencia, cortando si se agota el tiempo (la mejor solución ya está guardada)
+        while len(next_population) < POPULATION_SIZE and not budget.expired():
             parent1, parent2 = random.sample(parents, 2)
-            child1, child2 = crossover(parent1, parent2)
-            
-            child1 = mutate(child1, mutation_rate)
-            child2 = mutate(child2, mutation_rate)
-            
-            next_population.append(child1)
-            if len(next_population) < POPULATION_SIZE:
-                next_population.append(child2)
-        
+            crossover_type = crossover_scheduler.choose()
+            started = time.perf_counter()
+            children = CROSSOVER_OPERATORS[crossover_type](parent1, parent2)
+            crossover_seconds = (time.perf_counter() - started) / 2
+            parent_fitness = max(fitness_of[id(parent1)], fitness_of[id(parent2)])
+
+            for child in children:
+                if len(next_population) >= POPULATION_SIZE:
+                    break
+                mutation_type, mutation_seconds = None, 0.0
+                if random.random() < mutation_rate:
+                    mutation_type = mutation_scheduler.choose()
+                    started = time.perf_counter()
+                    MUTATION_OPERATORS[mutation_type](child)
+                    mutation_seconds = time.perf_counter() - started
+                next_population.append(child)
+                next_origins.append((crossover_type, mutation_type, parent_fitness, crossover_seconds, mutation_seconds))
+        if budget.stop_reason is not None:
+            break
+
         population = next_population
-        
-        # Limitar tamaño del cache
-        if len(fitness_cache) > 1000:
-            fitness_cache.clear()
+        origins = next_origins
+        if injected is not None:
+            population[-1] = injected
+            origins[-1] = None
+
+    if stats is not None:
+        stats.update(budget.report(generations_done, evaluations))
+        stats['cache'] = fitness_cache.stats()
+        stats['operators'] = {'adaptive': adaptive_operators, 'crossover': crossover_scheduler.report(),
+                              'mutation': mutation_scheduler.report()}
     
+    return best_chromosome
+
+def optimize_genetic(df, stats=None):
+    """
+    Algoritmo genético mejorado optimizado para maximizar metros producidos.
+    Si se pasa un dict 'stats', se registran las generaciones y evaluaciones de fitness.
+    """
+    best_chromosome = find_best_order(df, stats)
+
     # Generar schedule final
     optimized_schedule_ga, makespan, unscheduled = assign_jobs_to_machines(df, best_chromosome)
     
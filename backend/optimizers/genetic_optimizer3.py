@@ -1,35 +1,60 @@
 import random
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
+
+import numpy as np
+
 from ..utils.setup_utils import get_setup_time
 from ..models.domain import Job, MachineSchedule
+from .bounds import machine_upper_bound
+from .campaign_optimizer import job_value
+from .evaluation_cache import EvaluationCache, PermutationHasher, mix64
+from .search_budget import SearchBudget
+from .sleeve_constraints import SleeveIndex
+
+# Population management: pairs and positions sampled to estimate diversity, attempts to find a
+# novel replacement for a duplicate, and share of the best members kept by a partial restart
+DIVERSITY_PAIRS = 20
+DIVERSITY_POSITIONS = 64
+REPLACEMENT_ATTEMPTS = 3
+RESTART_KEEP = 0.1
+# Slack (hours) when comparing the hours left on a machine with a job's least weight, against rounding
+HOURS_TOLERANCE = 1e-9
 
-def _assign_chromosome_to_machines(chromosome: List[Job], machine_names: List[str]) -> tuple[Dict[str, MachineSchedule], int]:
+def _assign_chromosome_to_machines(chromosome: List[Job], machine_templates: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None = None) -> tuple[Dict[str, MachineSchedule], int]:
     """
     Assigns a sequence of jobs (a chromosome) to fresh machine schedules to evaluate its fitness.
     This is a pure function used for evaluation inside the fitness calculation.
+    Jobs eligible for several machines (flexible assignment) go to the one where they finish first.
+    The templates provide each machine's initial state (start time, last print type, horizon end).
     """
-    # For each evaluation, we need a fresh set of machine schedules
-    temp_machine_schedules = {name: MachineSchedule(name) for name in machine_names}
+    # For each evaluation, we need a fresh set of machine schedules (and a fresh sleeve usage tracker)
+    sleeve_usage = sleeve_index.new_usage() if sleeve_index is not None else None
+    temp_machine_schedules = {name: template.fresh_copy(sleeve_usage) for name, template in machine_templates.items()}
     scheduled_job_indices = set()
 
     for job in chromosome:
-        machine = temp_machine_schedules[job.maquina_sugerida]
-        last_type = machine.get_last_impression_type()
-        setup_time = get_setup_time(last_type, job.tipo_de_impresion)
+        # Among the machines the job is eligible for, place it where it finishes first
+        best_machine, best_setup_time, best_end_time = None, 0.0, float('inf')
+        for machine_name in job.eligible_machines:
+            machine = temp_machine_schedules[machine_name]
+            setup_time = get_setup_time(machine.get_last_impression_type(), job.tipo_de_impresion)
+            end_time = machine.get_finish_time(job, setup_time)
+            if end_time is not None and end_time < best_end_time:
+                best_machine, best_setup_time, best_end_time = machine, setup_time, end_time
 
-        if machine.can_add_job(job, setup_time):
-            machine.add_job(job, setup_time)
+        if best_machine is not None:
+            best_machine.add_job(job, best_setup_time)
             scheduled_job_indices.add(job.original_index)
 
     unscheduled_count = len(chromosome) - len(scheduled_job_indices)
     return temp_machine_schedules, unscheduled_count
 
-def _calculate_fitness(chromosome: List[Job], machine_names: List[str]) -> float:
+def _calculate_fitness(chromosome: List[Job], machine_templates: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None = None) -> float:
     """
     Fitness function: Maximizes total meters produced and rewards finishing faster.
     Penalizes leaving jobs unscheduled.
     """
-    temp_schedules, unscheduled_count = _assign_chromosome_to_machines(chromosome, machine_names)
+    temp_schedules, unscheduled_count = _assign_chromosome_to_machines(chromosome, machine_templates, sleeve_index)
 
     total_meters_produced = sum(s.get_total_meters() for s in temp_schedules.values())
     makespan = max([s.get_current_time() for s in temp_schedules.values()] or [0])
@@ -53,14 +78,283 @@ def _calculate_fitness(chromosome: List[Job], machine_names: List[str]) -> float
     fitness = (total_meters_produced * time_bonus) + (total_criticality_scheduled * 10000) - penalty
     return max(0.0, fitness)
 
-def _initialize_population(pop_size: int, jobs: List[Job]) -> List[List[Job]]:
+class _OrderEvaluator:
+    """
+    Fitness of a job order, memoized under the 64-bit hash of the whole order.
+    Orders are given either as chromosomes of Job objects (key/fitness) or as arrays
+    of job positions in 'jobs' (key_positions/fitness_positions).
+
+    Callers that only need to know whether an order beats a threshold (the worst member in a
+    steady-state GA, the best insertion so far) pass it to fitness/fitness_positions, which then
+    return None without finishing the simulation once the order provably cannot exceed it.
+    Orders that beat the threshold get their exact fitness, so such callers decide exactly as before.
+    """
+    def __init__(self, jobs: List[Job], machine_templates: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None):
+        self.jobs = jobs
+        self.position = {id(job): i for i, job in enumerate(jobs)}
+        self.hasher = PermutationHasher(len(jobs))
+        self.machine_templates = machine_templates
+        self.sleeve_index = sleeve_index
+        # Value of every job and its least weight in hours on a machine that already has a print type:
+        # its duration plus the cheapest setup into its type from a real type
+        types = {job.tipo_de_impresion for job in jobs}
+        sources = (types | {template.initial_impression_type for template in machine_templates.values()}) - {None}
+        min_setup = {to_type: min(get_setup_time(from_type, to_type) for from_type in sources) for to_type in types}
+        self.values = np.array([job_value(job) for job in jobs], dtype=float)
+        self.weights = np.array([job.get_duration_hours() + min_setup[job.tipo_de_impresion] for job in jobs], dtype=float)
+        self.min_weight, self.max_density = _weight_limits(self.values, self.weights)
+        self.pruned = 0 # Rejected by the bound before simulating anything
+        self.abandoned = 0 # Simulations stopped once the threshold was out of reach
+
+    def positions(self, chromosome: List[Job]) -> np.ndarray:
+        return np.fromiter((self.position[id(job)] for job in chromosome), dtype=np.intp, count=len(chromosome))
+
+    def key(self, chromosome: List[Job]) -> int:
+        return self.key_positions(self.positions(chromosome))
+
+    def fitness(self, chromosome: List[Job], threshold: Optional[float] = None) -> float | None:
+        if threshold is not None:
+            return self._fitness_above(self.positions(chromosome), threshold)
+        return _calculate_fitness(chromosome, self.machine_templates, self.sleeve_index)
+
+    def key_positions(self, items: np.ndarray) -> int:
+        return self.hasher.hash(items)
+
+    def fitness_positions(self, items: np.ndarray, threshold: Optional[float] = None) -> float | None:
+        if threshold is not None:
+            return self._fitness_above(items, threshold)
+        return self.fitness([self.jobs[i] for i in items])
+
+    def _fitness_above(self, items: np.ndarray, threshold: float) -> float | None:
+        """
+        _calculate_fitness of the order (the same assignment as _assign_chromosome_to_machines), or None
+        as soon as it provably cannot exceed the threshold. Whenever a job is dropped, the jobs left can
+        add at most their value, and at most max_density per hour of _room_hours.
+        """
+        values = self.values[items].tolist()
+        remaining = sum(values)
+        if remaining <= threshold:
+            self.pruned += 1
+            return None
+        sleeve_usage = self.sleeve_index.new_usage() if self.sleeve_index is not None else None
+        machines = {name: template.fresh_copy(sleeve_usage) for name, template in self.machine_templates.items()}
+        score = 0.0
+        room = None # _room_hours, recomputed only after a placement
+        for position, value in zip(items.tolist(), values):
+            job = self.jobs[position]
+            remaining -= value
+            best_machine, best_setup_time, best_end_time = None, 0.0, float('inf')
+            for machine_name in job.eligible_machines:
+                machine = machines[machine_name]
+                setup_time = get_setup_time(machine.get_last_impression_type(), job.tipo_de_impresion)
+                end_time = machine.get_finish_time(job, setup_time)
+                if end_time is not None and end_time < best_end_time:
+                    best_machine, best_setup_time, best_end_time = machine, setup_time, end_time
+
+            if best_machine is not None:
+                best_machine.add_job(job, best_setup_time)
+                score += value
+                room = None
+                continue
+            if room is None:
+                room = _room_hours(machines.values(), self.min_weight)
+            if room < 0.0:
+                continue
+            if score + min(remaining, room * self.max_density) <= threshold:
+                self.abandoned += 1
+                return None
+            if room == 0.0: # No machine has room for any job left
+                break
+        return max(0.0, score)
+
+    def stats(self) -> dict:
+        return {'bounds': {'pruned': self.pruned, 'abandoned': self.abandoned}}
+
+class _CanonicalEvaluator(_OrderEvaluator):
+    """
+    Evaluator for separable instances, where every job has a single eligible machine and no tracked
+    sleeve set links the machines. There the schedule only depends on the order of the jobs within
+    each machine, not on how the machines interleave in the chromosome.
+
+    The chromosome is projected to its per-machine subsequences (a stable sort by machine) and each
+    subsequence is hashed, all in a few numpy calls whatever the number of machines. The XOR of those
+    hashes is a canonical key shared by all the interleavings, and every machine's result (meters +
+    weighted criticality) is cached on its own, so an offspring that only changes one machine
+    simulates only that machine.
+
+    Each machine's job set is fixed, so its optimistic score (bounds.machine_upper_bound) is computed once. The bound
+    of an order, O(machines), is the cached result of the machines already simulated plus the optimistic
+    score of the others: with a threshold, the order is pruned when it is not above it, and the machines
+    left are not simulated once the bound falls to the threshold. Every machine that is simulated is
+    simulated to the end, so its result is exact and cached.
+    """
+    def __init__(self, jobs: List[Job], machine_templates: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None):
+        super().__init__(jobs, machine_templates, sleeve_index)
+        self.machine_names = list(machine_templates)
+        machine_pos = {name: i for i, name in enumerate(self.machine_names)}
+        # Machine of every job position; -1 for jobs that no machine can run
+        self.machine_code = np.array([machine_pos[job.eligible_machines[0]] if job.eligible_machines else -1 for job in jobs],
+                                     dtype=np.intp)
+        self.machine_cache = EvaluationCache()
+        self.machine_simulations = 0
+        self._projection = None
+        machine_jobs = [[] for _ in self.machine_names]
+        for job, code in zip(jobs, self.machine_code.tolist()):
+            if code >= 0:
+                machine_jobs[code].append(job)
+        self.machine_bounds = [machine_upper_bound(machine_templates[name], machine_jobs[code])
+                               for code, name in enumerate(self.machine_names)]
+        self.min_weights = [float(self.weights[self.machine_code == code].min(initial=np.inf))
+                            for code in range(len(self.machine_names))]
+
+    @staticmethod
+    def applies(jobs: List[Job], sleeve_index: SleeveIndex | None) -> bool:
+        if any(len(job.eligible_machines) > 1 for job in jobs):
+            return False
+        # With a single machine there are no interleavings to factor out
+        if len({job.eligible_machines for job in jobs if job.eligible_machines}) < 2:
+            return False
+        return sleeve_index is None or not any(sleeve_index.is_tracked(job.development) for job in jobs)
+
+    def key_positions(self, items: np.ndarray) -> int:
+        codes = self.machine_code[items]
+        keep = codes >= 0
+        items, codes = items[keep], codes[keep]
+        if not len(items):
+            self._projection = None
+            return 0
+
+        by_machine = np.argsort(codes, kind='stable')
+        items, codes = items[by_machine], codes[by_machine]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(items)]
+        local_positions = np.arange(len(items)) - np.repeat(starts, ends - starts)
+        terms = mix64(self.hasher.position_keys[local_positions] ^ self.hasher.item_keys[items])
+        machine_keys = np.bitwise_xor.reduceat(terms, starts)
+
+        self._projection = (items, codes, starts, ends, machine_keys)
+        return int(np.bitwise_xor.reduce(machine_keys))
+
+    def fitness(self, chromosome: List[Job], threshold: Optional[float] = None) -> float | None:
+        """Must be called right after key() on the same chromosome, whose projection it reuses."""
+        return self.fitness_positions(None, threshold)
+
+    def fitness_positions(self, items: np.ndarray, threshold: Optional[float] = None) -> float | None:
+        """Must be called right after key_positions() on the same order, whose projection it reuses."""
+        if self._projection is None:
+            return 0.0 if threshold is None or threshold < 0.0 else None
+        items, codes, starts, ends, machine_keys = self._projection
+        total = 0.0
+        optimistic = 0.0
+        pending = []
+        for start, end, machine_key in zip(starts.tolist(), ends.tolist(), machine_keys.tolist()):
+            value = self.machine_cache.get(machine_key)
+            if value is None:
+                pending.append((start, end, machine_key))
+                optimistic += self.machine_bounds[codes[start]]
+            else:
+                total += value
+
+        for index, (start, end, machine_key) in enumerate(pending):
+            # Stop before simulating the machines left once even their optimistic score is not enough
+            if threshold is not None and total + optimistic <= threshold:
+                if index:
+                    self.abandoned += 1
+                else:
+                    self.pruned += 1
+                return None
+            code = codes[start]
+            optimistic -= self.machine_bounds[code]
+            value = _simulate_machine(self.machine_templates[self.machine_names[code]], [self.jobs[i] for i in items[start:end]],
+                                      self.min_weights[code])
+            self.machine_cache.put(machine_key, value)
+            self.machine_simulations += 1
+            total += value
+        return max(0.0, total)
+
+    def stats(self) -> dict:
+        return {'machine_cache': self.machine_cache.stats(), 'machine_simulations': self.machine_simulations,
+                'bounds': {'pruned': self.pruned, 'abandoned': self.abandoned}}
+
+def create_evaluator(jobs: List[Job], machine_templates: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None = None,
+                     canonical: bool = True) -> _OrderEvaluator:
+    """The canonical per-machine evaluator when the instance is separable, the whole-order one otherwise."""
+    if canonical and _CanonicalEvaluator.applies(jobs, sleeve_index):
+        return _CanonicalEvaluator(jobs, machine_templates, sleeve_index)
+    return _OrderEvaluator(jobs, machine_templates, sleeve_index)
+
+def _weight_limits(values: np.ndarray, weights: np.ndarray) -> tuple[float, float]:
+    """Smallest least weight (hours) and best value per hour among some jobs (see _OrderEvaluator)."""
+    if not len(weights):
+        return float('inf'), 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        density = np.where(weights > 0, values / weights, np.inf)
+    return float(weights.min()), float(density.max())
+
+def _hours_left(machine: MachineSchedule) -> float:
+    """Working hours between the machine's current time and its horizon end, after its calendar."""
+    if machine.calendar is not None:
+        return machine.calendar.available_hours(machine.current_time_hours, machine.horizon_end)
+    return max(0.0, machine.horizon_end - machine.current_time_hours)
+
+def _room_hours(machines, min_weight: float) -> float:
+    """
+    Hours left on the machines that still have room for a job of min_weight (0.0 if none has).
+    The least weights assume a setup from a real print type, so while a machine has none there
+    is no such bound and it returns -1.0.
+    """
+    hours = 0.0
+    for machine in machines:
+        if machine.get_last_impression_type() is None:
+            return -1.0
+        machine_hours = _hours_left(machine)
+        if machine_hours + HOURS_TOLERANCE >= min_weight:
+            hours += machine_hours
+    return hours
+
+def _simulate_machine(machine_template: MachineSchedule, jobs: List[Job], min_weight: Optional[float] = None) -> float:
+    """
+    Places the jobs of one machine in order, as _assign_chromosome_to_machines does, and scores them.
+    With the smallest least weight of the jobs (see _OrderEvaluator), it stops once the machine has
+    fewer hours left: no later job can fit, so the score is already final.
+    """
+    machine = machine_template.fresh_copy()
+    score = 0.0
+    for job in jobs:
+        setup_time = get_setup_time(machine.get_last_impression_type(), job.tipo_de_impresion)
+        if machine.get_finish_time(job, setup_time) is not None:
+            machine.add_job(job, setup_time)
+            score += job.metros_requeridos + job.nivel_de_criticidad * 10000
+        elif min_weight is not None and machine.get_last_impression_type() is not None and _hours_left(machine) + HOURS_TOLERANCE < min_weight:
+            break
+    return score
+
+def schedule_score(machine_schedules: Dict[str, MachineSchedule]) -> float:
+    """Quality of a finished schedule on the same scale as the fitness: meters plus weighted criticality."""
+    return sum(item['job_object'].metros_requeridos + item['job_object'].nivel_de_criticidad * 10000
+               for schedule in machine_schedules.values() for item in schedule.jobs)
+
+def _initialize_population(pop_size: int, jobs: List[Job], initial_chromosome: Optional[List[Job]] = None,
+                           seed_chromosomes: Optional[List[List[Job]]] = None) -> List[List[Job]]:
     """
     Initializes the population with a mix of random and heuristic-based solutions.
+    With an initial_chromosome (warm start) the population is that chromosome and single-swap
+    variations of it, so the search stays close to the given sequence.
+    seed_chromosomes (e.g. the order of another engine's schedule) replace the first random members.
     """
-    population = []
-    
+    if initial_chromosome is not None:
+        population = [list(initial_chromosome)]
+        for _ in range(pop_size - 1):
+            variation = list(initial_chromosome)
+            idx1, idx2 = random.sample(range(len(jobs)), 2)
+            variation[idx1], variation[idx2] = variation[idx2], variation[idx1]
+            population.append(variation)
+        return population
+
+    population = [list(seed) for seed in (seed_chromosomes or [])[:pop_size]]
+
     # 50% of population is purely random
-    for _ in range(pop_size // 2):
+    for _ in range(pop_size // 2 - len(population)):
         chromosome = random.sample(jobs, len(jobs))
         population.append(chromosome)
     
@@ -116,6 +410,63 @@ def _crossover(parent1: List[Job], parent2: List[Job]) -> tuple[List[Job], List[
             
     return child1, child2
 
+def _fresh_individual(jobs: List[Job], heuristic_chromosome: List[Job]) -> List[Job]:
+    """A new member as in _initialize_population: a random order or a few swaps of the criticality heuristic."""
+    if random.random() < 0.5 or len(jobs) < 2:
+        return random.sample(jobs, len(jobs))
+    chromosome = heuristic_chromosome[:]
+    for _ in range(random.randint(1, max(1, len(jobs) // 10))):
+        idx1, idx2 = random.sample(range(len(jobs)), 2)
+        chromosome[idx1], chromosome[idx2] = chromosome[idx2], chromosome[idx1]
+    return chromosome
+
+def _replace_duplicates(population: List[List[Job]], evaluator: '_OrderEvaluator', cache: EvaluationCache, jobs: List[Job],
+                        heuristic_chromosome: List[Job], protected: set) -> tuple[int, int]:
+    """
+    Replaces, in place, the members that would not need an evaluation: copies of an earlier member of
+    the population and orders already evaluated in earlier generations (found by their hash). Members
+    whose index is in 'protected' (the elite, an injected order) are kept. Each stale member gets up to
+    REPLACEMENT_ATTEMPTS candidates until a novel one is found: first itself with one random swap, which
+    keeps what selection found, then fresh heuristic or random individuals.
+    Returns the number of stale members before and after the replacement.
+    """
+    seen = set()
+    before = after = 0
+    for i, chromosome in enumerate(population):
+        key = evaluator.key(chromosome)
+        if i not in protected and (key in seen or key in cache):
+            before += 1
+            for attempt in range(REPLACEMENT_ATTEMPTS):
+                if attempt == 0 and len(chromosome) >= 2:
+                    candidate = chromosome[:]
+                    idx1, idx2 = random.sample(range(len(candidate)), 2)
+                    candidate[idx1], candidate[idx2] = candidate[idx2], candidate[idx1]
+                else:
+                    candidate = _fresh_individual(jobs, heuristic_chromosome)
+                candidate_key = evaluator.key(candidate)
+                if candidate_key not in seen and candidate_key not in cache:
+                    population[i], key = candidate, candidate_key
+                    break
+            else:
+                after += 1
+        seen.add(key)
+    return before, after
+
+def _sample_diversity(population: List[List[Job]]) -> float:
+    """
+    Cheap diversity estimate: mean position-wise Hamming distance (0 = identical, 1 = no position in common)
+    between DIVERSITY_PAIRS random pairs of members, over DIVERSITY_POSITIONS random positions.
+    """
+    size = len(population[0]) if population else 0
+    if len(population) < 2 or size < 2:
+        return 1.0
+    positions = random.sample(range(size), min(DIVERSITY_POSITIONS, size))
+    differing = 0
+    for _ in range(DIVERSITY_PAIRS):
+        a, b = random.sample(population, 2)
+        differing += sum(a[i] is not b[i] for i in positions)
+    return differing / (DIVERSITY_PAIRS * len(positions))
+
 def _mutate(chromosome: List[Job], mutation_rate: float) -> List[Job]:
     """Applies a simple swap mutation to a chromosome."""
     if random.random() < mutation_rate:
@@ -123,53 +474,154 @@ def _mutate(chromosome: List[Job], mutation_rate: float) -> List[Job]:
         chromosome[idx1], chromosome[idx2] = chromosome[idx2], chromosome[idx1]
     return chromosome
 
-def optimize_genetic(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule]):
+def optimize_genetic(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None = None,
+                     stats: Optional[dict] = None, population_size: int = 100, num_generations: Optional[int] = 100,
+                     mutation_rate: float = 0.1, num_parents: int = 20, deadline_ms: Optional[float] = None,
+                     target_fitness: Optional[float] = None, on_generation: Optional[Callable] = None,
+                     canonical: bool = True, initial_chromosome: Optional[List[Job]] = None,
+                     seed_chromosomes: Optional[List[List[Job]]] = None, deduplicate: bool = True,
+                     diversity_threshold: Optional[float] = 0.5):
     """
     Main genetic algorithm function.
-    Operates on domain objects.
+    Operates on domain objects. If a sleeve_index is given, every evaluation honors
+    sleeve compatibility and forbids using the same sleeve set on two machines at once.
+    If a stats dict is given, it receives the generations completed, the fitness evaluations,
+    the evaluations per second, why the search stopped and the hit rate of the evaluation cache.
+    Fitness values are memoized by a 64-bit hash of the job order, so elites and repeated
+    offspring are not simulated again. On separable instances (canonical=True, see _CanonicalEvaluator)
+    the key ignores how machines interleave and each machine's result is cached on its own.
+
+    It is an anytime search: it stops after num_generations (None for no limit), when deadline_ms
+    have elapsed (checked before every evaluation) or when the best fitness reaches target_fitness,
+    and always returns the best chromosome evaluated so far.
+
+    - on_generation: called as on_generation(generation, best_chromosome, best_fitness) after each
+      generation; it may return a chromosome that replaces one child of the next generation.
+    - initial_chromosome: warm start; the population starts from this order of 'jobs' instead of random orders.
+    - seed_chromosomes: heuristic orders of 'jobs' (e.g. campaign_optimizer.schedule_order) included in the
+      initial population, which is otherwise built as usual.
+    - deduplicate: before each generation is evaluated, members that are copies of another member or
+      orders evaluated before are replaced by fresh individuals (see _replace_duplicates), so the
+      evaluations go to novel orders. stats['wasted_evaluations'] gives the share of such members
+      before and after the replacement.
+    - diversity_threshold: when the sampled diversity of a generation (_sample_diversity) falls below it,
+      the next generation is a partial restart: the best RESTART_KEEP of the members plus fresh individuals.
+      None disables the restarts.
     """
     # GA Parameters
-    POPULATION_SIZE = 100
-    NUM_GENERATIONS = 100
-    MUTATION_RATE = 0.1
-    NUM_PARENTS = 20
+    POPULATION_SIZE = population_size
+    NUM_GENERATIONS = num_generations
+    MUTATION_RATE = mutation_rate
+    NUM_PARENTS = num_parents
+
+    budget = SearchBudget(deadline_ms, target_fitness)
+    if NUM_GENERATIONS is None and not budget.is_bounded():
+        raise ValueError("num_generations=None requires a deadline or a target fitness")
 
-    machine_names = list(machine_schedules.keys())
+    # With fewer than two jobs there is no order to optimize
+    if len(jobs) < 2:
+        NUM_GENERATIONS = 0
 
     # Initialization
-    population = _initialize_population(POPULATION_SIZE, jobs)
-    best_chromosome = None
+    population = _initialize_population(POPULATION_SIZE, jobs, initial_chromosome, seed_chromosomes) if NUM_GENERATIONS != 0 else [list(initial_chromosome or jobs)]
+    best_chromosome = population[0]
     best_fitness = -1.0
+    evaluations = 0
+    generations_done = 0
 
-    # Main GA Loop
-    for _ in range(NUM_GENERATIONS):
-        fitnesses = [_calculate_fitness(chromo, machine_names) for chromo in population]
+    evaluator = create_evaluator(jobs, machine_schedules, sleeve_index, canonical)
+    cache = EvaluationCache()
+    heuristic_chromosome = sorted(jobs, key=lambda j: j.nivel_de_criticidad, reverse=True)
+    protected = {0} # Members never replaced as duplicates: the elite and an injected order
+    stale_before = stale_after = members_checked = duplicates_replaced = restarts = 0
+    diversity = 1.0
 
-        current_best_idx = max(range(len(fitnesses)), key=fitnesses.__getitem__)
-        if fitnesses[current_best_idx] > best_fitness:
-            best_fitness = fitnesses[current_best_idx]
-            best_chromosome = population[current_best_idx]
+    # Main GA Loop. The deadline is checked at the top of every generation, before every member (cached
+    # or not) and while breeding, so a run of cache hits or slow breeding cannot overrun it
+    while NUM_GENERATIONS is None or generations_done < NUM_GENERATIONS:
+        if generations_done and budget.expired():
+            break
+        if deduplicate and NUM_GENERATIONS != 0:
+            before, after = _replace_duplicates(population, evaluator, cache, jobs, heuristic_chromosome,
+                                                protected if generations_done else set())
+            stale_before += before
+            stale_after += after
+            duplicates_replaced += before - after
+            members_checked += len(population)
+
+        fitnesses = []
+        for chromo in population:
+            if (evaluations or fitnesses) and budget.expired():
+                break
+            key = evaluator.key(chromo)
+            fitness = cache.get(key)
+            if fitness is None:
+                fitness = evaluator.fitness(chromo)
+                cache.put(key, fitness)
+                evaluations += 1
+            fitnesses.append(fitness)
+
+        if fitnesses:
+            current_best_idx = max(range(len(fitnesses)), key=fitnesses.__getitem__)
+            if fitnesses[current_best_idx] > best_fitness:
+                best_fitness = fitnesses[current_best_idx]
+                best_chromosome = population[current_best_idx]
+
+        if len(fitnesses) < len(population): # Deadline reached in the middle of the generation
+            break
+        generations_done += 1
+
+        injected = on_generation(generations_done, best_chromosome, best_fitness) if on_generation is not None else None
+        if budget.reached(best_fitness) or budget.expired():
+            break
+
+        next_population = [list(best_chromosome)] # Elitism (a copy, so no operator can touch the best order)
+
+        diversity = _sample_diversity(population)
+        if diversity_threshold is not None and diversity < diversity_threshold:
+            # Diversity collapsed: keep the best members and refill with fresh individuals
+            restarts += 1
+            ranked = sorted(range(len(population)), key=fitnesses.__getitem__, reverse=True)
+            next_population += [list(population[i]) for i in ranked[1:max(1, int(POPULATION_SIZE * RESTART_KEEP))]]
+            while len(next_population) < POPULATION_SIZE:
+                next_population.append(_fresh_individual(jobs, heuristic_chromosome))
+        else:
+            parents = _selection(population, fitnesses, NUM_PARENTS)
+            while len(next_population) < POPULATION_SIZE and not budget.expired():
+                p1, p2 = random.sample(parents, 2)
+                c1, c2 = _crossover(p1, p2)
+                next_population.append(_mutate(c1, MUTATION_RATE))
+                if len(next_population) < POPULATION_SIZE:
+                    next_population.append(_mutate(c2, MUTATION_RATE))
+        if budget.stop_reason is not None: # Expired while breeding: the best order is already kept
+            break
 
-        parents = _selection(population, fitnesses, NUM_PARENTS)
-        
-        next_population = [best_chromosome] # Elitism
-
-        while len(next_population) < POPULATION_SIZE:
-            p1, p2 = random.sample(parents, 2)
-            c1, c2 = _crossover(p1, p2)
-            next_population.append(_mutate(c1, MUTATION_RATE))
-            if len(next_population) < POPULATION_SIZE:
-                next_population.append(_mutate(c2, MUTATION_RATE))
-        
         population = next_population
+        protected = {0}
+        if injected is not None:
+            population[-1] = injected
+            protected.add(len(population) - 1)
 
     # Once the best order is found, populate the final machine_schedules object
-    final_schedules, unscheduled_count = _assign_chromosome_to_machines(best_chromosome, machine_names)
+    final_schedules, unscheduled_count = _assign_chromosome_to_machines(best_chromosome, machine_schedules, sleeve_index)
     
+    if stats is not None:
+        stats.update(budget.report(generations_done, evaluations))
+        stats['cache'] = cache.stats()
+        stats.update(evaluator.stats())
+        if deduplicate:
+            stats['wasted_evaluations'] = {
+                'before': round(stale_before / members_checked, 4) if members_checked else 0.0,
+                'after': round(stale_after / members_checked, 4) if members_checked else 0.0,
+                'replaced': duplicates_replaced,
+            }
+        stats['diversity'] = round(diversity, 4)
+        stats['restarts'] = restarts
+
     # Transfer the results to the original machine_schedules objects
     for name, schedule in final_schedules.items():
         machine_schedules[name].jobs = schedule.jobs
         machine_schedules[name].current_time_hours = schedule.current_time_hours
         machine_schedules[name].last_impression_type = schedule.last_impression_type
 
-    return unscheduled_count
\ No newline at end of file
+    return unscheduled_count
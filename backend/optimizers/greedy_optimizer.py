@@ -1,16 +1,30 @@
 import random
-from typing import List, Dict
+from typing import List, Dict, Optional
 from ..utils.setup_utils import get_setup_time
 from ..models.domain import Job, MachineSchedule
+from .search_budget import SearchBudget
 
-def optimize_greedy(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule]):
+def optimize_greedy(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule], flexible: bool = False, stats: Optional[dict] = None,
+                    deadline_ms: Optional[float] = None):
+    """
+    Schedules the most critical job that fits, breaking ties by the shortest job + setup.
+    In flexible mode jobs may go to any of their eligible machines and ties are broken by
+    the earliest finish time, so the load spreads over idle machines.
+    If a stats dict is given, it receives the number of placement evaluations.
+    If deadline_ms elapse, it stops placing jobs and the remaining ones are left unscheduled
+    (stats['deadline_reached'] tells such a partial schedule apart).
+    """
     print(f"DEBUG: optimize_greedy started. Total jobs: {len(jobs)}, Machines: {len(machine_schedules)}")
 
     scheduled_job_indices = set()
     candidate_jobs = {job.original_index: job for job in jobs}
 
+    budget = SearchBudget(deadline_ms)
     iteration = 0
+    evaluations = 0
     while len(scheduled_job_indices) < len(jobs):
+        if budget.expired():
+            break
         iteration += 1
         print(f"\nDEBUG: Iteration {iteration}. Candidate jobs remaining: {len(candidate_jobs)}")
 
@@ -24,14 +38,16 @@ def optimize_greedy(jobs: List[Job], machine_schedules: Dict[str, MachineSchedul
             print(f"DEBUG:   Checking machine {machine_name}. Last type: {last_type}, Current time: {machine.get_current_time()}")
 
             for job_idx, job in candidate_jobs.items():
-                if job.maquina_sugerida != machine_name: # Only consider jobs for this machine
+                if machine_name not in job.eligible_machines: # Only consider jobs this machine can run
                     continue
 
                 setup_time = get_setup_time(last_type, job.tipo_de_impresion)
+                end_time = machine.get_finish_time(job, setup_time)
+                evaluations += 1
                 job_duration = job.get_duration_hours()
-                total_duration = job_duration + setup_time
+                total_duration = end_time if flexible else job_duration + setup_time
 
-                if machine.can_add_job(job, setup_time):
+                if end_time is not None:
                     # Greedy criteria: prioritize by criticality, then by total duration (job + setup)
                     if best_job_to_schedule is None or \
                        job.nivel_de_criticidad > best_job_to_schedule.nivel_de_criticidad or \
@@ -61,5 +77,10 @@ def optimize_greedy(jobs: List[Job], machine_schedules: Dict[str, MachineSchedul
             break
 
     unscheduled_jobs_count = len(jobs) - len(scheduled_job_indices)
+    if stats is not None:
+        stats['evaluations'] = evaluations
+        stats['iterations'] = iteration
+        stats['stop_reason'] = budget.stop_reason or 'completed'
+        stats['deadline_reached'] = budget.stop_reason == 'deadline'
     print(f"DEBUG: optimize_greedy finished. Unscheduled jobs: {unscheduled_jobs_count}")
     return unscheduled_jobs_count
\ No newline at end of file
@@ -0,0 +1,200 @@
+import random
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..models.domain import Job, MachineSchedule
+from .evaluation_cache import EvaluationCache, PermutationHasher
+from .genetic_optimizer3 import _assign_chromosome_to_machines
+from .search_budget import SearchBudget
+from .sleeve_constraints import SleeveIndex
+from .steady_state_ga import _order_crossover
+
+# Objectives of a schedule, in the order of the objective vectors
+OBJECTIVES = ('meters', 'setup_hours', 'makespan', 'criticality')
+# +1 for objectives to maximize, -1 for objectives to minimize
+OBJECTIVE_SENSE = np.array([1.0, -1.0, -1.0, 1.0])
+
+def schedule_objectives(machine_schedules: Dict[str, MachineSchedule]) -> np.ndarray:
+    """Meters scheduled, total setup hours, makespan and criticality covered by a schedule."""
+    items = [item for schedule in machine_schedules.values() for item in schedule.jobs]
+    return np.array([
+        sum(item['job_object'].metros_requeridos for item in items),
+        sum(item['setup_time'] for item in items),
+        max([schedule.get_current_time() for schedule in machine_schedules.values()] or [0]),
+        sum(item['job_object'].nivel_de_criticidad for item in items),
+    ], dtype=float)
+
+def non_dominated_sort(objectives: np.ndarray) -> np.ndarray:
+    """
+    Fast non-dominated sort of an (N x M) matrix of objectives to maximize. Returns the front
+    of every row (0 for the non-dominated ones).
+
+    The N x N dominance matrix is built in one broadcast, O(M N^2). Fronts are then peeled off
+    by subtracting the rows of each front from the domination counters, so every row is
+    subtracted once: O(N^2) in total, whatever the number of fronts.
+    """
+    n = len(objectives)
+    ranks = np.full(n, -1, dtype=np.intp)
+    if not n:
+        return ranks
+    at_least = (objectives[:, None, :] >= objectives[None, :, :]).all(axis=2)
+    better = (objectives[:, None, :] > objectives[None, :, :]).any(axis=2)
+    dominates = at_least & better # dominates[i, j]: row i dominates row j
+    dominated_count = dominates.sum(axis=0)
+
+    front = np.flatnonzero(dominated_count == 0)
+    rank = 0
+    while len(front):
+        ranks[front] = rank
+        dominated_count = dominated_count - dominates[front].sum(axis=0)
+        dominated_count[front] = -1 # Already ranked
+        front = np.flatnonzero(dominated_count == 0)
+        rank += 1
+    return ranks
+
+def crowding_distance(objectives: np.ndarray) -> np.ndarray:
+    """Crowding distance of every row of one front, vectorized over all the objectives at once."""
+    n, m = objectives.shape
+    if n <= 2:
+        return np.full(n, np.inf)
+    order = np.argsort(objectives, axis=0, kind='stable')
+    sorted_values = np.take_along_axis(objectives, order, axis=0)
+    span = sorted_values[-1] - sorted_values[0]
+    span[span == 0] = 1.0 # A constant objective does not separate the points
+
+    gaps = np.empty((n, m))
+    gaps[1:-1] = (sorted_values[2:] - sorted_values[:-2]) / span
+    gaps[[0, -1]] = np.inf # The extremes of every objective are always kept
+
+    distance = np.zeros(n)
+    np.add.at(distance, order.ravel(), gaps.ravel())
+    return distance
+
+def _rank_and_crowd(objectives: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    ranks = non_dominated_sort(objectives)
+    crowding = np.zeros(len(objectives))
+    for rank in range(ranks.max() + 1 if len(ranks) else 0):
+        front = np.flatnonzero(ranks == rank)
+        crowding[front] = crowding_distance(objectives[front])
+    return ranks, crowding
+
+def _select_survivors(objectives: np.ndarray, size: int) -> np.ndarray:
+    """NSGA-II environmental selection: whole fronts first, the last one truncated by crowding distance."""
+    ranks, crowding = _rank_and_crowd(objectives)
+    # Lower rank first, then larger crowding distance
+    return np.lexsort((-crowding, ranks))[:size]
+
+def optimize_nsga2(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None = None,
+                   stats: Optional[dict] = None, population_size: int = 100, num_generations: Optional[int] = 100,
+                   mutation_rate: float = 0.1, deadline_ms: Optional[float] = None) -> List[dict]:
+    """
+    Multi-objective variant of the genetic algorithm (NSGA-II): instead of a single weighted fitness
+    it keeps the trade-off between meters scheduled, setup hours, makespan and criticality covered.
+
+    It uses the encoding, initialization and operators of genetic_optimizer3 on arrays of job
+    positions. Parents are picked by binary tournament on (front, crowding distance) and every
+    generation keeps the best population_size of parents + offspring by non-dominated sorting.
+    It stops after num_generations (None for no limit) or when deadline_ms have elapsed.
+
+    Returns the Pareto front of the final population, one point per distinct objective vector,
+    sorted by score (meters + criticality x 10000, as the single-objective GA) and then by fewer
+    setup hours. Every point is a dict with the job 'order' (positions in 'jobs'), its 'objectives'
+    and its 'unscheduled_jobs'. machine_schedules is only used as the template of the machines.
+    """
+    budget = SearchBudget(deadline_ms)
+    if num_generations is None and not budget.is_bounded():
+        raise ValueError("num_generations=None requires a deadline")
+
+    num_jobs = len(jobs)
+    population_size = max(population_size, 2)
+    hasher = PermutationHasher(num_jobs)
+    cache = EvaluationCache()
+    evaluations = 0
+
+    def evaluate(order: np.ndarray) -> tuple:
+        nonlocal evaluations
+        key = hasher.hash(order)
+        result = cache.get(key)
+        if result is None:
+            schedules, unscheduled = _assign_chromosome_to_machines([jobs[i] for i in order], machine_schedules, sleeve_index)
+            result = (schedule_objectives(schedules), unscheduled)
+            cache.put(key, result)
+            evaluations += 1
+        return result
+
+    # Initialization as in genetic_optimizer3: half random orders, half variations of the criticality order
+    rng = np.random.default_rng(random.getrandbits(63))
+    heuristic = np.argsort([-job.nivel_de_criticidad for job in jobs], kind='stable')
+    orders = []
+    for i in range(population_size if num_jobs >= 2 else 1):
+        if num_jobs < 2:
+            order = np.arange(num_jobs)
+        elif i < population_size // 2:
+            order = rng.permutation(num_jobs)
+        else:
+            order = heuristic.copy()
+            a, b = random.sample(range(num_jobs), 2)
+            order[a], order[b] = order[b], order[a]
+        if orders and budget.expired():
+            break
+        orders.append(order)
+    population = np.array(orders, dtype=np.intp).reshape(len(orders), num_jobs)
+    results = [evaluate(order) for order in population]
+
+    generations = 0
+    taken = np.empty(num_jobs, dtype=bool)
+    running = num_jobs >= 2 and budget.stop_reason is None
+    while running and (num_generations is None or generations < num_generations):
+        objectives = np.array([r[0] for r in results]) * OBJECTIVE_SENSE
+        ranks, crowding = _rank_and_crowd(objectives)
+
+        def tournament() -> int:
+            a, b = random.randrange(len(population)), random.randrange(len(population))
+            if ranks[a] != ranks[b]:
+                return a if ranks[a] < ranks[b] else b
+            return a if crowding[a] >= crowding[b] else b
+
+        offspring = np.empty_like(population)
+        offspring_results = []
+        for k in range(len(population)):
+            if budget.expired():
+                running = False
+                break
+            start, end = sorted(random.sample(range(num_jobs), 2))
+            _order_crossover(population[tournament()], population[tournament()], start, end, offspring[k], taken)
+            if random.random() < mutation_rate:
+                a, b = random.sample(range(num_jobs), 2)
+                offspring[k, a], offspring[k, b] = offspring[k, b], offspring[k, a]
+            offspring_results.append(evaluate(offspring[k]))
+
+        combined = np.concatenate([population, offspring[:len(offspring_results)]])
+        combined_results = results + offspring_results
+        survivors = _select_survivors(np.array([r[0] for r in combined_results]) * OBJECTIVE_SENSE, len(population))
+        population = combined[survivors]
+        results = [combined_results[i] for i in survivors]
+        if running:
+            generations += 1
+
+    # Pareto front of the final population, without repeated objective vectors
+    objectives = np.array([r[0] for r in results])
+    ranks = non_dominated_sort(objectives * OBJECTIVE_SENSE)
+    front = {}
+    for i in np.flatnonzero(ranks == 0):
+        front.setdefault(tuple(objectives[i]), i)
+    points = []
+    for values, i in front.items():
+        point_objectives = dict(zip(OBJECTIVES, values))
+        points.append({
+            'order': population[i].tolist(),
+            'objectives': {name: round(value, 2) for name, value in point_objectives.items()},
+            'unscheduled_jobs': results[i][1],
+            'score': point_objectives['meters'] + point_objectives['criticality'] * 10000,
+        })
+    points.sort(key=lambda p: (-p['score'], p['objectives']['setup_hours']))
+
+    if stats is not None:
+        stats.update(budget.report(generations, evaluations))
+        stats['cache'] = cache.stats()
+        stats['front_size'] = len(points)
+    return points
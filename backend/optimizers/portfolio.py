@@ -0,0 +1,261 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.domain import MachineSchedule
+from ..models.instance import ProblemInstance
+from ..models.shared_instance import SharedInstance, SharedInstanceHandle, attach_instance
+from . import genetic_optimizer2
+from .campaign_optimizer import optimize_campaigns, schedule_order
+from .genetic_optimizer3 import _assign_chromosome_to_machines, optimize_genetic, schedule_score
+from .greedy_optimizer import optimize_greedy
+from .search_budget import set_stop_flag
+
+DEFAULT_TIME_BUDGET_MS = 2000
+# Extra time given to the engines to decode and send back their result when the deadline expires
+DEADLINE_GRACE_S = 0.5
+# Worker start method: a fork of the multi-threaded server process could inherit locks held by its
+# other threads, so the workers are forked from a clean server process that preloads this module
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+class SharedIncumbent:
+    """
+    Best job order found so far by any engine of the race, kept in shared memory:
+    its score, a version counter and the order as positions in instance.jobs, plus the flag
+    with which the parent stops every engine (their SearchBudget expires, see set_stop_flag).
+    """
+    def __init__(self, num_jobs: int, ctx):
+        self.score = ctx.Value('d', -1.0)
+        self.version = ctx.RawValue('i', 0)
+        self.order = ctx.RawArray('i', num_jobs)
+        self.stopped = ctx.RawValue('b', 0)
+
+    def stop(self):
+        self.stopped.value = 1
+
+    def publish(self, score: float, order: List[int]) -> bool:
+        with self.score.get_lock():
+            if score <= self.score.value:
+                return False
+            self.score.value = score
+            self.order[:] = order
+            self.version.value += 1
+        return True
+
+    def fetch(self, seen_version: int) -> Optional[Tuple[int, float, List[int]]]:
+        """Returns (version, score, order) if the incumbent changed since 'seen_version', None otherwise."""
+        if self.version.value == seen_version: # Cheap check without taking the lock
+            return None
+        with self.score.get_lock():
+            return self.version.value, self.score.value, list(self.order)
+
+# Incumbent of the worker process, set by the pool initializer
+_incumbent: Optional[SharedIncumbent] = None
+
+def _init_worker(incumbent: SharedIncumbent):
+    global _incumbent
+    _incumbent = incumbent
+    set_stop_flag(incumbent.stopped)
+
+class _RaceMember:
+    """Keeps the quality-versus-time trace of one engine and exchanges its best order with the incumbent."""
+    def __init__(self, instance: ProblemInstance, started: float):
+        self.instance = instance
+        self.started = started
+        self.position = {id(job): i for i, job in enumerate(instance.jobs)}
+        self.best_score = -1.0
+        self.seen_version = 0
+        self.trace = []
+
+    def elapsed_ms(self) -> float:
+        return round((time.time() - self.started) * 1000, 1)
+
+    def remaining_ms(self, deadline: float) -> float:
+        return max(0.0, (deadline - time.time()) * 1000)
+
+    def record(self, score: float, order: List[int]):
+        if score > self.best_score:
+            self.best_score = score
+            self.trace.append([self.elapsed_ms(), score])
+            _incumbent.publish(score, order)
+
+    def better_incumbent(self) -> Optional[List[int]]:
+        """The incumbent's order if another engine published a better one since the last call."""
+        update = _incumbent.fetch(self.seen_version)
+        if update is None:
+            return None
+        self.seen_version, score, order = update
+        return order if score > self.best_score else None
+
+def _run_greedy(member: _RaceMember, stats: dict, deadline: float, target_score: Optional[float]):
+    instance = member.instance
+    machine_schedules = instance.new_machine_schedules()
+    unscheduled = optimize_greedy(instance.jobs, machine_schedules, instance.flexible, stats=stats,
+                                  deadline_ms=member.remaining_ms(deadline))
+    _record_schedule(member, machine_schedules)
+    return machine_schedules, unscheduled
+
+def _run_campaign(member: _RaceMember, stats: dict, deadline: float, target_score: Optional[float]):
+    instance = member.instance
+    machine_schedules = instance.new_machine_schedules()
+    unscheduled = optimize_campaigns(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats,
+                                     deadline_ms=member.remaining_ms(deadline))
+    _record_schedule(member, machine_schedules)
+    return machine_schedules, unscheduled
+
+def _record_schedule(member: _RaceMember, machine_schedules: Dict[str, MachineSchedule]):
+    """Publishes a one-shot engine's schedule as a chromosome (jobs by start time, then the unscheduled ones)."""
+    order = [member.position[id(job)] for job in schedule_order(member.instance.jobs, machine_schedules)]
+    member.record(schedule_score(machine_schedules), order)
+
+def _run_ga(member: _RaceMember, stats: dict, deadline: float, target_score: Optional[float]):
+    instance = member.instance
+
+    def on_generation(generation, best_chromosome, best_fitness):
+        if best_fitness > member.best_score:
+            member.record(best_fitness, [member.position[id(job)] for job in best_chromosome])
+        order = member.better_incumbent()
+        return [instance.jobs[i] for i in order] if order is not None else None
+
+    machine_schedules = instance.new_machine_schedules()
+    unscheduled = optimize_genetic(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats,
+                                   deadline_ms=member.remaining_ms(deadline), target_fitness=target_score,
+                                   on_generation=on_generation)
+    return machine_schedules, unscheduled
+
+def _run_ga_adaptive(member: _RaceMember, stats: dict, deadline: float, target_score: Optional[float]):
+    instance = member.instance
+    last_fitness = [None]
+
+    def decode(order):
+        return _assign_chromosome_to_machines([instance.jobs[i] for i in order], instance.new_machine_schedules(), instance.sleeve_index)
+
+    def on_generation(generation, best_chromosome, best_fitness):
+        # Its own fitness has another scale, so new bests are decoded to compare them with the other engines
+        if best_fitness != last_fitness[0]:
+            last_fitness[0] = best_fitness
+            member.record(schedule_score(decode(best_chromosome)[0]), list(best_chromosome))
+        return member.better_incumbent()
+
+    best_order = genetic_optimizer2.find_best_order(instance.df.reset_index(drop=True).copy(), stats,
+                                                    member.remaining_ms(deadline), on_generation=on_generation)
+    return decode(best_order)
+
+_ENGINE_RUNNERS = {
+    'greedy': _run_greedy,
+    'campaign': _run_campaign,
+    'ga': _run_ga,
+    'ga-adaptive': _run_ga_adaptive,
+}
+
+def _race_member(handle: SharedInstanceHandle, engine: str, seed: int, started: float, deadline: float,
+                 target_score: Optional[float]) -> dict:
+    """Runs one engine of the portfolio inside a worker process, on the instance published in shared memory."""
+    instance = attach_instance(handle)
+    random.seed(seed)
+    np.random.seed(seed)
+    member = _RaceMember(instance, started)
+    stats = {}
+    machine_schedules, unscheduled = _ENGINE_RUNNERS[engine](member, stats, deadline, target_score)
+    return {
+        'machine_schedules': machine_schedules,
+        'unscheduled_jobs': unscheduled,
+        'score': schedule_score(machine_schedules),
+        'elapsed_ms': member.elapsed_ms(),
+        'stats': stats,
+        'trace': member.trace,
+    }
+
+def default_members(ga_seeds: int = 2) -> List[str]:
+    return ['greedy', 'campaign'] + ['ga'] * ga_seeds + ['ga-adaptive']
+
+def optimize_portfolio(instance: ProblemInstance, time_budget_ms: Optional[int] = None, members: Optional[List[str]] = None,
+                       seed: Optional[int] = None, target_score: Optional[float] = None) -> Tuple[Dict[str, MachineSchedule], int, dict]:
+    """
+    Races several engines on the same instance, each in its own process, until the time budget expires.
+
+    The engines share the best order found so far (the incumbent) through shared memory: after every
+    generation a GA publishes its best order if it improves the incumbent and injects the incumbent into
+    its next generation if another engine found a better one. Every engine stops at the deadline and
+    returns its best schedule. The race also ends as soon as a finished engine reaches target_score;
+    then, or if engines are still running DEADLINE_GRACE_S after the deadline, the remaining engines
+    are told to stop through the incumbent and their best schedules are collected too (status
+    'stopped' or 'timeout'), before the shared instance is released.
+
+    Returns the winning schedules, their unscheduled count and a report with the winner and the
+    quality-versus-time trace ([elapsed_ms, score] at every improvement) of each engine.
+    """
+    members = members or default_members()
+    unknown = set(members) - set(_ENGINE_RUNNERS)
+    if unknown:
+        raise ValueError(f"Unknown portfolio engines: {', '.join(sorted(unknown))}. Available: {', '.join(_ENGINE_RUNNERS)}")
+    time_budget_ms = time_budget_ms or DEFAULT_TIME_BUDGET_MS
+    base_seed = seed if seed is not None else random.randrange(2**31)
+
+    ctx = multiprocessing.get_context(START_METHOD)
+    if START_METHOD == 'forkserver':
+        ctx.set_forkserver_preload([__name__])
+    incumbent = SharedIncumbent(len(instance.jobs), ctx)
+    started = time.time()
+    deadline = started + time_budget_ms / 1000
+
+    # The instance is published once as flat arrays in shared memory: each task only carries a small handle
+    shared = SharedInstance(instance)
+    # One process per engine: they race even on fewer cores, the OS shares the CPU until the deadline
+    executor = ProcessPoolExecutor(len(members), mp_context=ctx, initializer=_init_worker, initargs=(incumbent,))
+    try:
+        futures = [executor.submit(_race_member, shared.handle, engine, base_seed + i, started, deadline, target_score)
+                   for i, engine in enumerate(members)]
+        pending = set(futures)
+        stop_reason = 'completed'
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline + DEADLINE_GRACE_S - time.time()), return_when=FIRST_COMPLETED)
+            if not done:
+                stop_reason = 'deadline'
+                break
+            if target_score is not None and any(f.exception() is None and f.result()['score'] >= target_score for f in done):
+                stop_reason = 'target'
+                break
+        late = {future for future in futures if not future.done()}
+    finally:
+        # The engines stop at their next budget check and hand back their best schedule; the shared
+        # instance is only released once no worker uses it
+        incumbent.stop()
+        executor.shutdown(wait=True, cancel_futures=True)
+        shared.close()
+
+    engines_report = []
+    best = None
+    for i, (engine, future) in enumerate(zip(members, futures)):
+        entry = {'engine': engine, 'seed': base_seed + i}
+        late_status = 'stopped' if stop_reason == 'target' else 'timeout'
+        if future.cancelled():
+            entry['status'] = late_status
+        elif future.exception() is not None:
+            entry['status'] = 'error'
+            entry['error'] = str(future.exception())
+        else:
+            result = future.result()
+            entry.update(status=late_status if future in late else 'ok', score=result['score'], elapsed_ms=result['elapsed_ms'],
+                         stats=result['stats'], trace=result['trace'])
+            if best is None or result['score'] > best[1]['score']:
+                best = (i, result)
+        engines_report.append(entry)
+
+    if best is None:
+        raise RuntimeError("No engine of the portfolio finished before the deadline")
+
+    winner_pos, winner = best
+    report = {
+        'winner': members[winner_pos],
+        'winner_seed': base_seed + winner_pos,
+        'time_budget_ms': time_budget_ms,
+        'elapsed_ms': round((time.time() - started) * 1000, 1),
+        'stop_reason': stop_reason,
+        'engines': engines_report,
+    }
+    return winner['machine_schedules'], winner['unscheduled_jobs'], report
@@ -0,0 +1,205 @@
+import random
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..models.domain import MachineSchedule
+from ..models.instance import ProblemInstance
+from . import genetic_optimizer, genetic_optimizer2
+from .annealing import optimize_annealing
+from .bounds import gap_target, instance_upper_bound, optimality_gap
+from .campaign_optimizer import optimize_campaigns, schedule_order
+from .genetic_optimizer3 import _assign_chromosome_to_machines, optimize_genetic, schedule_score
+from .greedy_optimizer import optimize_greedy
+from .nsga2 import optimize_nsga2
+from .portfolio import default_members, optimize_portfolio
+from .search_budget import SearchBudget
+from .steady_state_ga import optimize_steady_state
+
+class OptimizationOutcome:
+    """
+    Result of running an optimizer on a ProblemInstance: the machine schedules plus run statistics.
+    Multi-objective optimizers also return their Pareto front; machine_schedules is then its first point.
+    """
+    def __init__(self, machine_schedules: Dict[str, MachineSchedule], unscheduled_jobs: int, stats: Optional[dict] = None,
+                 pareto_front: Optional[List[dict]] = None):
+        self.machine_schedules = machine_schedules
+        self.unscheduled_jobs = unscheduled_jobs
+        self.stats = stats or {}
+        self.pareto_front = pareto_front
+        # Instance upper bound of score(), set by run_optimizer
+        self.upper_bound: Optional[float] = None
+
+    def score(self) -> float:
+        """Common quality measure used to compare engines: meters plus criticality weighted as in the GA fitness."""
+        return schedule_score(self.machine_schedules)
+
+    def gap(self) -> Optional[float]:
+        """Relative distance of score() to the instance upper bound (0.0 = provably optimal), None without a bound."""
+        if self.upper_bound is None:
+            return None
+        return optimality_gap(self.score(), self.upper_bound)
+
+class OptimizerSpec:
+    def __init__(self, name: str, run: Callable, description: str, default_params: Dict, anytime: bool = True):
+        self.name = name
+        self.run = run
+        self.description = description
+        self.default_params = default_params
+        # Anytime engines improve a complete schedule until they stop, so a default time budget suits them;
+        # single-pass constructive ones would leave jobs unscheduled when cut short
+        self.anytime = anytime
+
+OPTIMIZERS: Dict[str, OptimizerSpec] = {}
+
+# Time budget used when the request gives none: the interactive SLA is a schedule in under 2 s,
+# leaving room for reading the upload and formatting the response. Overnight runs pass a larger budget.
+INTERACTIVE_TIME_BUDGET_MS = 1500
+
+def register_optimizer(name: str, description: str, default_params: Optional[Dict] = None, anytime: bool = True):
+    """
+    Registers an optimizer under 'name'. The decorated function receives
+    (instance, params, time_budget_ms, target_score) and returns an OptimizationOutcome.
+    anytime=False marks a single-pass engine, which only gets a time budget when the caller asks for one.
+    """
+    def decorator(run: Callable) -> Callable:
+        OPTIMIZERS[name] = OptimizerSpec(name, run, description, default_params or {}, anytime)
+        return run
+    return decorator
+
+def list_optimizers() -> List[Dict]:
+    return [{'name': spec.name, 'description': spec.description, 'params': spec.default_params}
+            for spec in OPTIMIZERS.values()]
+
+def validate_request(name: str, params: Optional[Dict] = None) -> OptimizerSpec:
+    """Checks the algorithm name and its parameters. Raises ValueError if they are not valid."""
+    if name not in OPTIMIZERS:
+        raise ValueError(f"Unknown algorithm '{name}'. Available: {', '.join(OPTIMIZERS)}")
+    spec = OPTIMIZERS[name]
+    unknown = set(params or {}) - set(spec.default_params)
+    if unknown:
+        raise ValueError(f"Unknown parameters for '{name}': {', '.join(sorted(unknown))}")
+    return spec
+
+def run_optimizer(name: str, instance: ProblemInstance, params: Optional[Dict] = None,
+                  time_budget_ms: Optional[int] = None, seed: Optional[int] = None,
+                  target_score: Optional[float] = None, gap_tolerance: Optional[float] = None) -> OptimizationOutcome:
+    """
+    Runs a registered optimizer. Raises ValueError for unknown optimizers or parameters.
+    Iterative engines stop at the time budget (INTERACTIVE_TIME_BUDGET_MS if not given) or when
+    they reach target_score (same scale as OptimizationOutcome.score), returning their best schedule.
+    Single-pass engines (anytime=False) run to completion unless a time budget is given explicitly.
+    The outcome carries the instance upper bound (bounds.instance_upper_bound); with gap_tolerance the
+    engines also stop once their gap to it is at most that fraction (0.01 = within 1% of the bound).
+    """
+    spec = validate_request(name, params)
+    params = params or {}
+    if gap_tolerance is not None and not 0 <= gap_tolerance < 1:
+        raise ValueError("gap_tolerance must be in [0, 1)")
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    if time_budget_ms is None and spec.anytime:
+        time_budget_ms = INTERACTIVE_TIME_BUDGET_MS
+    upper_bound = instance_upper_bound(instance.jobs, instance.new_machine_schedules())['upper_bound']
+    targets = [target for target in (target_score, gap_target(upper_bound, gap_tolerance)) if target is not None]
+    outcome = spec.run(instance, {**spec.default_params, **params}, time_budget_ms, min(targets) if targets else None)
+    outcome.upper_bound = upper_bound
+    return outcome
+
+@register_optimizer('greedy', "Codicioso: el trabajo más crítico que cabe, desempatando por menor duración + setup.",
+                    anytime=False)
+def _run_greedy(instance: ProblemInstance, params: Dict, time_budget_ms: Optional[int], target_score: Optional[float]) -> OptimizationOutcome:
+    machine_schedules = instance.new_machine_schedules()
+    stats = {}
+    unscheduled = optimize_greedy(instance.jobs, machine_schedules, instance.flexible, stats=stats, deadline_ms=time_budget_ms)
+    return OptimizationOutcome(machine_schedules, unscheduled, stats)
+
+@register_optimizer('campaign', "Jerárquico por campañas de tipo de impresión: orden exacto de las campañas de cada máquina "
+                                "y selección tipo mochila de los trabajos de cada campaña dentro del horizonte.",
+                    {'time_step_hours': 0.05}, anytime=False)
+def _run_campaign(instance: ProblemInstance, params: Dict, time_budget_ms: Optional[int], target_score: Optional[float]) -> OptimizationOutcome:
+    machine_schedules = instance.new_machine_schedules()
+    stats = {}
+    unscheduled = optimize_campaigns(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats,
+                                     deadline_ms=time_budget_ms, **params)
+    return OptimizationOutcome(machine_schedules, unscheduled, stats)
+
+@register_optimizer('annealing', "Recocido simulado (con lista tabú opcional) sobre la secuencia de cada máquina: intercambios, "
+                                 "reubicaciones y entrada/salida de trabajos evaluados en O(1) con la matriz de setup.",
+                    {'max_moves': 10_000_000, 'tabu_tenure': 0, 'initial_temperature': None, 'campaign_start': True})
+def _run_annealing(instance: ProblemInstance, params: Dict, time_budget_ms: Optional[int], target_score: Optional[float]) -> OptimizationOutcome:
+    machine_schedules = instance.new_machine_schedules()
+    stats = {}
+    unscheduled = optimize_annealing(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats,
+                                     deadline_ms=time_budget_ms, target_fitness=target_score, **params)
+    return OptimizationOutcome(machine_schedules, unscheduled, stats)
+
+@register_optimizer('ga', "Algoritmo genético sobre objetos de dominio (genetic_optimizer3). Los individuos repetidos se "
+                          "reemplazan antes de evaluarse y la población se reinicia en parte si pierde diversidad. Con "
+                          "campaign_seed, la población inicial incluye el cronograma del motor por campañas.",
+                    {'population_size': 100, 'num_generations': 100, 'mutation_rate': 0.1, 'num_parents': 20, 'campaign_seed': False,
+                     'deduplicate': True, 'diversity_threshold': 0.5})
+def _run_ga(instance: ProblemInstance, params: Dict, time_budget_ms: Optional[int], target_score: Optional[float]) -> OptimizationOutcome:
+    params = dict(params)
+    stats = {}
+    seeds = None
+    budget = SearchBudget(time_budget_ms)
+    if params.pop('campaign_seed'):
+        campaign_schedules = instance.new_machine_schedules()
+        optimize_campaigns(instance.jobs, campaign_schedules, instance.sleeve_index, stats=stats.setdefault('campaign_seed', {}),
+                           deadline_ms=time_budget_ms)
+        seeds = [schedule_order(instance.jobs, campaign_schedules)]
+    machine_schedules = instance.new_machine_schedules()
+    # Its fitness is the outcome score, so the target applies directly
+    unscheduled = optimize_genetic(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats,
+                                   deadline_ms=budget.remaining_ms(), target_fitness=target_score,
+                                   seed_chromosomes=seeds, **params)
+    return OptimizationOutcome(machine_schedules, unscheduled, stats)
+
+@register_optimizer('ga-steady', "Algoritmo genético de estado estacionario sobre arreglos preasignados: cada hijo reemplaza al peor individuo.",
+                    {'population_size': 100, 'num_offspring': 10000, 'mutation_rate': 0.1, 'tournament_size': 3, 'bounded': True})
+def _run_ga_steady(instance: ProblemInstance, params: Dict, time_budget_ms: Optional[int], target_score: Optional[float]) -> OptimizationOutcome:
+    machine_schedules = instance.new_machine_schedules()
+    stats = {}
+    unscheduled = optimize_steady_state(instance.jobs, machine_schedules, instance.sleeve_index, stats=stats,
+                                        deadline_ms=time_budget_ms, target_fitness=target_score, **params)
+    return OptimizationOutcome(machine_schedules, unscheduled, stats)
+
+@register_optimizer('nsga2', "Algoritmo genético multiobjetivo (NSGA-II): devuelve el frente de Pareto entre metros, "
+                             "horas de cambio, makespan y criticidad cubierta.",
+                    {'population_size': 100, 'num_generations': 100, 'mutation_rate': 0.1})
+def _run_nsga2(instance: ProblemInstance, params: Dict, time_budget_ms: Optional[int], target_score: Optional[float]) -> OptimizationOutcome:
+    stats = {}
+    # There is no single fitness to reach, so only the time budget applies
+    front = optimize_nsga2(instance.jobs, instance.new_machine_schedules(), instance.sleeve_index, stats=stats,
+                           deadline_ms=time_budget_ms, **params)
+    chromosome = [instance.jobs[i] for i in front[0]['order']]
+    machine_schedules, unscheduled = _assign_chromosome_to_machines(chromosome, instance.new_machine_schedules(), instance.sleeve_index)
+    return OptimizationOutcome(machine_schedules, unscheduled, stats, pareto_front=front)
+
+def _run_dataframe_ga(module) -> Callable:
+    """
+    Adapts the DataFrame-based GAs: they search the job order on the source table and the
+    order is then decoded on the instance, so it honors the same constraints as the other engines.
+    Their fitness has its own scale, so only the time budget applies to them, not target_score.
+    """
+    def run(instance: ProblemInstance, params: Dict, time_budget_ms: Optional[int], target_score: Optional[float]) -> OptimizationOutcome:
+        stats = {}
+        best_order = module.find_best_order(instance.df.reset_index(drop=True).copy(), stats, time_budget_ms)
+        chromosome = [instance.jobs[i] for i in best_order]
+        machine_schedules, unscheduled = _assign_chromosome_to_machines(chromosome, instance.new_machine_schedules(), instance.sleeve_index)
+        return OptimizationOutcome(machine_schedules, unscheduled, stats)
+    return run
+
+register_optimizer('ga-adaptive', "Algoritmo genético adaptativo con múltiples operadores (genetic_optimizer2).")(
+    _run_dataframe_ga(genetic_optimizer2))
+register_optimizer('ga-basic', "Algoritmo genético básico sobre el DataFrame (genetic_optimizer).")(
+    _run_dataframe_ga(genetic_optimizer))
+
+@register_optimizer('portfolio', "Carrera en paralelo de varios motores (codicioso, por campañas, GA con distintas semillas y GA adaptativo) "
+                                 "que comparten la mejor solución hasta agotar el presupuesto de tiempo.",
+                    {'members': default_members()})
+def _run_portfolio(instance: ProblemInstance, params: Dict, time_budget_ms: Optional[int], target_score: Optional[float]) -> OptimizationOutcome:
+    machine_schedules, unscheduled, report = optimize_portfolio(instance, time_budget_ms, params['members'], target_score=target_score)
+    return OptimizationOutcome(machine_schedules, unscheduled, report)
@@ -0,0 +1,93 @@
+from typing import Callable, Dict, List, Optional
+
+from ..models.domain import Job, MachineSchedule
+from .availability_calendar import AvailabilityCalendar
+from .sleeve_constraints import SleeveIndex
+
+HOURS_PER_CALENDAR_DAY = 24.0
+
+def _select_day_candidates(pending: List[Job], hours_per_day: float, lookahead: float) -> List[Job]:
+    """
+    Keeps only the jobs that could reasonably run today: per suggested machine, the most critical
+    jobs until 'lookahead' times the day's capacity is covered. This bounds the size of each
+    day's problem by the machines' capacity instead of by the whole backlog.
+    """
+    by_machine: Dict[str, List[Job]] = {}
+    for job in pending:
+        by_machine.setdefault(job.maquina_sugerida, []).append(job)
+
+    candidates = []
+    capacity = hours_per_day * lookahead
+    for machine_jobs in by_machine.values():
+        machine_jobs.sort(key=lambda j: j.nivel_de_criticidad, reverse=True)
+        hours = 0.0
+        for job in machine_jobs:
+            if hours >= capacity:
+                break
+            candidates.append(job)
+            hours += job.get_duration_hours()
+    return candidates
+
+def optimize_rolling_horizon(jobs: List[Job], machine_names: List[str],
+                             day_optimizer: Callable[[List[Job], Dict[str, MachineSchedule]], int],
+                             num_days: int = 7, hours_per_day: float = 24.0,
+                             working_days: Optional[List[bool]] = None, aging_per_day: float = 1.0,
+                             lookahead: float = 1.5, sleeve_index: Optional[SleeveIndex] = None,
+                             calendars: Optional[Dict[str, AvailabilityCalendar]] = None) -> tuple[List[Dict], List[Job]]:
+    """
+    Schedules several days one window at a time.
+
+    Each day is optimized only for the pending jobs (incrementally, never re-solving the whole plan),
+    starting from the end state of every machine on the previous day: its end time and last print type.
+    Jobs that do not fit roll over to the next day with their criticality increased by 'aging_per_day'.
+
+    - hours_per_day: working hours of each day (e.g. 16 for two shifts).
+    - working_days: weekly pattern starting on the first day of the plan, e.g. 6 x True + [False].
+    - calendars: optional availability calendar per machine (shifts, breaks, maintenance).
+    - day_optimizer: any optimizer with the (jobs, machine_schedules) -> unscheduled count signature.
+
+    Returns the list of day results ({'day', 'machine_schedules'}) and the jobs left unscheduled.
+    Only the scheduled jobs of each day are kept, so memory grows with the plan, not with the search.
+    """
+    working_days = working_days or [True] * 7
+    calendars = calendars or {}
+    base_criticality = {id(job): job.nivel_de_criticidad for job in jobs}
+    end_state = {name: (0.0, None) for name in machine_names}
+    pending = list(jobs)
+    days = []
+
+    try:
+        for day in range(num_days):
+            if not pending:
+                break
+            if not working_days[day % len(working_days)]:
+                continue
+
+            day_start = day * HOURS_PER_CALENDAR_DAY
+            day_end = day_start + min(hours_per_day, HOURS_PER_CALENDAR_DAY)
+            sleeve_usage = sleeve_index.new_usage() if sleeve_index is not None else None
+            machine_schedules = {
+                name: MachineSchedule(name, sleeve_usage, max(end_time, day_start), last_type, day_end, calendars.get(name))
+                for name, (end_time, last_type) in end_state.items()
+            }
+
+            candidates = _select_day_candidates(pending, day_end - day_start, lookahead)
+            day_optimizer(candidates, machine_schedules)
+
+            scheduled_ids = set()
+            for name, schedule in machine_schedules.items():
+                if schedule.jobs:
+                    end_state[name] = (schedule.get_current_time(), schedule.get_last_impression_type())
+                scheduled_ids.update(id(item['job_object']) for item in schedule.jobs)
+
+            pending = [job for job in pending if id(job) not in scheduled_ids]
+            for job in pending:
+                job.nivel_de_criticidad += aging_per_day
+
+            days.append({'day': day + 1, 'machine_schedules': machine_schedules})
+    finally:
+        # Aging only steers the search; the reported criticality is the original one
+        for job in jobs:
+            job.nivel_de_criticidad = base_criticality[id(job)]
+
+    return days, pending
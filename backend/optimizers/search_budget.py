@@ -0,0 +1,60 @@
+import time
+from typing import Optional
+
+# Process-wide stop request (a shared ctypes value, non-zero = stop), set in the worker processes of a
+# portfolio race so the parent can stop every engine at once (see portfolio._init_worker)
+_stop_flag = None
+
+def set_stop_flag(flag):
+    global _stop_flag
+    _stop_flag = flag
+
+class SearchBudget:
+    """
+    Stopping rule of an anytime search: a wall-clock deadline in milliseconds and/or a target fitness.
+
+    Engines call expired() before each fitness evaluation. It is a single time.monotonic() call,
+    negligible next to decoding a schedule, so the deadline holds even inside a long generation.
+    When it stops, the engine keeps the best solution evaluated so far. started and deadline are
+    time.monotonic() values, so clock adjustments during a run do not move the deadline.
+    """
+    def __init__(self, deadline_ms: Optional[float] = None, target_fitness: Optional[float] = None):
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline_ms / 1000 if deadline_ms is not None else None
+        self.target_fitness = target_fitness
+        self.stop_reason = None
+
+    def is_bounded(self) -> bool:
+        return self.deadline is not None or self.target_fitness is not None
+
+    def expired(self) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.stop_reason = 'deadline'
+            return True
+        if _stop_flag is not None and _stop_flag.value:
+            self.stop_reason = 'stopped'
+            return True
+        return False
+
+    def remaining_ms(self) -> Optional[float]:
+        """Milliseconds left before the deadline, None without one (to hand the rest of the budget to a next stage)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, (self.deadline - time.monotonic()) * 1000)
+
+    def reached(self, fitness: float) -> bool:
+        if self.target_fitness is not None and fitness >= self.target_fitness:
+            self.stop_reason = 'target'
+            return True
+        return False
+
+    def report(self, generations: int, evaluations: int) -> dict:
+        """Run statistics of the search, in the format returned in the API summary."""
+        elapsed = time.monotonic() - self.started
+        return {
+            'generations': generations,
+            'evaluations': evaluations,
+            'elapsed_ms': round(elapsed * 1000, 1),
+            'evaluations_per_s': round(evaluations / elapsed, 1) if elapsed > 0 else 0.0,
+            'stop_reason': self.stop_reason or 'completed',
+        }
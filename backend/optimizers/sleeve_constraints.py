@@ -0,0 +1,129 @@
+import bisect
+import copy
+from typing import Dict, Iterable, List, Optional, Any
+
+from ..models.sleeve_set import development_key
+
+# Sets de mangas con este estado no pueden montarse en ninguna máquina
+UNAVAILABLE_STATUSES = {'fuera de servicio'}
+
+class SleeveIndex:
+    """
+    In-memory index of the sleeve inventory and its machine compatibility.
+    It is built once per optimization run; each evaluation of a schedule then
+    asks for a fresh SleeveUsage tracker with new_usage().
+
+    Compatibility is stored as a bitset of machine positions per development:
+    - Sleeve sets without compatibility rows are considered compatible with every machine.
+    - Machines of the run that are not registered in the 'machines' table are not restricted.
+    - Developments that are not in the inventory are not constrained at all.
+    """
+    def __init__(self, machine_names: Iterable[str], sleeve_sets: List[Dict[str, Any]],
+                 machines: List[Dict[str, Any]], compatibilities: List[Dict[str, Any]]):
+        self.machine_names = list(machine_names)
+        self.machine_bit = {name: 1 << i for i, name in enumerate(self.machine_names)}
+        all_machines_mask = (1 << len(self.machine_names)) - 1
+
+        # Map DB machine ids to the machine names used in the uploaded file
+        machine_id_to_bit = {}
+        registered_mask = 0
+        for machine in machines:
+            bit = self.machine_bit.get(str(machine['machine_number']))
+            if bit is not None:
+                machine_id_to_bit[machine['id']] = bit
+                registered_mask |= bit
+        unregistered_mask = all_machines_mask & ~registered_mask
+
+        compatible_ids: Dict[int, List[int]] = {}
+        for row in compatibilities:
+            compatible_ids.setdefault(row['sleeve_set_id'], []).append(row['machine_id'])
+
+        self.compatible_mask: Dict[int, int] = {}
+        for sleeve_set in sleeve_sets:
+            development = development_key(sleeve_set['development'])
+            if development is None:
+                continue
+            if sleeve_set['status'] in UNAVAILABLE_STATUSES or sleeve_set['num_sleeves'] <= 0:
+                mask = 0
+            elif sleeve_set['id'] not in compatible_ids:
+                mask = all_machines_mask
+            else:
+                mask = unregistered_mask
+                for machine_id in compatible_ids[sleeve_set['id']]:
+                    mask |= machine_id_to_bit.get(machine_id, 0)
+            self.compatible_mask[development] = mask
+
+        # (development, machine, start, end) reservations that every new usage tracker starts with
+        self.reservations: List[tuple] = []
+
+    def is_tracked(self, development: Optional[int]) -> bool:
+        return development in self.compatible_mask
+
+    def is_compatible(self, development: Optional[int], machine_name: str) -> bool:
+        """O(1) check of whether a development can be mounted on a machine."""
+        mask = self.compatible_mask.get(development)
+        if mask is None:
+            return True
+        return bool(mask & self.machine_bit.get(machine_name, 0))
+
+    def with_reservations(self, reservations: Iterable[tuple]) -> 'SleeveIndex':
+        """
+        Copy of the index whose usage trackers start with the given (development, machine, start, end)
+        reservations, e.g. the sleeve sets mounted by jobs that are already running.
+        """
+        pinned = copy.copy(self)
+        pinned.reservations = self.reservations + list(reservations)
+        return pinned
+
+    def new_usage(self) -> 'SleeveUsage':
+        usage = SleeveUsage(self)
+        for development, machine_name, start, end in self.reservations:
+            usage.reserve(development, machine_name, start, end)
+        return usage
+
+class SleeveUsage:
+    """
+    Tracks when each sleeve set is mounted while a schedule is being built.
+    A set cannot be used on two machines at the same time. The intervals of a
+    development never overlap, so they are kept sorted by start (and therefore by end)
+    and every lookup is a binary search.
+    """
+    __slots__ = ('index', 'starts', 'ends', 'machines')
+
+    def __init__(self, index: SleeveIndex):
+        self.index = index
+        self.starts: Dict[int, List[float]] = {}
+        self.ends: Dict[int, List[float]] = {}
+        self.machines: Dict[int, List[str]] = {}
+
+    def earliest_start(self, development: Optional[int], machine_name: str, start: float, duration: float) -> Optional[float]:
+        """
+        Returns the earliest time >= start at which the sleeve set can be used on the machine
+        for 'duration' hours, or None if the set is not compatible with the machine.
+        """
+        mask = self.index.compatible_mask.get(development)
+        if mask is None:
+            return start
+        if not mask & self.index.machine_bit.get(machine_name, 0):
+            return None
+        starts = self.starts.get(development)
+        if not starts:
+            return start
+        ends = self.ends[development]
+        machines = self.machines[development]
+        i = bisect.bisect_right(ends, start)
+        while i < len(starts) and starts[i] < start + duration:
+            if machines[i] != machine_name:
+                start = ends[i]
+            i += 1
+        return start
+
+    def reserve(self, development: Optional[int], machine_name: str, start: float, end: float):
+        """Marks the sleeve set as mounted on the machine during [start, end)."""
+        if development not in self.index.compatible_mask:
+            return
+        starts = self.starts.setdefault(development, [])
+        pos = bisect.bisect_right(starts, start)
+        starts.insert(pos, start)
+        self.ends.setdefault(development, []).insert(pos, end)
+        self.machines.setdefault(development, []).insert(pos, machine_name)
@@ -0,0 +1,137 @@
+import random
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..models.domain import Job, MachineSchedule
+from .evaluation_cache import EvaluationCache
+from .genetic_optimizer3 import _assign_chromosome_to_machines, create_evaluator
+from .search_budget import SearchBudget
+from .sleeve_constraints import SleeveIndex
+
+def _order_crossover(parent1: np.ndarray, parent2: np.ndarray, start: int, end: int, child: np.ndarray, taken: np.ndarray):
+    """Order Crossover (OX1) written into the preallocated 'child' row. 'taken' is a scratch mask of len(child)."""
+    taken[:] = False
+    child[start:end] = parent1[start:end]
+    taken[parent1[start:end]] = True
+    rest = parent2[~taken[parent2]]
+    child[:start] = rest[:start]
+    child[end:] = rest[start:]
+
+def optimize_steady_state(jobs: List[Job], machine_schedules: Dict[str, MachineSchedule], sleeve_index: SleeveIndex | None = None,
+                          stats: Optional[dict] = None, population_size: int = 100, num_offspring: Optional[int] = 10000,
+                          mutation_rate: float = 0.1, tournament_size: int = 3, deadline_ms: Optional[float] = None,
+                          target_fitness: Optional[float] = None, canonical: bool = True, bounded: bool = True):
+    """
+    Steady-state variant of the genetic algorithm of genetic_optimizer3, with the same encoding,
+    fitness, initialization and operators.
+
+    The population lives in one preallocated (population_size x jobs) integer array of job positions,
+    with the fitnesses in a parallel float array. Each step breeds a single offspring into a scratch
+    row and copies it over the worst member if it is better and not already in the population, so the
+    best member is never lost and memory stays constant: nothing is allocated per generation.
+
+    With bounded, an offspring is simulated only as long as it can still beat the worst member (see
+    genetic_optimizer3._OrderEvaluator): it is rejected either way, so the search is unchanged and the
+    time saved goes to more offspring.
+
+    It stops after num_offspring offspring (None for no limit), after deadline_ms or when the best
+    fitness reaches target_fitness. If a stats dict is given, it receives the same run statistics as
+    genetic_optimizer3 plus the offspring bred and the replacements made.
+    """
+    budget = SearchBudget(deadline_ms, target_fitness)
+    if num_offspring is None and not budget.is_bounded():
+        raise ValueError("num_offspring=None requires a deadline or a target fitness")
+
+    num_jobs = len(jobs)
+    evaluator = create_evaluator(jobs, machine_schedules, sleeve_index, canonical)
+    cache = EvaluationCache()
+    evaluations = 0
+
+    def evaluate(order: np.ndarray, threshold: Optional[float] = None) -> tuple[int, Optional[float]]:
+        """Key and fitness of an order; with a threshold, None instead of a fitness that cannot exceed it."""
+        nonlocal evaluations
+        key = evaluator.key_positions(order)
+        fitness = cache.get(key)
+        if fitness is None:
+            fitness = evaluator.fitness_positions(order, threshold)
+            if fitness is not None:
+                cache.put(key, fitness)
+            evaluations += 1
+        return key, fitness
+
+    # Preallocated state: population, fitnesses, member keys and the offspring scratch buffers
+    population = np.empty((max(population_size, 1), num_jobs), dtype=np.intp)
+    fitnesses = np.full(len(population), -np.inf)
+    member_keys: Dict[int, int] = {} # key -> number of members with that order
+    keys = [0] * len(population)
+    child = np.empty(num_jobs, dtype=np.intp)
+    taken = np.empty(num_jobs, dtype=bool)
+
+    # Initialization as in genetic_optimizer3: half random orders, half variations of the criticality order.
+    # The numpy generator is seeded from 'random', so seeded runs are reproducible.
+    rng = np.random.default_rng(random.getrandbits(63))
+    heuristic = np.argsort([-job.nivel_de_criticidad for job in jobs], kind='stable')
+    for i in range(len(population)):
+        if num_jobs < 2:
+            population[i] = np.arange(num_jobs)
+        elif i < population_size // 2:
+            population[i] = rng.permutation(num_jobs)
+        else:
+            population[i] = heuristic
+            a, b = random.sample(range(num_jobs), 2)
+            population[i, a], population[i, b] = population[i, b], population[i, a]
+        if i and budget.expired():
+            break
+        keys[i], fitnesses[i] = evaluate(population[i])
+        member_keys[keys[i]] = member_keys.get(keys[i], 0) + 1
+
+    def tournament() -> int:
+        contenders = [random.randrange(len(population)) for _ in range(tournament_size)]
+        return max(contenders, key=fitnesses.__getitem__)
+
+    offspring = 0
+    replacements = 0
+    running = num_jobs >= 2 and budget.stop_reason is None and not budget.reached(fitnesses.max())
+    while running and (num_offspring is None or offspring < num_offspring):
+        if budget.expired():
+            break
+        start, end = sorted(random.sample(range(num_jobs), 2))
+        _order_crossover(population[tournament()], population[tournament()], start, end, child, taken)
+        if random.random() < mutation_rate:
+            a, b = random.sample(range(num_jobs), 2)
+            child[a], child[b] = child[b], child[a]
+        offspring += 1
+
+        # Only an offspring better than the worst member matters, so it is simulated only while it can be
+        worst = int(np.argmin(fitnesses))
+        key, fitness = evaluate(child, fitnesses[worst] if bounded else None)
+        if fitness is not None and fitness > fitnesses[worst] and key not in member_keys:
+            member_keys[keys[worst]] -= 1
+            if not member_keys[keys[worst]]:
+                del member_keys[keys[worst]]
+            population[worst] = child
+            fitnesses[worst] = fitness
+            keys[worst] = key
+            member_keys[key] = 1
+            replacements += 1
+            if budget.reached(fitness):
+                break
+
+    best_chromosome = [jobs[i] for i in population[int(np.argmax(fitnesses))]]
+    final_schedules, unscheduled_count = _assign_chromosome_to_machines(best_chromosome, machine_schedules, sleeve_index)
+
+    if stats is not None:
+        stats.update(budget.report(offspring // max(population_size, 1), evaluations))
+        stats['offspring'] = offspring
+        stats['replacements'] = replacements
+        stats['cache'] = cache.stats()
+        stats.update(evaluator.stats())
+
+    # Transfer the results to the original machine_schedules objects
+    for name, schedule in final_schedules.items():
+        machine_schedules[name].jobs = schedule.jobs
+        machine_schedules[name].current_time_hours = schedule.current_time_hours
+        machine_schedules[name].last_impression_type = schedule.last_impression_type
+
+    return unscheduled_count
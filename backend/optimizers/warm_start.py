@@ -0,0 +1,193 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..models.domain import Job, MachineSchedule
+from ..models.instance import ProblemInstance
+from .genetic_optimizer3 import create_evaluator, optimize_genetic
+from .search_budget import SearchBudget
+
+# Insertion positions evaluated per new job when building the warm-start seed
+MAX_INSERTION_CANDIDATES = 24
+# Share of the time budget the seed may use; the GA gets the rest
+SEED_BUDGET_SHARE = 0.5
+
+def _spread(positions: List[int], limit: int) -> List[int]:
+    """At most 'limit' of the positions, evenly spaced, keeping the first one."""
+    if limit <= 0:
+        return []
+    if len(positions) <= limit:
+        return positions
+    step = len(positions) / limit
+    return [positions[int(i * step)] for i in range(limit)]
+
+class WarmStart:
+    """
+    Re-planning state built from a previous schedule (the 'optimized_schedule' of an earlier response,
+    also stored in optimization_results.schedule_details) and the current upload:
+
+    - frozen: per machine, the previous items that started before now_hours. They keep their times,
+      and the machine (and their sleeve sets) are only available after them.
+    - carried: jobs of the upload that were already planned but have not started, in their previous order.
+    - new_jobs: jobs of the upload that were not in the previous schedule.
+    - removed_jobs: planned jobs that are no longer in the upload.
+
+    Jobs are matched by 'referencia'.
+    """
+    def __init__(self, instance: ProblemInstance, previous_schedule: Dict[str, List[Dict[str, Any]]], now_hours: float = 0.0):
+        self.instance = instance
+        self.now_hours = now_hours
+        available: Dict[str, List[Job]] = {}
+        for job in instance.jobs:
+            available.setdefault(str(job.referencia), []).append(job)
+
+        self.frozen: Dict[str, List[dict]] = {name: [] for name in instance.machine_names}
+        planned = [] # (previous start, machine, job) of the jobs that have not started
+        self.removed_jobs = 0
+        for machine_name, items in previous_schedule.items():
+            for item in sorted(items, key=lambda i: i['hora_inicio']):
+                matches = available.get(str(item['referencia']))
+                job = matches.pop(0) if matches else None
+                if item['hora_inicio'] < now_hours and machine_name in self.frozen:
+                    # Already running or done: it stays as it is, even if it left the upload
+                    self.frozen[machine_name].append({
+                        'job_object': job or Job(item),
+                        'start_time': item['hora_inicio'],
+                        'end_time': item['hora_fin'],
+                        'setup_time': item.get('tiempo_de_cambio_horas', 0.0),
+                        'duration': item.get('tiempo_estimado_horas', 0.0),
+                    })
+                elif job is None:
+                    self.removed_jobs += 1
+                else:
+                    planned.append((item['hora_inicio'], machine_name, job))
+
+        planned.sort(key=lambda p: p[0])
+        self.carried = [job for _, _, job in planned]
+        self.previous_machine = {id(job): machine_name for _, machine_name, job in planned}
+        self.new_jobs = [job for jobs in available.values() for job in jobs]
+
+        sleeve_index = instance.sleeve_index
+        if sleeve_index is not None:
+            sleeve_index = sleeve_index.with_reservations(
+                (item['job_object'].development, name, item['start_time'], item['end_time'])
+                for name, items in self.frozen.items() for item in items)
+        self.sleeve_index = sleeve_index
+
+    def machine_templates(self) -> Dict[str, MachineSchedule]:
+        """Empty schedules that start after the frozen items of every machine, and never before now_hours."""
+        templates = {}
+        for name, base in self.instance.new_machine_schedules().items():
+            frozen = self.frozen[name]
+            start = max([self.now_hours] + [item['end_time'] for item in frozen])
+            last_type = frozen[-1]['job_object'].tipo_de_impresion if frozen else None
+            templates[name] = MachineSchedule(name, None, start, last_type, base.horizon_end, base.calendar)
+        return templates
+
+    def seed_chromosome(self, templates: Dict[str, MachineSchedule], budget: Optional[SearchBudget] = None) -> List[Job]:
+        """
+        The previous order of the carried jobs with the new jobs inserted one at a time, most critical first,
+        where they give the best fitness. Only the positions in front of a job of one of its machines
+        (or at the end) change its machine's sequence; of those, the ones right after a job of the same
+        print type (no setup) are tried first, and at most MAX_INSERTION_CANDIDATES evenly spread ones
+        are evaluated, so the seed costs O(new jobs x MAX_INSERTION_CANDIDATES) decodings. Once the budget
+        expires, the remaining new jobs are appended at the end. self.searched_insertions counts the others.
+        """
+        jobs = self.carried + self.new_jobs
+        evaluator = create_evaluator(jobs, templates, self.sleeve_index)
+        order = list(range(len(self.carried)))
+        self.searched_insertions = 0
+        for position in sorted(range(len(self.carried), len(jobs)), key=lambda i: -jobs[i].nivel_de_criticidad):
+            if budget is not None and budget.expired():
+                order.append(position)
+                continue
+            self.searched_insertions += 1
+            eligible = set(jobs[position].eligible_machines)
+            print_type = jobs[position].tipo_de_impresion
+            shared = [i for i, item in enumerate(order) if eligible & set(jobs[item].eligible_machines)]
+            after_same_type = [i + 1 for i in shared if jobs[order[i]].tipo_de_impresion == print_type]
+            candidates = _spread(after_same_type, MAX_INSERTION_CANDIDATES - 1)
+            candidates += _spread([i for i in shared if i not in set(candidates)], MAX_INSERTION_CANDIDATES - 1 - len(candidates))
+            candidates.append(len(order))
+            best_fitness, best_index = -1.0, len(order)
+            for index in candidates:
+                trial = np.array(order[:index] + [position] + order[index:], dtype=np.intp)
+                evaluator.key_positions(trial)
+                # Only a better insertion matters, so the evaluator may stop once this one cannot be
+                fitness = evaluator.fitness_positions(trial, best_fitness)
+                if fitness is not None and fitness > best_fitness:
+                    best_fitness, best_index = fitness, index
+            order.insert(best_index, position)
+        return [jobs[i] for i in order]
+
+    def merge(self, optimized: Dict[str, MachineSchedule]) -> Dict[str, MachineSchedule]:
+        """Final schedules: the frozen items of every machine followed by its re-optimized jobs."""
+        merged = {}
+        for name, schedule in optimized.items():
+            machine = MachineSchedule(name)
+            machine.jobs = self.frozen[name] + schedule.jobs
+            machine.current_time_hours = schedule.get_current_time()
+            machine.last_impression_type = schedule.get_last_impression_type()
+            merged[name] = machine
+        return merged
+
+    def resequenced_jobs(self, machine_schedules: Dict[str, MachineSchedule]) -> int:
+        """Carried jobs that changed machine or their position among the carried jobs of their machine."""
+        previous_rank: Dict[int, int] = {}
+        counters: Dict[str, int] = {}
+        for job in self.carried:
+            machine_name = self.previous_machine[id(job)]
+            previous_rank[id(job)] = counters.get(machine_name, 0)
+            counters[machine_name] = previous_rank[id(job)] + 1
+
+        moved = 0
+        for name, schedule in machine_schedules.items():
+            rank = 0
+            for item in schedule.jobs[len(self.frozen[name]):]:
+                key = id(item['job_object'])
+                if key not in previous_rank:
+                    continue
+                if self.previous_machine[key] != name or previous_rank[key] != rank:
+                    moved += 1
+                rank += 1
+        return moved
+
+def optimize_warm_start(instance: ProblemInstance, previous_schedule: Dict[str, List[Dict[str, Any]]], now_hours: float = 0.0,
+                        stats: Optional[dict] = None, population_size: int = 50, num_generations: Optional[int] = 30,
+                        mutation_rate: float = 0.1, deadline_ms: Optional[float] = None) -> tuple[Dict[str, MachineSchedule], int]:
+    """
+    Re-optimizes after small changes (e.g. a rush order added midday) starting from the previous schedule
+    instead of a random population: jobs that started before now_hours are frozen, the new jobs are
+    inserted into the previous sequence and the genetic algorithm of genetic_optimizer3 is seeded with
+    that sequence. The smaller population and fewer generations than a cold run are enough because the
+    search starts next to a good schedule, and they keep the new plan close to the previous one.
+
+    Returns the merged machine schedules (frozen items first) and the number of unscheduled jobs.
+    """
+    budget = SearchBudget(deadline_ms)
+    warm_start = WarmStart(instance, previous_schedule, now_hours)
+    templates = warm_start.machine_templates()
+    jobs = warm_start.carried + warm_start.new_jobs
+    seed_budget = SearchBudget(deadline_ms * SEED_BUDGET_SHARE) if deadline_ms is not None else None
+    seed = warm_start.seed_chromosome(templates, seed_budget)
+
+    # Restarts and duplicate replacement would throw away the seeded population and resequence carried
+    # jobs, which is what a warm start is meant to avoid: the GA only refines around the seed here
+    ga_stats = {}
+    unscheduled = optimize_genetic(jobs, templates, warm_start.sleeve_index, stats=ga_stats, population_size=population_size,
+                                   num_generations=num_generations, mutation_rate=mutation_rate,
+                                   num_parents=max(2, population_size // 5), deadline_ms=budget.remaining_ms(), initial_chromosome=seed,
+                                   deduplicate=False, diversity_threshold=None)
+    machine_schedules = warm_start.merge(templates)
+
+    if stats is not None:
+        stats.update(ga_stats)
+        stats['warm_start'] = {
+            'frozen_jobs': sum(len(items) for items in warm_start.frozen.values()),
+            'carried_jobs': len(warm_start.carried),
+            'new_jobs': len(warm_start.new_jobs),
+            'searched_insertions': warm_start.searched_insertions,
+            'removed_jobs': warm_start.removed_jobs,
+            'resequenced_jobs': warm_start.resequenced_jobs(machine_schedules),
+        }
+    return machine_schedules, unscheduled
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
 from ..models.machine import Machine, MachineCreate
+from ..models.machine_downtime import MachineDowntime, MachineDowntimeCreate
 from ..models.sleeve_set import SleeveSet # Added import for SleeveSet
 from ..services.machine_service import MachineService
 from ..services.sleeve_set_service import SleeveSetService # Needed for compatibility checks
@@ -73,3 +74,23 @@ def get_compatible_machines(sleeve_set_id: int, machine_service: MachineService
     if not sleeve_set_service.get_sleeve_set(sleeve_set_id):
         raise HTTPException(status_code=404, detail="Sleeve Set not found")
     return machine_service.get_compatible_machines_for_sleeve_set(sleeve_set_id)
+
+@router.post("/{machine_id}/downtimes/", response_model=MachineDowntime, summary="Registrar una parada programada de una máquina")
+def add_downtime(machine_id: int, downtime: MachineDowntimeCreate, machine_service: MachineService = Depends(MachineService)):
+    if not machine_service.get_machine(machine_id):
+        raise HTTPException(status_code=404, detail="Machine not found")
+    if downtime.end_hour <= downtime.start_hour:
+        raise HTTPException(status_code=400, detail="end_hour must be greater than start_hour")
+    return machine_service.create_downtime(machine_id, downtime.start_hour, downtime.end_hour, downtime.reason)
+
+@router.get("/{machine_id}/downtimes/", response_model=List[MachineDowntime], summary="Obtener las paradas programadas de una máquina")
+def get_downtimes(machine_id: int, machine_service: MachineService = Depends(MachineService)):
+    if not machine_service.get_machine(machine_id):
+        raise HTTPException(status_code=404, detail="Machine not found")
+    return machine_service.get_downtimes_for_machine(machine_id)
+
+@router.delete("/{machine_id}/downtimes/{downtime_id}", summary="Eliminar una parada programada")
+def remove_downtime(machine_id: int, downtime_id: int, machine_service: MachineService = Depends(MachineService)):
+    if not machine_service.delete_downtime(machine_id, downtime_id):
+        raise HTTPException(status_code=404, detail="Downtime not found")
+    return {"message": "Downtime deleted successfully"}
@@ -1,34 +1,86 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
 import pandas as pd
-import io
-from typing import Dict, List, Any
+import json
+from typing import Dict, List, Any, Optional
 
 from ..services.optimization_service import OptimizationService
+from ..services.pareto_front_service import ParetoFrontService
+from ..models.validation import ON_INVALID_MODES, JobTableError
 from ..models.domain import Job, MachineSchedule
+from ..utils.admission import AdmissionRejected, optimization_gate, request_key
+from ..utils.instrumentation import timed_stage
+from ..utils.responses import ScheduleResponse, negotiate_layout
+from ..utils.uploads import SpooledUpload, spool_upload
 from ..utils.setup_utils import get_setup_time
+from ..optimizers.availability_calendar import parse_shifts
+from ..optimizers.registry import list_optimizers, validate_request
 
 router = APIRouter(
     tags=["Optimization"]
 )
 
+def _parse_shifts_param(shifts: Optional[str]):
+    """Parses the optional 'shifts' query parameter, e.g. '6-14,14-22'."""
+    if not shifts:
+        return None
+    try:
+        return parse_shifts(shifts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid shifts parameter: {e}")
+
+async def _read_upload(file: UploadFile) -> SpooledUpload:
+    with timed_stage('upload'):
+        return await spool_upload(file)
+
+def _parse_excel(upload: SpooledUpload) -> pd.DataFrame:
+    """Reads the uploaded Excel file straight from the uploaded file, then closes it, and normalizes the column names."""
+    try:
+        with timed_stage('read_excel'):
+            df = pd.read_excel(upload.file, engine='openpyxl')
+    finally:
+        upload.close()
+    df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+    return df
+
+def _check_on_invalid(on_invalid: str):
+    if on_invalid not in ON_INVALID_MODES:
+        raise HTTPException(status_code=400, detail=f"on_invalid must be one of: {', '.join(ON_INVALID_MODES)}")
+
+def _invalid_table(e: JobTableError) -> HTTPException:
+    """422 with the validation report: the problems found, each with its count and first spreadsheet rows."""
+    return HTTPException(status_code=422, detail={"message": str(e), **e.report})
+
+def _overloaded(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 @router.post("/upload/", summary="Optimizar cronograma con algoritmo codicioso",
           response_description="Cronograma optimizado por máquina.")
-async def create_upload_file(file: UploadFile = File(...)):
+async def create_upload_file(request: Request, file: UploadFile = File(...), flexible: bool = False, shifts: Optional[str] = None,
+                             on_invalid: str = "fail"):
+    shift_windows = _parse_shifts_param(shifts)
+    _check_on_invalid(on_invalid)
     try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents), engine='openpyxl')
-        df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+        upload = await _read_upload(file)
 
-        # Initialize the service and run the optimization
-        optimization_service = OptimizationService()
-        optimized_schedule, summary = optimization_service.run_greedy_optimization(df)
+        # Initialize the service and run the optimization; identical uploads in flight share one run
+        optimization_service = OptimizationService(negotiate_layout(request), on_invalid)
+        key = request_key(upload.sha256, 'upload', layout=optimization_service.layout, on_invalid=on_invalid,
+                          flexible=flexible, shifts=shifts)
+        optimized_schedule, summary = await optimization_gate.run(
+            key, lambda: optimization_service.run_greedy_optimization(_parse_excel(upload), flexible, shift_windows),
+            discard=upload.close
+        )
 
         # Here you could re-integrate database persistence if needed
 
-        return {
+        return ScheduleResponse({
             "optimized_schedule": optimized_schedule,
             "summary": summary
-        }
+        }, optimization_service.layout)
+    except JobTableError as e:
+        raise _invalid_table(e)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Missing column in Excel file: {e}. Please ensure all required columns are present.")
     except Exception as e:
@@ -36,7 +88,7 @@ async def create_upload_file(file: UploadFile = File(...)):
 
 @router.post("/recalculate-schedule/", summary="Recalculate schedule times based on a given order",
           response_description="Recalculated schedule with updated times.")
-async def recalculate_schedule(schedule_data: Dict[str, List[Dict[str, Any]]]):
+async def recalculate_schedule(request: Request, schedule_data: Dict[str, List[Dict[str, Any]]]):
     try:
         # Reconstruct MachineSchedule objects from the received data
         machine_schedules = {}
@@ -51,50 +103,245 @@ async def recalculate_schedule(schedule_data: Dict[str, List[Dict[str, Any]]]):
                 machine_schedule.add_job(job, setup_time)
             machine_schedules[machine_name] = machine_schedule
 
-        # Format the results for the response (similar to OptimizationService)
-        final_schedule = {name: schedule.to_dict_list() for name, schedule in machine_schedules.items()}
-        total_time = max([schedule.get_current_time() for schedule in machine_schedules.values()] or [0])
-
-        # Recalculate summary
-        summary = {
-            'total_time': round(total_time, 2),
-            'unscheduled_jobs': 0, # Assuming all jobs in the provided schedule are scheduled
-            'machine_summary': []
-        }
-
-        for name, schedule in machine_schedules.items():
-            summary['machine_summary'].append({
-                'machine': name,
-                'total_time': round(schedule.get_current_time(), 2),
-                'total_meters': schedule.get_total_meters(),
-                'setup_time': round(sum(job['tiempo_de_cambio_horas'] for job in schedule.to_dict_list()), 2),
-                'num_jobs': len(schedule.jobs)
-            })
-
-        return {
+        # Format the results for the response, assuming all jobs in the provided schedule are scheduled
+        optimization_service = OptimizationService(negotiate_layout(request))
+        final_schedule, summary = optimization_service.format_result(machine_schedules, 0)
+
+        return ScheduleResponse({
             "optimized_schedule": final_schedule,
             "summary": summary
-        }
+        }, optimization_service.layout)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during recalculation: {str(e)}")
 
 @router.post("/upload-ga/", summary="Optimizar cronograma con algoritmo genético",
           response_description="Cronograma optimizado por máquina.")
-async def create_upload_file_ga(file: UploadFile = File(...)):
+async def create_upload_file_ga(request: Request, file: UploadFile = File(...), flexible: bool = False, shifts: Optional[str] = None,
+                                on_invalid: str = "fail"):
+    shift_windows = _parse_shifts_param(shifts)
+    _check_on_invalid(on_invalid)
+    try:
+        upload = await _read_upload(file)
+
+        optimization_service = OptimizationService(negotiate_layout(request), on_invalid)
+        key = request_key(upload.sha256, 'upload-ga', layout=optimization_service.layout, on_invalid=on_invalid,
+                          flexible=flexible, shifts=shifts)
+        optimized_schedule, summary = await optimization_gate.run(
+            key, lambda: optimization_service.run_genetic_optimization(_parse_excel(upload), flexible, shift_windows),
+            discard=upload.close
+        )
+
+        return ScheduleResponse({
+            "optimized_schedule": optimized_schedule,
+            "summary": summary
+        }, optimization_service.layout)
+    except JobTableError as e:
+        raise _invalid_table(e)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing column in Excel file: {e}. Please ensure all required columns are present.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error during optimization: {str(e)}")
+
+
+@router.post("/upload-horizon/", summary="Optimizar un horizonte de varios días (rolling horizon)",
+          response_description="Cronograma de varios días por máquina, con horas absolutas desde el inicio del plan.")
+async def create_upload_file_horizon(request: Request, file: UploadFile = File(...), algorithm: str = "greedy", days: int = 7,
+                                     hours_per_day: float = 24.0, working_days: str = "1111111",
+                                     aging_per_day: float = 1.0, flexible: bool = False, shifts: Optional[str] = None,
+                                     on_invalid: str = "fail"):
+    """
+    - **algorithm**: 'greedy' o 'ga', el optimizador usado en cada día.
+    - **days**: longitud del horizonte en días.
+    - **hours_per_day**: horas laborables por día según el calendario de turnos.
+    - **working_days**: patrón semanal de días laborables a partir del primer día del plan, p.ej. '1111110'.
+    - **aging_per_day**: incremento de criticidad de los trabajos que pasan al día siguiente.
+    - **shifts**: turnos diarios en horas del día, p.ej. '6-14,14-22'; un turno nocturno como '22-6' cruza la medianoche. Las paradas registradas por máquina se descuentan.
+    - **on_invalid**: 'fail' (por defecto) rechaza el archivo con 422 y un informe de errores por fila;
+      'skip' omite las filas inválidas. El informe queda en `summary.validation`.
+    """
+    if algorithm not in ("greedy", "ga"):
+        raise HTTPException(status_code=400, detail="algorithm must be 'greedy' or 'ga'")
+    if days < 1 or not 0 < hours_per_day <= 24 or not working_days or set(working_days) - {"0", "1"}:
+        raise HTTPException(status_code=400, detail="Invalid horizon configuration")
+    shift_windows = _parse_shifts_param(shifts)
+    _check_on_invalid(on_invalid)
     try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents), engine='openpyxl')
-        df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+        upload = await _read_upload(file)
 
-        optimization_service = OptimizationService()
-        optimized_schedule, summary = optimization_service.run_genetic_optimization(df)
+        optimization_service = OptimizationService(negotiate_layout(request), on_invalid)
+        key = request_key(upload.sha256, 'upload-horizon', layout=optimization_service.layout, on_invalid=on_invalid,
+                          algorithm=algorithm, days=days, hours_per_day=hours_per_day, working_days=working_days,
+                          aging_per_day=aging_per_day, flexible=flexible, shifts=shifts)
+        optimized_schedule, summary = await optimization_gate.run(key, lambda: optimization_service.run_rolling_horizon_optimization(
+            _parse_excel(upload), algorithm, days, hours_per_day, [c == "1" for c in working_days], aging_per_day, flexible, shift_windows
+        ), discard=upload.close)
 
-        return {
+        return ScheduleResponse({
             "optimized_schedule": optimized_schedule,
             "summary": summary
-        }
+        }, optimization_service.layout)
+    except JobTableError as e:
+        raise _invalid_table(e)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Missing column in Excel file: {e}. Please ensure all required columns are present.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during optimization: {str(e)}")
 
+@router.get("/optimizers/", summary="Listar los algoritmos de optimización disponibles")
+def get_optimizers():
+    return list_optimizers()
+
+@router.post("/optimize/", summary="Optimizar cronograma con cualquier algoritmo registrado",
+          response_description="Cronograma optimizado por máquina.")
+async def optimize(request: Request, file: UploadFile = File(...), algorithm: str = Form("greedy"), params: Optional[str] = Form(None),
+                   time_budget_ms: Optional[int] = Form(None), seed: Optional[int] = Form(None),
+                   flexible: bool = Form(False), shifts: Optional[str] = Form(None),
+                   target_score: Optional[float] = Form(None), gap_tolerance: Optional[float] = Form(None),
+                   on_invalid: str = Form("fail")):
+    """
+    - **algorithm**: nombre de un algoritmo registrado (ver `/optimizers/`).
+    - **params**: objeto JSON con los parámetros del algoritmo, p.ej. `{"num_generations": 50}`.
+      Con `{"num_generations": null}` el GA corre hasta agotar el tiempo o alcanzar `target_score`.
+    - **time_budget_ms**: tiempo máximo de búsqueda (1500 ms por defecto, para uso interactivo).
+      Para una corrida nocturna más profunda, p.ej. `3600000`. Siempre se devuelve la mejor solución encontrada.
+      El codicioso (`greedy`) y el de campañas (`campaign`) hacen una sola pasada y solo se cortan si se indica este valor.
+    - **target_score**: calidad objetivo (metros + criticidad x 10000); la búsqueda se detiene al alcanzarla.
+    - **gap_tolerance**: brecha de optimalidad aceptada, entre 0 y 1 (p.ej. `0.02`); la búsqueda se detiene
+      cuando el puntaje queda a esa fracción de la cota superior de la instancia.
+    - **seed**: semilla para resultados reproducibles.
+    - **on_invalid**: 'fail' (por defecto) rechaza el archivo con 422 y un informe de errores por fila;
+      'skip' omite las filas inválidas. El informe queda en `summary.validation`.
+
+    El resumen incluye en `stats` las generaciones completadas, las evaluaciones por segundo y el motivo de parada,
+    y el puntaje (`score`), la cota superior (`upper_bound`) y la brecha entre ambos (`optimality_gap`).
+
+    Las peticiones idénticas simultáneas (mismo archivo y mismos parámetros) comparten una sola ejecución.
+    Con demasiadas optimizaciones en curso se responde 503 con la cabecera `Retry-After`.
+    """
+    try:
+        if gap_tolerance is not None and not 0 <= gap_tolerance < 1:
+            raise ValueError("gap_tolerance must be in [0, 1)")
+        algorithm_params = json.loads(params) if params else {}
+        if not isinstance(algorithm_params, dict):
+            raise ValueError("params must be a JSON object")
+        validate_request(algorithm, algorithm_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    shift_windows = _parse_shifts_param(shifts)
+    _check_on_invalid(on_invalid)
+    try:
+        upload = await _read_upload(file)
+
+        optimization_service = OptimizationService(negotiate_layout(request), on_invalid)
+        key = request_key(upload.sha256, 'optimize', layout=optimization_service.layout, on_invalid=on_invalid,
+                          algorithm=algorithm, params=algorithm_params, time_budget_ms=time_budget_ms, seed=seed,
+                          flexible=flexible, shifts=shifts,
+                          target_score=target_score, gap_tolerance=gap_tolerance)
+        optimized_schedule, summary = await optimization_gate.run(key, lambda: optimization_service.run_optimization(
+            _parse_excel(upload), algorithm, algorithm_params, time_budget_ms, seed, flexible, shift_windows, target_score, gap_tolerance
+        ), discard=upload.close)
+
+        return ScheduleResponse({
+            "optimized_schedule": optimized_schedule,
+            "summary": summary
+        }, optimization_service.layout)
+    except JobTableError as e:
+        raise _invalid_table(e)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing column in Excel file: {e}. Please ensure all required columns are present.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error during optimization: {str(e)}")
+
+@router.post("/reoptimize/", summary="Re-optimizar a partir de un cronograma anterior (arranque en caliente)",
+          response_description="Cronograma re-optimizado por máquina.")
+async def reoptimize(request: Request, file: UploadFile = File(...), previous_schedule: Optional[str] = Form(None),
+                     previous_result_id: Optional[int] = Form(None), now_hours: float = Form(0.0),
+                     params: Optional[str] = Form(None), time_budget_ms: Optional[int] = Form(None),
+                     seed: Optional[int] = Form(None), flexible: bool = Form(False), shifts: Optional[str] = Form(None),
+                     on_invalid: str = Form("fail")):
+    """
+    Para re-planificar tras cambios pequeños (p.ej. un pedido urgente a mitad del día) sin partir de cero.
+
+    - **file**: el Excel actual, con los trabajos nuevos o modificados.
+    - **previous_schedule**: JSON del `optimized_schedule` anterior (el cronograma actual de la UI).
+    - **previous_result_id**: alternativa a `previous_schedule`: el `summary.result_id` de una optimización anterior
+      (cada resultado se guarda en `optimization_results`; se conservan los últimos 200).
+    - **now_hours**: hora actual del plan; los trabajos que empezaron antes quedan congelados.
+    - **params**: `population_size`, `num_generations` y `mutation_rate` del GA (50, 30 y 0.1 por defecto).
+    - **on_invalid**: 'fail' (por defecto) rechaza el archivo con 422 y un informe de errores por fila;
+      'skip' omite las filas inválidas. El informe queda en `summary.validation`.
+
+    Los trabajos se emparejan por `referencia`. El resumen incluye en `stats.warm_start` los trabajos congelados,
+    nuevos, eliminados y los que cambiaron de posición respecto al cronograma anterior.
+    """
+    try:
+        previous = json.loads(previous_schedule) if previous_schedule else None
+        if previous is not None and not isinstance(previous, dict):
+            raise ValueError("previous_schedule must be a JSON object of machine -> jobs")
+        warm_params = json.loads(params) if params else {}
+        if not isinstance(warm_params, dict):
+            raise ValueError("params must be a JSON object")
+        unknown = set(warm_params) - {"population_size", "num_generations", "mutation_rate"}
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    shift_windows = _parse_shifts_param(shifts)
+    _check_on_invalid(on_invalid)
+    try:
+        upload = await _read_upload(file)
+
+        optimization_service = OptimizationService(negotiate_layout(request), on_invalid)
+        key = request_key(upload.sha256, 'reoptimize', layout=optimization_service.layout, on_invalid=on_invalid,
+                          previous=previous, previous_result_id=previous_result_id, now_hours=now_hours, params=warm_params,
+                          time_budget_ms=time_budget_ms, seed=seed, flexible=flexible, shifts=shifts)
+        optimized_schedule, summary = await optimization_gate.run(key, lambda: optimization_service.run_warm_start_optimization(
+            _parse_excel(upload), previous, previous_result_id, now_hours, warm_params, time_budget_ms, seed, flexible, shift_windows
+        ), discard=upload.close)
+
+        return ScheduleResponse({
+            "optimized_schedule": optimized_schedule,
+            "summary": summary
+        }, optimization_service.layout)
+    except JobTableError as e:
+        raise _invalid_table(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing column in Excel file: {e}. Please ensure all required columns are present.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error during optimization: {str(e)}")
+
+@router.get("/pareto-fronts/{front_id}/", summary="Consultar un frente de Pareto calculado por el algoritmo 'nsga2'")
+def get_pareto_front(front_id: str):
+    try:
+        return ParetoFrontService().describe_front(front_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Pareto front not found or expired")
+
+@router.post("/pareto-fronts/{front_id}/select/", summary="Elegir un punto del frente de Pareto sin volver a optimizar",
+          response_description="Cronograma del punto elegido por máquina.")
+def select_pareto_point(request: Request, front_id: str, point: int):
+    """
+    - **point**: índice del punto en el frente (ver `/pareto-fronts/{front_id}/`). El punto 0 es el de
+      mayor puntaje (metros + criticidad x 10000); los demás cambian metros por menos horas de cambio o menor makespan.
+    """
+    optimization_service = OptimizationService(negotiate_layout(request))
+    try:
+        optimized_schedule, summary = optimization_service.select_pareto_point(front_id, point)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Pareto front not found or expired")
+    except IndexError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ScheduleResponse({
+        "optimized_schedule": optimized_schedule,
+        "summary": summary
+    }, optimization_service.layout)
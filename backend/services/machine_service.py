@@ -112,3 +112,52 @@ class MachineService:
         machines = cursor.fetchall()
         conn.close()
         return [dict(m) for m in machines]
+
+    def get_all_compatibilities(self) -> List[Dict[str, Any]]:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT machine_id, sleeve_set_id FROM machine_sleeve_set_compatibility")
+        compatibilities = cursor.fetchall()
+        conn.close()
+        return [dict(c) for c in compatibilities]
+
+    def create_downtime(self, machine_id: int, start_hour: float, end_hour: float, reason: Optional[str] = None) -> Dict[str, Any]:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO machine_downtime_windows (machine_id, start_hour, end_hour, reason) VALUES (?, ?, ?, ?)",
+            (machine_id, start_hour, end_hour, reason)
+        )
+        conn.commit()
+        downtime_id = cursor.lastrowid
+        conn.close()
+        return {"id": downtime_id, "machine_id": machine_id, "start_hour": start_hour, "end_hour": end_hour, "reason": reason}
+
+    def get_downtimes_for_machine(self, machine_id: int) -> List[Dict[str, Any]]:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM machine_downtime_windows WHERE machine_id = ? ORDER BY start_hour", (machine_id,))
+        downtimes = cursor.fetchall()
+        conn.close()
+        return [dict(d) for d in downtimes]
+
+    def get_all_downtimes(self) -> List[Dict[str, Any]]:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT m.machine_number, d.start_hour, d.end_hour FROM machine_downtime_windows d
+            JOIN machines m ON m.id = d.machine_id
+            ORDER BY d.start_hour
+        """)
+        downtimes = cursor.fetchall()
+        conn.close()
+        return [dict(d) for d in downtimes]
+
+    def delete_downtime(self, machine_id: int, downtime_id: int) -> bool:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM machine_downtime_windows WHERE id = ? AND machine_id = ?", (downtime_id, machine_id))
+        conn.commit()
+        rows_affected = cursor.rowcount
+        conn.close()
+        return rows_affected > 0
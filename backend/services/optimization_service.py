@@ -1,78 +1,289 @@
+import json
+import logging
+import random
+import sqlite3
+from datetime import datetime
+import numpy as np
 import pandas as pd
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
-from ..models.domain import Job, MachineSchedule
+from ..config import MAX_STORED_RESULTS
+from ..database import get_db_connection
+
+from ..models.domain import MachineSchedule
+from ..models.instance import ProblemInstance, build_instance, machine_names_for
+from ..models.validation import validate_jobs_table
 from ..optimizers.greedy_optimizer import optimize_greedy
 from ..optimizers.genetic_optimizer3 import optimize_genetic
+from ..optimizers.availability_calendar import AvailabilityCalendar
+from ..optimizers.registry import INTERACTIVE_TIME_BUDGET_MS, run_optimizer
+from ..optimizers.rolling_horizon import optimize_rolling_horizon
+from ..optimizers.sleeve_constraints import SleeveIndex
+from ..optimizers.warm_start import optimize_warm_start
+from ..utils.instrumentation import count, current_timer, timed_stage
+from ..utils.responses import encode_json
+from .machine_service import MachineService
+from .pareto_front_service import ParetoFrontService
+from .sleeve_set_service import SleeveSetService
+
+logger = logging.getLogger(__name__)
 
 class OptimizationService:
-    def run_greedy_optimization(self, df: pd.DataFrame):
-        # 1. Convert DataFrame rows to Job objects
-        jobs = [Job(row) for _, row in df.iterrows()]
+    def __init__(self, layout: str = 'rows', on_invalid: str = 'fail'):
+        # Shape of optimized_schedule: 'rows' (a dict per job) or 'columns' (a list per field), see utils/responses.py
+        self.layout = layout
+        # Invalid upload rows: 'fail' rejects the upload, 'skip' drops them (see models/validation.py)
+        self.on_invalid = on_invalid
+        # Validation report of the last loaded upload, added to the summary
+        self.validation: Optional[Dict] = None
 
-        # 2. Initialize MachineSchedule objects
-        machine_names = df['maquina_sugerida'].unique()
-        machine_schedules = {name: MachineSchedule(name) for name in machine_names}
+    def load_sleeve_index(self, machine_names: List[str]) -> Optional[SleeveIndex]:
+        """Loads the sleeve inventory and its compatibility once per run. None if the DB is not available."""
+        machine_service = MachineService()
+        try:
+            return SleeveIndex(
+                machine_names,
+                SleeveSetService().get_all_sleeve_sets(),
+                machine_service.get_all_machines(),
+                machine_service.get_all_compatibilities()
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Sleeve inventory not available, sleeve constraints disabled: {e}")
+            return None
 
-        # 3. Run the optimizer (it will modify machine_schedules in place)
-        unscheduled_jobs_count = optimize_greedy(jobs, machine_schedules)
+    def load_machine_widths(self) -> Dict[str, float]:
+        """Maximum material width per machine number registered in the DB."""
+        try:
+            return {str(m['machine_number']): m['max_material_width'] for m in MachineService().get_all_machines()}
+        except sqlite3.Error as e:
+            logger.warning(f"Machines not available, width constraints disabled: {e}")
+            return {}
 
-        # 4. Format the results for the response
-        final_schedule = {name: schedule.to_dict_list() for name, schedule in machine_schedules.items()}
-        total_time = max([schedule.get_current_time() for schedule in machine_schedules.values()] or [0])
+    def load_instance(self, df: pd.DataFrame, flexible: bool = False, shifts: Optional[List[tuple]] = None,
+                      num_days: int = 1) -> ProblemInstance:
+        """
+        Validates the uploaded rows (raises JobTableError, see models/validation.py), converts them to
+        Job objects and precomputes their eligible machines and calendars.
+        """
+        with timed_stage('load_constraints'):
+            machine_widths = self.load_machine_widths()
+        with timed_stage('validate'):
+            df, self.validation = validate_jobs_table(df, set(machine_widths), self.on_invalid)
+        machine_names = machine_names_for(df, machine_widths, flexible)
+        with timed_stage('load_constraints'):
+            sleeve_index = self.load_sleeve_index(machine_names)
+            calendars = self.load_calendars(machine_names, shifts, num_days)
+        with timed_stage('build_instance'):
+            return build_instance(df, machine_widths, sleeve_index, flexible, calendars)
 
-        # 5. Calculate summary
-        summary = {
-            'total_time': round(total_time, 2),
-            'unscheduled_jobs': unscheduled_jobs_count,
-            'machine_summary': []
-        }
+    def load_calendars(self, machine_names: List[str], shifts: Optional[List[tuple]] = None,
+                       num_days: int = 1) -> Dict[str, AvailabilityCalendar]:
+        """
+        Builds the availability calendar of each machine from the daily shift pattern and the
+        downtime windows stored in the DB. Machines without shifts or downtimes get no calendar.
+        """
+        try:
+            downtimes = MachineService().get_all_downtimes()
+        except sqlite3.Error as e:
+            logger.warning(f"Downtime windows not available: {e}")
+            downtimes = []
 
-        for name, schedule in machine_schedules.items():
-            summary['machine_summary'].append({
-                'machine': name,
-                'total_time': round(schedule.get_current_time(), 2),
-                'total_meters': schedule.get_total_meters(),
-                'setup_time': round(sum(job['tiempo_de_cambio_horas'] for job in schedule.to_dict_list()), 2),
-                'num_jobs': len(schedule.jobs)
-            })
+        downtimes_by_machine: Dict[str, List[tuple]] = {}
+        for downtime in downtimes:
+            downtimes_by_machine.setdefault(str(downtime['machine_number']), []).append((downtime['start_hour'], downtime['end_hour']))
 
-        return final_schedule, summary
+        calendars = {}
+        for name in machine_names:
+            machine_downtimes = downtimes_by_machine.get(str(name), [])
+            if shifts or machine_downtimes:
+                calendars[name] = AvailabilityCalendar.from_shifts(shifts or [(0.0, 24.0)], num_days, machine_downtimes)
+        return calendars
 
-    def run_genetic_optimization(self, df: pd.DataFrame):
-        # The flow is identical to the greedy one, just calling a different optimizer
-        jobs = [Job(row) for _, row in df.iterrows()]
-        machine_names = df['maquina_sugerida'].unique()
-        machine_schedules = {name: MachineSchedule(name) for name in machine_names}
+    def _count_reassigned_jobs(self, machine_schedules: Dict[str, MachineSchedule]) -> int:
+        return sum(1 for name, schedule in machine_schedules.items()
+                   for item in schedule.jobs
+                   if item['job_object'].maquina_sugerida is not None and item['job_object'].maquina_sugerida != name)
 
-        unscheduled_jobs_count = optimize_genetic(jobs, machine_schedules)
+    def format_result(self, machine_schedules: Dict[str, MachineSchedule], unscheduled_jobs_count: int,
+                      save: bool = False, **extra_summary):
+        """
+        Builds the (optimized_schedule, summary) response pair shared by every optimization flow. With
+        save=True the schedule is also stored in optimization_results under the summary's 'algorithm'
+        and its id is the summary's 'result_id' (None if the DB is not available). Inside an instrumented
+        request the summary also gets the 'timings' of the pipeline stages.
+        """
+        with timed_stage('format'):
+            final_schedule, summary = self._format_result(machine_schedules, unscheduled_jobs_count, **extra_summary)
+        if save:
+            with timed_stage('persist'):
+                summary['result_id'] = self._save_result(machine_schedules, summary)
+        timer = current_timer()
+        if timer is not None:
+            summary['timings'] = timer.report()
+        return final_schedule, summary
+
+    def _save_result(self, machine_schedules: Dict[str, MachineSchedule], summary: Dict) -> Optional[int]:
+        # Always the rows layout, which is what the warm start reads back (see optimizers/warm_start.py)
+        schedule_details = encode_json({name: schedule.to_dict_list() for name, schedule in machine_schedules.items()}).decode('utf-8')
+        setup_hours = sum(machine['setup_time'] for machine in summary['machine_summary'])
+        try:
+            result = self.create_optimization_result(summary['algorithm'], datetime.now().isoformat(),
+                                                     summary['total_time'], round(setup_hours, 2), schedule_details)
+        except sqlite3.Error as e:
+            logger.warning(f"Optimization result not saved: {e}")
+            return None
+        return result['id']
 
-        final_schedule = {name: schedule.to_dict_list() for name, schedule in machine_schedules.items()}
+    def _format_result(self, machine_schedules: Dict[str, MachineSchedule], unscheduled_jobs_count: int, **extra_summary):
+        if self.layout == 'columns':
+            final_schedule = {name: schedule.to_columns() for name, schedule in machine_schedules.items()}
+        else:
+            final_schedule = {name: schedule.to_dict_list() for name, schedule in machine_schedules.items()}
         total_time = max([schedule.get_current_time() for schedule in machine_schedules.values()] or [0])
 
         summary = {
             'total_time': round(total_time, 2),
             'unscheduled_jobs': unscheduled_jobs_count,
+            'reassigned_jobs': self._count_reassigned_jobs(machine_schedules),
+            **extra_summary,
             'machine_summary': []
         }
+        if self.validation is not None:
+            summary['validation'] = self.validation
 
         for name, schedule in machine_schedules.items():
             summary['machine_summary'].append({
                 'machine': name,
                 'total_time': round(schedule.get_current_time(), 2),
                 'total_meters': schedule.get_total_meters(),
-                'setup_time': round(sum(job['tiempo_de_cambio_horas'] for job in schedule.to_dict_list()), 2),
+                'setup_time': round(sum(item['setup_time'] for item in schedule.jobs), 2),
                 'num_jobs': len(schedule.jobs)
             })
-
         return final_schedule, summary
 
-    # Note: The genetic optimization flow would need a similar refactoring.
-    # The database methods below are kept for persistence, but are not used in the current optimization flow.
+    def run_optimization(self, df: pd.DataFrame, algorithm: str, params: Optional[Dict] = None,
+                         time_budget_ms: Optional[int] = None, seed: Optional[int] = None,
+                         flexible: bool = False, shifts: Optional[List[tuple]] = None,
+                         target_score: Optional[float] = None, gap_tolerance: Optional[float] = None):
+        """
+        Compiles the instance once and runs the registered optimizer 'algorithm' on it.
+        Raises ValueError for unknown algorithms or parameters.
+        The summary reports the score, the instance upper bound and the optimality gap between them.
+        A Pareto front returned by the optimizer is stored for later selection (see ParetoFrontService)
+        and summarized under 'pareto_front'.
+        """
+        instance = self.load_instance(df, flexible, shifts)
+        with timed_stage('optimize'):
+            outcome = run_optimizer(algorithm, instance, params, time_budget_ms, seed, target_score, gap_tolerance)
+        count('evaluations', outcome.stats.get('evaluations', 0))
+        extra_summary = {
+            'score': round(outcome.score(), 2),
+            'upper_bound': round(outcome.upper_bound, 2),
+            'optimality_gap': round(outcome.gap(), 4),
+        }
+        if outcome.pareto_front is not None:
+            extra_summary['pareto_front'] = ParetoFrontService().save_front(instance, outcome.pareto_front)
+        return self.format_result(outcome.machine_schedules, outcome.unscheduled_jobs, save=True,
+                                  algorithm=algorithm, stats=outcome.stats, **extra_summary)
+
+    def select_pareto_point(self, front_id: str, point: int):
+        """
+        Schedule of one point of a stored Pareto front, formatted as an optimization result. It is not
+        stored again: the front already is, and previewing points must not push real results out.
+        """
+        machine_schedules, unscheduled, chosen = ParetoFrontService().select_point(front_id, point)
+        return self.format_result(machine_schedules, unscheduled, algorithm='nsga2', pareto_front_id=front_id, pareto_point=point,
+                                  objectives=chosen['objectives'])
+
+    def run_warm_start_optimization(self, df: pd.DataFrame, previous_schedule: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                                    previous_result_id: Optional[int] = None, now_hours: float = 0.0,
+                                    params: Optional[Dict] = None, time_budget_ms: Optional[int] = None,
+                                    seed: Optional[int] = None, flexible: bool = False, shifts: Optional[List[tuple]] = None):
+        """
+        Re-plans the upload starting from a previous schedule, given directly (the current schedule of the UI)
+        or as the id of a stored optimization result. Raises ValueError if neither is available.
+        """
+        if previous_schedule is None:
+            if previous_result_id is None:
+                raise ValueError("A previous schedule or a previous result id is required")
+            result = self.get_optimization_result(previous_result_id)
+            if result is None or not result['schedule_details']:
+                raise ValueError(f"Optimization result {previous_result_id} not found")
+            previous_schedule = json.loads(result['schedule_details'])
+
+        instance = self.load_instance(df, flexible, shifts)
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        stats = {}
+        with timed_stage('optimize'):
+            machine_schedules, unscheduled = optimize_warm_start(
+                instance, previous_schedule, now_hours, stats, deadline_ms=time_budget_ms or INTERACTIVE_TIME_BUDGET_MS, **(params or {})
+            )
+        count('evaluations', stats.get('evaluations', 0))
+        return self.format_result(machine_schedules, unscheduled, save=True, algorithm='ga-warm', stats=stats)
+
+    def run_greedy_optimization(self, df: pd.DataFrame, flexible: bool = False, shifts: Optional[List[tuple]] = None):
+        return self.run_optimization(df, 'greedy', flexible=flexible, shifts=shifts)
+
+    def run_genetic_optimization(self, df: pd.DataFrame, flexible: bool = False, shifts: Optional[List[tuple]] = None):
+        return self.run_optimization(df, 'ga', flexible=flexible, shifts=shifts)
+
+    def run_rolling_horizon_optimization(self, df: pd.DataFrame, algorithm: str = 'greedy', num_days: int = 7,
+                                         hours_per_day: float = 24.0, working_days: Optional[List[bool]] = None,
+                                         aging_per_day: float = 1.0, flexible: bool = False,
+                                         shifts: Optional[List[tuple]] = None):
+        instance = self.load_instance(df, flexible, shifts, num_days)
+
+        if algorithm == 'ga':
+            day_optimizer = lambda jobs, schedules: optimize_genetic(jobs, schedules, instance.sleeve_index)
+        else:
+            day_optimizer = lambda jobs, schedules: optimize_greedy(jobs, schedules, flexible)
+
+        with timed_stage('optimize'):
+            days, pending_jobs = optimize_rolling_horizon(
+                instance.jobs, instance.machine_names, day_optimizer, num_days, hours_per_day,
+                working_days, aging_per_day, sleeve_index=instance.sleeve_index, calendars=instance.calendars
+            )
+
+        # Concatenate the days of each machine into a single schedule with absolute hours
+        machine_schedules = {name: MachineSchedule(name) for name in instance.machine_names}
+        days_summary = []
+        for day in days:
+            for name, schedule in day['machine_schedules'].items():
+                if schedule.jobs:
+                    machine_schedules[name].jobs.extend(schedule.jobs)
+                    machine_schedules[name].current_time_hours = schedule.get_current_time()
+                    machine_schedules[name].last_impression_type = schedule.get_last_impression_type()
+            days_summary.append({
+                'day': day['day'],
+                'scheduled_jobs': sum(len(s.jobs) for s in day['machine_schedules'].values()),
+                'total_meters': sum(s.get_total_meters() for s in day['machine_schedules'].values()),
+                'setup_time': round(sum(item['setup_time'] for s in day['machine_schedules'].values() for item in s.jobs), 2)
+            })
+
+        return self.format_result(machine_schedules, len(pending_jobs), save=True, algorithm=f'rolling-{algorithm}',
+                                  days=days_summary)
 
     def create_optimization_result(self, algorithm_type: str, timestamp: str, total_time: float, total_cost: float, schedule_details: str) -> Dict[str, any]:
-        # This method would need to be integrated back into the router if persistence is needed
-        pass
+        """Stores a result (total_cost = setup hours) and drops the ones older than the last MAX_STORED_RESULTS."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO optimization_results (algorithm_type, timestamp, total_time, total_cost, schedule_details) VALUES (?, ?, ?, ?, ?)",
+            (algorithm_type, timestamp, total_time, total_cost, schedule_details)
+        )
+        result_id = cursor.lastrowid
+        cursor.execute("DELETE FROM optimization_results WHERE id <= ?", (result_id - MAX_STORED_RESULTS,))
+        conn.commit()
+        conn.close()
+        return {"id": result_id, "algorithm_type": algorithm_type, "timestamp": timestamp, "total_time": total_time,
+                "total_cost": total_cost}
 
-    def get_optimization_result(self, result_id: int):
-        pass
+    def get_optimization_result(self, result_id: int) -> Optional[Dict[str, Any]]:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM optimization_results WHERE id = ?", (result_id,))
+        result = cursor.fetchone()
+        conn.close()
+        return dict(result) if result else None
@@ -0,0 +1,49 @@
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from ..models.instance import ProblemInstance
+from ..optimizers.genetic_optimizer3 import _assign_chromosome_to_machines
+
+# Fronts kept in memory for later selection; the oldest ones are dropped first
+MAX_STORED_FRONTS = 20
+
+# front_id -> (instance, points); shared by all the requests of the process
+_fronts: "OrderedDict[str, tuple[ProblemInstance, List[dict]]]" = OrderedDict()
+
+class ParetoFrontService:
+    """
+    Keeps the Pareto fronts returned by the multi-objective optimizer, so a planner can pick
+    another trade-off later without running the optimization again: only the chosen job order
+    is decoded into a schedule.
+    """
+    def save_front(self, instance: ProblemInstance, points: List[dict]) -> Dict[str, Any]:
+        front_id = uuid.uuid4().hex
+        _fronts[front_id] = (instance, points)
+        while len(_fronts) > MAX_STORED_FRONTS:
+            _fronts.popitem(last=False)
+        return self.describe_front(front_id)
+
+    def describe_front(self, front_id: str) -> Dict[str, Any]:
+        """The front's points without their job orders. Raises KeyError if the front is unknown or expired."""
+        _, points = _fronts[front_id]
+        return {
+            'id': front_id,
+            'points': [{'point': i, **{key: value for key, value in point.items() if key != 'order'}}
+                       for i, point in enumerate(points)],
+        }
+
+    def select_point(self, front_id: str, point: int):
+        """
+        Decodes one point of a stored front into machine schedules.
+        Returns (machine_schedules, unscheduled_count, point). Raises KeyError for unknown
+        fronts and IndexError for points out of range.
+        """
+        instance, points = _fronts[front_id]
+        _fronts.move_to_end(front_id)
+        if not 0 <= point < len(points):
+            raise IndexError(f"Point {point} out of range: the front has {len(points)} points")
+        chosen = points[point]
+        machine_schedules, unscheduled = _assign_chromosome_to_machines(
+            [instance.jobs[i] for i in chosen['order']], instance.new_machine_schedules(), instance.sleeve_index)
+        return machine_schedules, unscheduled, chosen
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from backend.optimizers.availability_calendar import AvailabilityCalendar, parse_shifts
+
+def test_overnight_shift_is_split_at_midnight():
+    assert parse_shifts('6-14,22-6') == [(6.0, 14.0), (22.0, 24.0), (0.0, 6.0)]
+
+def test_overnight_shift_spans_consecutive_days():
+    calendar = AvailabilityCalendar.from_shifts(parse_shifts('22-6'), num_days=2)
+    assert list(zip(calendar.starts, calendar.ends)) == [(0.0, 6.0), (22.0, 30.0), (46.0, 48.0)]
+    # A job started at 22:00 runs through midnight without a pause
+    assert calendar.finish_time(22.0, 8.0) == 30.0
+    assert calendar.available_hours(0.0, 48.0) == 16.0
+
+@pytest.mark.parametrize('shifts', ['6-6', '25-3', '6-14,x', '-2-4'])
+def test_invalid_shifts_are_rejected(shifts):
+    with pytest.raises(ValueError):
+        parse_shifts(shifts)
+
+def test_overlapping_downtimes_are_merged():
+    calendar = AvailabilityCalendar.from_shifts([(6.0, 22.0)], num_days=1, downtimes=[(10.0, 14.0), (12.0, 20.0), (13.0, 15.0)])
+    assert list(zip(calendar.starts, calendar.ends)) == [(6.0, 10.0), (20.0, 22.0)]
+    assert calendar.available_hours(0.0, 24.0) == 6.0
+
+def test_downtime_across_an_overnight_shift():
+    calendar = AvailabilityCalendar.from_shifts(parse_shifts('22-6'), num_days=2, downtimes=[(23.0, 25.0), (24.5, 26.0)])
+    assert list(zip(calendar.starts, calendar.ends)) == [(0.0, 6.0), (22.0, 23.0), (26.0, 30.0), (46.0, 48.0)]
+    assert calendar.earliest_start(22.5, 2.0) == 22.5
+    split = AvailabilityCalendar.from_shifts(parse_shifts('22-6'), num_days=2, downtimes=[(23.0, 25.0)], split_jobs=False)
+    assert split.earliest_start(22.5, 2.0) == 25.0
+
+def _reference_earliest_start(windows, time, hours, split_jobs):
+    for start, end in windows:
+        if end <= time:
+            continue
+        start = max(time, start)
+        if split_jobs or start + hours <= end:
+            return start
+    return None
+
+def _reference_finish_time(windows, start, hours):
+    remaining = hours
+    for window_start, end in windows:
+        if end <= start:
+            continue
+        window_start = max(start, window_start)
+        if remaining <= end - window_start:
+            return window_start + remaining
+        remaining -= end - window_start
+    return None
+
+def test_thousands_of_windows_match_a_linear_scan():
+    # Quarter-hour grid, so every sum is exact and windows are often hit right at their boundaries
+    rng = random.Random(7)
+    windows, time = [], 0.0
+    for _ in range(5000):
+        time += rng.randint(1, 16) / 4
+        length = rng.randint(1, 40) / 4
+        windows.append((time, time + length))
+        time += length
+    calendar = AvailabilityCalendar(windows)
+    whole = AvailabilityCalendar(windows, split_jobs=False)
+
+    for _ in range(2000):
+        start = rng.randint(-8, int(time * 4) + 8) / 4
+        hours = rng.randint(0, 48) / 4
+        assert calendar.earliest_start(start, hours) == _reference_earliest_start(windows, start, hours, True)
+        assert whole.earliest_start(start, hours) == _reference_earliest_start(windows, start, hours, False)
+        assert calendar.finish_time(start, hours) == (_reference_finish_time(windows, start, hours) if hours > 0 else start)
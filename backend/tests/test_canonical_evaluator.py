@@ -0,0 +1,59 @@
+import pandas as pd
+
+from backend.models.instance import build_instance
+from backend.optimizers.evaluation_cache import EvaluationCache
+from backend.optimizers.genetic_optimizer3 import _CanonicalEvaluator, _calculate_fitness, create_evaluator
+
+def _separable_instance():
+    df = pd.DataFrame({
+        'referencia': [f'REF{i:03d}' for i in range(6)],
+        'metros_requeridos': [3000, 5000, 4000, 2000, 6000, 3500],
+        'velocidad_sugerida': [100, 120, 90, 110, 100, 80],
+        'tipo_de_impresion': ['A', 'B', 'A', 'C', 'B', 'C'],
+        'nivel_de_criticidad': [3, 5, 1, 4, 2, 5],
+        'maquina_sugerida': ['M1', 'M1', 'M1', 'M2', 'M2', 'M2'],
+        'diametro_de_manga': [300, 320, 300, 350, 300, 320],
+    })
+    instance = build_instance(df)
+    templates = instance.new_machine_schedules()
+    evaluator = create_evaluator(instance.jobs, templates)
+    assert isinstance(evaluator, _CanonicalEvaluator)
+    return instance.jobs, templates, evaluator
+
+def _evaluate(evaluator, cache, chromosome):
+    key = evaluator.key(chromosome)
+    fitness = cache.get(key)
+    if fitness is None:
+        fitness = evaluator.fitness(chromosome)
+        cache.put(key, fitness)
+    return key, fitness
+
+def test_interleavings_of_the_same_machine_sequences_share_a_key():
+    jobs, templates, evaluator = _separable_instance()
+    cache = EvaluationCache()
+    first = [jobs[i] for i in (0, 3, 1, 4, 2, 5)]
+    second = [jobs[i] for i in (3, 4, 0, 5, 1, 2)]
+
+    first_key, first_fitness = _evaluate(evaluator, cache, first)
+    assert evaluator.machine_simulations == 2
+    second_key, second_fitness = _evaluate(evaluator, cache, second)
+
+    assert second_key == first_key
+    assert cache.hits == 1
+    assert evaluator.machine_simulations == 2
+    assert second_fitness == first_fitness == _calculate_fitness(second, templates)
+
+def test_changing_one_machine_simulates_only_that_machine():
+    jobs, templates, evaluator = _separable_instance()
+    cache = EvaluationCache()
+    original = [jobs[i] for i in (0, 3, 1, 4, 2, 5)]
+    # Same order on M2, M1 runs REF001 before REF000
+    changed = [jobs[i] for i in (1, 3, 0, 4, 2, 5)]
+
+    original_key, _ = _evaluate(evaluator, cache, original)
+    changed_key, changed_fitness = _evaluate(evaluator, cache, changed)
+
+    assert changed_key != original_key
+    assert evaluator.machine_simulations == 3
+    assert evaluator.machine_cache.hits == 1
+    assert changed_fitness == _calculate_fitness(changed, templates)
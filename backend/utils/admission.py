@@ -0,0 +1,87 @@
+"""
+Admission control of the CPU-heavy optimization endpoints.
+
+Identical requests (same uploaded file content, endpoint and parameters) that arrive while one of
+them is still running are coalesced: the first one starts the computation and every duplicate
+awaits the same task (single flight). Distinct computations run in a worker thread, at most
+MAX_CONCURRENT_OPTIMIZATIONS at a time, so the event loop keeps serving the management endpoints;
+up to MAX_QUEUED_OPTIMIZATIONS more wait for a slot and the rest are rejected with an estimated
+Retry-After.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import time
+from typing import Any, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..config import MAX_CONCURRENT_OPTIMIZATIONS, MAX_QUEUED_OPTIMIZATIONS
+from ..optimizers.registry import INTERACTIVE_TIME_BUDGET_MS
+from .instrumentation import ADMISSIONS_TOTAL, profiled_call
+
+class AdmissionRejected(Exception):
+    """Raised when every slot and queue position is taken; retry_after is in whole seconds."""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many optimizations in progress, retry in {retry_after} s")
+        self.retry_after = retry_after
+
+def request_key(file_hash: str, endpoint: str, **params) -> str:
+    """Coalescing key: SHA-256 of the uploaded file's hash plus the endpoint and its parameters."""
+    payload = json.dumps([file_hash, endpoint, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class OptimizationGate:
+    def __init__(self, max_running: int = MAX_CONCURRENT_OPTIMIZATIONS, max_queued: int = MAX_QUEUED_OPTIMIZATIONS,
+                 initial_run_seconds: float = INTERACTIVE_TIME_BUDGET_MS / 1000):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        # Exponential moving average of the run time, for the Retry-After estimate
+        self.run_seconds = initial_run_seconds
+
+    async def run(self, key: str, function: Callable, *args, discard: Optional[Callable] = None, **kwargs) -> Any:
+        """
+        Result of function(*args, **kwargs), computed in a worker thread or taken from the identical
+        computation already in flight. Raises AdmissionRejected when the gate is full. Exceptions of the
+        function reach every request coalesced on it. A request that is cancelled (client gone) does not
+        cancel the computation the others wait for.
+        When function will not run (coalesced or rejected), discard() is called at once, e.g. to close
+        the upload it would have read.
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            ADMISSIONS_TOTAL.inc(1, 'coalesced')
+            if discard is not None:
+                discard()
+        else:
+            if len(self._in_flight) >= self.max_running + self.max_queued:
+                ADMISSIONS_TOTAL.inc(1, 'rejected')
+                if discard is not None:
+                    discard()
+                raise AdmissionRejected(self.retry_after())
+            ADMISSIONS_TOTAL.inc(1, 'computed')
+            task = asyncio.ensure_future(self._compute(function, *args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _compute(self, function: Callable, *args, **kwargs) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_running)
+        async with self._slots:
+            start = time.perf_counter()
+            try:
+                # The worker inherits the request's context, so a ?profile= request profiles the optimizer too
+                return await run_in_threadpool(profiled_call, function, *args, **kwargs)
+            finally:
+                self.run_seconds = 0.8 * self.run_seconds + 0.2 * (time.perf_counter() - start)
+
+    def retry_after(self) -> int:
+        """Seconds until the computations in flight are expected to be done, at least 1."""
+        return max(1, math.ceil(self.run_seconds * len(self._in_flight) / self.max_running))
+
+optimization_gate = OptimizationGate()
@@ -0,0 +1,314 @@
+"""
+Instrumentation of the optimization pipeline: per-stage timers, placement counters,
+Prometheus-format metrics and on-demand profiling of a single request.
+
+A PipelineTimer is opened per request by the middleware in main.py and made current through a
+context variable, so any layer (router, service, optimizer) can time a stage with
+`with timed_stage('name'):` without passing the timer around. Outside a request it is a no-op.
+"""
+
+import bisect
+import contextlib
+import contextvars
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..models.domain import MachineSchedule
+
+class PipelineTimer:
+    """
+    Wall time of every stage of one request (time.perf_counter, monotonic) plus the machine
+    placements and slot searches made meanwhile. The counters are process-wide, so with
+    concurrent requests they are approximate.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counters: Counter = Counter()
+        self._placements_start = MachineSchedule.placements
+        self._slot_searches_start = MachineSchedule.slot_searches
+        # Summary block kept up to date as stages finish, see report()
+        self._report = {'stages_ms': {}, 'counters': {}}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            self._refresh()
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] += value
+        self._refresh()
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def _refresh(self):
+        self._report['stages_ms'].update({name: round(seconds * 1000, 2) for name, seconds in self.stages.items()})
+        self._report['counters'].update(self.counters)
+        self._report['counters']['placements'] = MachineSchedule.placements - self._placements_start
+        self._report['counters']['slot_searches'] = MachineSchedule.slot_searches - self._slot_searches_start
+
+    def report(self) -> dict:
+        """
+        The 'timings' block of the summary. It is the same dict the timer keeps updating, so stages
+        that finish after the summary is built (e.g. formatting it) still show up in the response.
+        """
+        self._refresh()
+        return self._report
+
+    def server_timing(self) -> str:
+        """Value of the Server-Timing header, in milliseconds."""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        entries.append(f"total;dur={self.total() * 1000:.1f}")
+        return ', '.join(entries)
+
+_current_timer: contextvars.ContextVar[Optional[PipelineTimer]] = contextvars.ContextVar('pipeline_timer', default=None)
+
+def start_timer() -> Tuple[PipelineTimer, contextvars.Token]:
+    timer = PipelineTimer()
+    return timer, _current_timer.set(timer)
+
+def stop_timer(token: contextvars.Token):
+    _current_timer.reset(token)
+
+def current_timer() -> Optional[PipelineTimer]:
+    return _current_timer.get()
+
+def timed_stage(name: str):
+    """Times a stage of the current request; does nothing outside a request."""
+    timer = _current_timer.get()
+    return timer.stage(name) if timer is not None else contextlib.nullcontext()
+
+def count(name: str, value: int = 1):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.count(name, value)
+
+# --- Prometheus metrics (text exposition format 0.0.4), without external dependencies ---
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, name: str, documentation: str, label_names: List[str], buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {} # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, series):
+                    cumulative += bucket_count
+                    bucket_labels = _format_labels(self.label_names, labels, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                bucket_labels = _format_labels(self.label_names, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+class CounterMetric:
+    def __init__(self, name: str, documentation: str, label_names: List[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+REQUEST_SECONDS = Histogram('optimizer_request_duration_seconds', 'Duration of the HTTP requests.', ['path', 'status'])
+STAGE_SECONDS = Histogram('optimizer_stage_duration_seconds', 'Duration of each stage of the optimization pipeline.', ['path', 'stage'])
+WORK_TOTAL = CounterMetric('optimizer_work_total', 'Fitness evaluations, placements and slot searches made by the optimizers.', ['counter'])
+ADMISSIONS_TOTAL = CounterMetric('optimizer_admissions_total',
+                                 'Optimization requests computed, coalesced with an identical one in flight or rejected.', ['outcome'])
+
+def observe_request(path: str, status: int, timer: PipelineTimer):
+    REQUEST_SECONDS.observe(timer.total(), path, str(status))
+    for stage, seconds in timer.stages.items():
+        STAGE_SECONDS.observe(seconds, path, stage)
+    for name, value in timer.report()['counters'].items():
+        if value:
+            WORK_TOTAL.inc(value, name)
+
+def render_metrics() -> str:
+    lines = REQUEST_SECONDS.render() + STAGE_SECONDS.render() + WORK_TOTAL.render() + ADMISSIONS_TOTAL.render()
+    return '\n'.join(lines) + '\n'
+
+# --- Profiling of a single request (debug) ---
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread samples the stack of the profiled threads every
+    'interval' seconds. Far cheaper than cProfile on long runs, at the price of exact call counts.
+    """
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_ids = {thread_id or threading.get_ident()}
+        self.interval = interval
+        self.samples = 0
+        self.own: Counter = Counter() # Samples where the function was running
+        self.cumulative: Counter = Counter() # Samples where the function was on the stack
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                self.samples += 1
+                self.own[self._describe(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    name = self._describe(frame)
+                    if name not in seen:
+                        seen.add(name)
+                        self.cumulative[name] += 1
+                    frame = frame.f_back
+
+    @staticmethod
+    def _describe(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+
+    def report(self, limit: int = 25) -> dict:
+        def share(counts: Counter) -> List[dict]:
+            return [{'function': name, 'samples': n, 'percent': round(100 * n / self.samples, 1)}
+                    for name, n in counts.most_common(limit)]
+        return {'profiler': 'sample', 'interval_ms': self.interval * 1000, 'samples': self.samples,
+                'own': share(self.own), 'cumulative': share(self.cumulative)}
+
+class RequestProfiler:
+    """
+    Profiles one request, with cProfile or by sampling, on every thread it runs on: the event loop thread
+    between start() and stop() in the middleware, and the worker thread of the optimization gate (see
+    profiled_call), where the optimizer itself runs. The report merges all of them.
+    """
+    MODES = ('cprofile', 'sample')
+
+    def __init__(self, mode: str):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profiler '{mode}'. Available: {', '.join(self.MODES)}")
+        self.mode = mode
+        self._profiles: List[cProfile.Profile] = []
+        self._running: Dict[int, cProfile.Profile] = {}
+        self._sampler: Optional[SamplingProfiler] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts profiling the calling thread."""
+        thread_id = threading.get_ident()
+        if self.mode == 'cprofile':
+            profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+                self._running[thread_id] = profile
+            profile.enable()
+            return
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = SamplingProfiler(thread_id)
+                self._sampler.start()
+            else:
+                self._sampler.thread_ids.add(thread_id)
+
+    def stop(self):
+        """Stops profiling the calling thread."""
+        thread_id = threading.get_ident()
+        if self.mode == 'cprofile':
+            with self._lock:
+                profile = self._running.pop(thread_id, None)
+            if profile is not None:
+                profile.disable()
+            return
+        with self._lock:
+            if self._sampler is None:
+                return
+            self._sampler.thread_ids.discard(thread_id)
+            if not self._sampler.thread_ids:
+                self._sampler.stop()
+
+    def report(self, limit: int = 25) -> dict:
+        if self.mode == 'sample':
+            return self._sampler.report(limit) if self._sampler is not None else {'profiler': 'sample', 'samples': 0}
+        output = io.StringIO()
+        if self._profiles:
+            stats = pstats.Stats(self._profiles[0], stream=output)
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.sort_stats('cumulative').print_stats(limit)
+        return {'profiler': 'cprofile', 'threads': len(self._profiles), 'stats': output.getvalue().splitlines()}
+
+_current_profiler: contextvars.ContextVar[Optional[RequestProfiler]] = contextvars.ContextVar('request_profiler', default=None)
+
+def start_profiler(profiler: RequestProfiler) -> contextvars.Token:
+    """Makes 'profiler' the current request's profiler and starts it on the calling thread."""
+    token = _current_profiler.set(profiler)
+    profiler.start()
+    return token
+
+def stop_profiler(token: contextvars.Token):
+    _current_profiler.get().stop()
+    _current_profiler.reset(token)
+
+def profiled_call(function: Callable, *args, **kwargs):
+    """
+    Calls function(*args, **kwargs) on the calling thread, profiled by the current request's profiler if
+    it has one. Worker threads inherit the request's context but not its profiling, which is per thread.
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return function(*args, **kwargs)
+    profiler.start()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        profiler.stop()
@@ -0,0 +1,50 @@
+"""
+Response path of the schedule endpoints: content negotiation between the row-oriented JSON
+(default, the shape the client always had) and a columnar payload, both encoded directly to
+bytes, without FastAPI's jsonable_encoder pass over every job.
+"""
+
+import json
+from typing import Any
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError: # Optional: the standard json module is used instead
+    orjson = None
+
+ROWS_MEDIA_TYPE = "application/json"
+# optimized_schedule as {machine: {field: [values...]}} instead of {machine: [{field: value}, ...]}
+COLUMNAR_MEDIA_TYPE = "application/vnd.optimizer.columnar+json"
+
+LAYOUT_ROWS = "rows"
+LAYOUT_COLUMNS = "columns"
+
+def negotiate_layout(request: Request) -> str:
+    """'columns' if the client accepts the columnar media type, 'rows' otherwise."""
+    accept = request.headers.get("accept", "")
+    return LAYOUT_COLUMNS if COLUMNAR_MEDIA_TYPE in accept else LAYOUT_ROWS
+
+def _default(value: Any):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8")
+
+class ScheduleResponse(Response):
+    """JSON response encoded in one call (orjson when installed); the media type tells the layout."""
+    def __init__(self, content: Any, layout: str = LAYOUT_ROWS, **kwargs):
+        media_type = COLUMNAR_MEDIA_TYPE if layout == LAYOUT_COLUMNS else ROWS_MEDIA_TYPE
+        super().__init__(content, media_type=media_type, headers={"Vary": "Accept"}, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
@@ -0,0 +1,74 @@
+"""
+Upload path of the Excel endpoints: a request body size limit enforced while the body streams in,
+and the uploaded file hashed in chunks where the multipart parser left it (Starlette's own spooled
+temporary file: in memory up to 1 MB, on disk past it), so the upload is never copied nor held whole
+in memory and the parser reads straight from that file.
+"""
+
+import hashlib
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from ..config import MAX_UPLOAD_BYTES
+
+CHUNK_BYTES = 64 * 1024
+
+def _too_large_detail(max_bytes: int) -> str:
+    return f"Request body larger than {max_bytes // (1024 * 1024)} MB"
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware rejecting request bodies over max_bytes with 413: at once from Content-Length when
+    the client sends it, otherwise as soon as the bytes received pass the limit, before the multipart
+    form is parsed (FastAPI lets an HTTPException raised while reading the body through).
+    """
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse({'detail': _too_large_detail(self.max_bytes)}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=_too_large_detail(self.max_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+class SpooledUpload:
+    """An uploaded file, rewound for reading, with its size and SHA-256. The owner must close() it."""
+    def __init__(self, upload: UploadFile, size: int, sha256: str):
+        self.file = upload.file
+        self.size = size
+        self.sha256 = sha256
+
+    def close(self):
+        self.file.close()
+
+async def spool_upload(upload: UploadFile) -> SpooledUpload:
+    """Hashes 'upload' in CHUNK_BYTES chunks and rewinds it, without copying it."""
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        while chunk := await upload.read(CHUNK_BYTES):
+            digest.update(chunk)
+            size += len(chunk)
+        await upload.seek(0)
+    except BaseException:
+        await upload.close()
+        raise
+    return SpooledUpload(upload, size, digest.hexdigest())
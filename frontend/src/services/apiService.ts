@@ -1,8 +1,26 @@
 import axios from 'axios';
-import { Schedule, Machine, SleeveSet, OptimizationSummary } from '../types/api';
+import { Job, Schedule, Machine, SleeveSet, OptimizationSummary } from '../types/api';
 
 const API_URL = 'http://localhost:8000';
 
+// Columnar schedule payload: one array per field per machine, much smaller and faster to encode for large schedules
+const COLUMNAR_MEDIA_TYPE = 'application/vnd.optimizer.columnar+json';
+
+type ColumnarSchedule = { [machine: string]: { [field in keyof Job]: Job[field][] } };
+
+const columnsToRows = (schedule: ColumnarSchedule): Schedule => {
+  const rows: Schedule = {};
+  Object.entries(schedule).forEach(([machine, columns]) => {
+    const fields = Object.keys(columns) as (keyof Job)[];
+    rows[machine] = columns.orden.map((_, i) => {
+      const job = {} as Record<keyof Job, Job[keyof Job]>;
+      fields.forEach(field => { job[field] = columns[field][i]; });
+      return job as Job;
+    });
+  });
+  return rows;
+};
+
 // Optimization Functions
 export const uploadFile = async (file: File, endpoint: string): Promise<{ optimized_schedule: Schedule, summary: OptimizationSummary }> => {
   const formData = new FormData();
@@ -11,8 +29,12 @@ export const uploadFile = async (file: File, endpoint: string): Promise<{ optimi
   const response = await axios.post(`${API_URL}${endpoint}`, formData, {
     headers: {
       'Content-Type': 'multipart/form-data',
+      'Accept': `${COLUMNAR_MEDIA_TYPE}, application/json;q=0.9`,
     },
   });
+  if (String(response.headers['content-type']).startsWith(COLUMNAR_MEDIA_TYPE)) {
+    return { ...response.data, optimized_schedule: columnsToRows(response.data.optimized_schedule) };
+  }
   return response.data;
 };
 